@@ -0,0 +1,93 @@
+"""Encode time and size per sprite sheet for each sheet format (SpriteEncoder).
+
+Sheets are synthetic: 160x90 tiles of gradients with shapes and some grain, like small video frames.
+An optional directory of sprite images (e.g. sheets of a real job) is used instead.
+
+Run from repo root: python -m bench.encode_bench [sheets] [sprites_dir]
+"""
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from config.service_cfg import cfg
+from utils.ffmpeg_ut import ENCODERS
+
+TILE_W, TILE_H = cfg.DEFAULT_TILE_W, cfg.DEFAULT_TILE_H
+COLS = ROWS = 10
+
+def synthetic_sheet(rnd):
+    sheet = Image.new("RGB", (COLS * TILE_W, ROWS * TILE_H))
+    for i in range(COLS * ROWS):
+        c1 = tuple(rnd.randrange(256) for _ in range(3))
+        c2 = tuple(rnd.randrange(256) for _ in range(3))
+        tile = Image.linear_gradient("L").resize((TILE_W, TILE_H))
+        tile = Image.composite(Image.new("RGB", tile.size, c1), Image.new("RGB", tile.size, c2), tile)
+        draw = ImageDraw.Draw(tile)
+        for _ in range(4):
+            x, y = rnd.randrange(TILE_W), rnd.randrange(TILE_H)
+            r = rnd.randrange(5, 30)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rnd.randrange(256) for _ in range(3)))
+        tile = tile.filter(ImageFilter.GaussianBlur(1))
+        grain = Image.effect_noise(tile.size, 12).convert("RGB")
+        tile = Image.blend(tile, grain, 0.08)
+        sheet.paste(tile, ((i % COLS) * TILE_W, (i // COLS) * TILE_H))
+    return sheet
+
+def load_sheets(sprites_dir):
+    names = sorted(n for n in os.listdir(sprites_dir) if n.startswith("sprite_"))
+    return [Image.open(os.path.join(sprites_dir, n)).convert("RGB") for n in names]
+
+def variants():
+    """(label, encoder, overrides of cfg knobs)."""
+    yield "jpg", ENCODERS["jpg"], {"JPEG_OPTIMIZE": True}
+    yield "jpg no-optimize", ENCODERS["jpg"], {"JPEG_OPTIMIZE": False}
+    yield "webp", ENCODERS["webp"], {}
+    yield "webp method=0", ENCODERS["webp"], {"WEBP_METHOD": 0}
+    yield "avif", ENCODERS["avif"], {}
+
+def run(sheets, encoder, overrides):
+    saved = {k: getattr(cfg, k) for k in overrides}
+    for k, v in overrides.items():
+        setattr(cfg, k, v)
+    try:
+        quality = encoder.default_quality()
+        times, sizes = [], []
+        for sheet in sheets:
+            buf = io.BytesIO()
+            t0 = time.perf_counter()
+            sheet.save(buf, format=encoder.pil_format, **encoder.save_args(quality))
+            times.append((time.perf_counter() - t0) * 1000)
+            sizes.append(buf.tell())
+        return quality, statistics.mean(times), statistics.mean(sizes)
+    finally:
+        for k, v in saved.items():
+            setattr(cfg, k, v)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    if len(sys.argv) > 2:
+        sheets = load_sheets(sys.argv[2])
+        source = sys.argv[2]
+    else:
+        rnd = random.Random(1)
+        sheets = [synthetic_sheet(rnd) for _ in range(n)]
+        source = "synthetic"
+    w, h = sheets[0].size
+    print(f"[BENCH] {len(sheets)} sheets {w}x{h} ({source})")
+    base = None
+    for label, encoder, overrides in variants():
+        if not encoder.available():
+            print(f"[BENCH] {label:16s} not supported by this Pillow build")
+            continue
+        quality, ms, size = run(sheets, encoder, overrides)
+        base = base or size
+        print(f"[BENCH] {label:16s} q={quality:3d}  encode={ms:8.2f} ms/sheet  "
+              f"size={size / 1024:8.1f} KB/sheet  ({size / base * 100:5.1f}% of jpg)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Sheets per second of laying out raw rgb24 tiles: Pillow paste per tile vs one NumPy transpose per sheet.
+
+Only the layout is timed (tiles already in memory, no encoding), 160x90 tiles of random bytes.
+The numpy packer is skipped if numpy isn't installed.
+
+Run from repo root: python -m bench.pack_bench [seconds_per_case]
+"""
+import os
+import sys
+import time
+
+from config.service_cfg import cfg
+from utils.ffmpeg_ut import PACKERS
+
+TILE_W, TILE_H = cfg.DEFAULT_TILE_W, cfg.DEFAULT_TILE_H
+GRIDS = ((10, 10), (20, 20))
+
+def pack(canvas, tiles, cols, rows):
+    sheet = canvas(cols, rows, TILE_W, TILE_H)
+    for i, buf in enumerate(tiles):
+        sheet.put(i, buf)
+    return sheet.image()
+
+def run(canvas, tiles, cols, rows, seconds):
+    sheets = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        pack(canvas, tiles, cols, rows)
+        sheets += 1
+    return sheets / (time.perf_counter() - t0)
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    for cols, rows in GRIDS:
+        tiles = [os.urandom(TILE_W * TILE_H * 3) for _ in range(cols * rows)]
+        images = {name: pack(canvas, tiles, cols, rows).tobytes()
+                  for name, canvas in PACKERS.items() if canvas.available()}
+        same = len(set(images.values())) == 1
+        print(f"[BENCH] {cols}x{rows} grid of {TILE_W}x{TILE_H} tiles, identical output: {same}")
+        base = None
+        for name, canvas in PACKERS.items():
+            if not canvas.available():
+                print(f"[BENCH]   {name:6s} not available (numpy not installed)")
+                continue
+            rate = run(canvas, tiles, cols, rows, seconds)
+            base = base or rate
+            print(f"[BENCH]   {name:6s} {rate:8.1f} sheets/s  ({rate / base:4.2f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Queue-to-start latency of JobManager: old 1 s sleep-polling workers vs blocking take().
+
+Run from repo root: python -m bench.queue_bench [jobs] [workers]
+"""
+import random
+import statistics
+import sys
+import threading
+import time
+
+from runtime.queue_rt import JobManager
+
+POLL_SEC = 1.0  # sleep of the old worker_loop
+WORK_SEC = 0.01  # simulated job duration
+
+def poll_worker(jm, started, stop):
+    while not stop.is_set():
+        job = jm.pop_next_job()
+        if not job:
+            time.sleep(POLL_SEC)
+            continue
+        started[job.job_id] = time.monotonic()
+        time.sleep(WORK_SEC)
+
+def take_worker(jm, started, stop):
+    while not stop.is_set():
+        job = jm.take(timeout=0.2)
+        if not job:
+            continue
+        started[job.job_id] = time.monotonic()
+        time.sleep(WORK_SEC)
+
+def run(worker_fn, jobs, workers, seed=1):
+    jm = JobManager(max_queue=jobs + 1)
+    started, created = {}, {}
+    stop = threading.Event()
+    threads = [threading.Thread(target=worker_fn, args=(jm, started, stop), daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+
+    rnd = random.Random(seed)
+    for _ in range(jobs):
+        # Sparse arrivals, like real uploads
+        time.sleep(rnd.uniform(0.05, 0.3))
+        t0 = time.monotonic()
+        job_id = jm.create_job("v", "video/mp4", None)
+        created[job_id] = t0
+
+    while len(started) < jobs:
+        time.sleep(0.01)
+    stop.set()
+
+    lat = sorted((started[j] - created[j]) * 1000 for j in created)
+    return {
+        "mean_ms": statistics.mean(lat),
+        "p50_ms": lat[len(lat) // 2],
+        "p95_ms": lat[int(len(lat) * 0.95) - 1],
+        "max_ms": lat[-1],
+    }
+
+def mass_cancel(n=20000):
+    """pop_next_job over n canceled entries (the old recursive version hit the recursion limit)."""
+    jm = JobManager(max_queue=n + 1)
+    ids = [jm.create_job("v", "video/mp4", None) for _ in range(n)]
+    for job_id in ids:
+        jm.cancel_job(job_id)
+    live = jm.create_job("v", "video/mp4", None)
+    t0 = time.monotonic()
+    job = jm.pop_next_job()
+    return job.job_id == live, (time.monotonic() - t0) * 1000
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    print(f"[BENCH] {jobs} jobs, {workers} workers, work {WORK_SEC * 1000:.0f} ms")
+    for name, fn in (("poll", poll_worker), ("take", take_worker)):
+        r = run(fn, jobs, workers)
+        print(f"[BENCH] {name:5s} " + "  ".join(f"{k}={v:8.2f}" for k, v in r.items()))
+    ok, ms = mass_cancel()
+    print(f"[BENCH] skip 20000 canceled: ok={ok} {ms:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Wait times of JobManager scheduling policies on a simulated mixed workload.
+
+One tenant drops a batch of long videos at t=0, many others upload short clips over time.
+Workers are simulated with an event clock; queue order comes from the real JobManager.
+
+Run from repo root: python -m bench.scheduling_bench [workers]
+"""
+import heapq
+import random
+import sys
+
+from runtime.queue_rt import JobManager
+from runtime.models_rt import MediaInfo
+
+SPEEDUP = 20.0  # seconds of video processed per second of worker time
+BULK_JOBS = 50
+BULK_DURATION = 3600.0
+SHORT_JOBS = 300
+SHORT_EVERY = 30.0  # mean gap between short uploads, sec
+SHORT_TENANTS = 40
+
+def workload(seed=1):
+    """(arrival, tenant, duration, priority), sorted by arrival."""
+    rnd = random.Random(seed)
+    jobs = [(0.0, "bulk", BULK_DURATION, 0) for _ in range(BULK_JOBS)]
+    t = 0.0
+    for _ in range(SHORT_JOBS):
+        t += rnd.expovariate(1 / SHORT_EVERY)
+        # Short clips are the interactive class when priorities are used
+        jobs.append((t, f"user{rnd.randrange(SHORT_TENANTS)}", rnd.uniform(30, 600), 1))
+    return sorted(jobs, key=lambda j: j[0])
+
+def simulate(policy, use_priority, workers, jobs):
+    jm = JobManager(max_queue=len(jobs) + 1, policy=policy)
+    jm.scheduler.use_priority = use_priority
+    events = [(arrival, 0, i) for i, arrival in enumerate(j[0] for j in jobs)]
+    heapq.heapify(events)
+    info = {}
+    waits = {"short": [], "bulk": []}
+    free = workers
+
+    while events:
+        now, kind, i = heapq.heappop(events)
+        if kind == 0:
+            arrival, tenant, duration, prio = jobs[i]
+            job_id = jm.create_job(f"v{i}", "video/mp4", None, enqueue=False, priority=prio, tenant=tenant)
+            job = jm.get_job(job_id)
+            job.probe = MediaInfo(duration_sec=duration)
+            job.created_at = now
+            info[job_id] = (now, duration, "bulk" if tenant == "bulk" else "short")
+            jm.enqueue_job(job_id)
+        else:
+            free += 1
+        while free:
+            job = jm.pop_next_job()
+            if not job:
+                break
+            arrived, duration, cls = info[job.job_id]
+            waits[cls].append(now - arrived)
+            free -= 1
+            heapq.heappush(events, (now + duration / SPEEDUP, 1, -1))
+    return waits
+
+def pct(values, q):
+    v = sorted(values)
+    return v[min(len(v) - 1, int(len(v) * q))] if v else 0.0
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    jobs = workload()
+    print(f"[BENCH] {BULK_JOBS} x {BULK_DURATION:.0f}s bulk videos at t=0, {SHORT_JOBS} short clips "
+          f"from {SHORT_TENANTS} tenants, {workers} workers, speed x{SPEEDUP:.0f}")
+    print(f"[BENCH] {'policy':16s} {'short p50':>10s} {'short p99':>10s} {'bulk p50':>10s} {'bulk p99':>10s}  (wait, sec)")
+    for policy, use_priority in (("fifo", False), ("fifo", True), ("sjf", False), ("fair", False)):
+        waits = simulate(policy, use_priority, workers, jobs)
+        name = policy + ("+priority" if use_priority else "")
+        print(f"[BENCH] {name:16s} {pct(waits['short'], 0.5):10.0f} {pct(waits['short'], 0.99):10.0f} "
+              f"{pct(waits['bulk'], 0.5):10.0f} {pct(waits['bulk'], 0.99):10.0f}")
+
+if __name__ == '__main__':
+    main()
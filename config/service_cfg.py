@@ -2,13 +2,104 @@ import os
 import tempfile
 
 class Config:
+    # Node role: 'all' (gRPC server + local workers), 'frontend' (gRPC server, jobs are only leased
+    # to remote workers) or 'worker' (no server, leases jobs from FRONTEND_ADDR)
+    ROLE = os.getenv('ROLE', 'all')
+    # Work service address of the frontend (its WORK_PORT), for ROLE=worker
+    FRONTEND_ADDR = os.getenv('FRONTEND_ADDR', '127.0.0.1:60052')
+    # ROLE=frontend serves the Work service (job leases, inputs, results of remote workers)
+    # on this port only, apart from the public API. Keep it reachable by workers only.
+    WORK_PORT = int(os.getenv('WORK_PORT', 60052))
+    # Shared secret sent by workers with every Work call; ROLE=frontend refuses to start without it
+    WORK_TOKEN = os.getenv('WORK_TOKEN', '')
+    # Default <hostname>-<pid>
+    WORKER_ID = os.getenv('WORKER_ID', '')
+    # Remote workers: lease is lost if not renewed for LEASE_TTL_SEC, then job is requeued
+    # (failed after LEASE_MAX_ATTEMPTS leases)
+    LEASE_TTL_SEC = float(os.getenv('LEASE_TTL_SEC', 30))
+    LEASE_HEARTBEAT_SEC = float(os.getenv('LEASE_HEARTBEAT_SEC', 5))
+    LEASE_MAX_ATTEMPTS = int(os.getenv('LEASE_MAX_ATTEMPTS', 3))
+    # Long poll of Lease
+    LEASE_WAIT_SEC = float(os.getenv('LEASE_WAIT_SEC', 20))
+    
     # gRPC settings
     GRPC_PORT = int(os.getenv('GRPC_PORT', 60051))
     MAX_WORKERS = int(os.getenv('MAX_WORKERS', 2))
+    # Threads of sync gRPC server, each open WatchStatus stream takes one
+    GRPC_THREADS = int(os.getenv('GRPC_THREADS', 32))
+    # WatchStatus resends current state if nothing changed for that long
+    WATCH_HEARTBEAT_SEC = float(os.getenv('WATCH_HEARTBEAT_SEC', 15))
+    # 'thread' (sync gRPC server + worker threads) or 'aio' (grpc.aio server + asyncio workers)
+    SERVER_MODE = os.getenv('SERVER_MODE', 'thread')
+    # Threads for blocking work (disk, Pillow packing) in 'aio' mode
+    AIO_EXECUTOR_THREADS = int(os.getenv('AIO_EXECUTOR_THREADS', 4))
+    # Plain-text metrics for Prometheus at http://<host>:METRICS_PORT/metrics (0 = off)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
     
     # Runtime limits
     MAX_QUEUE_SIZE = 100
     MAX_VIDEO_SIZE_MB = 500
+    # Probed inputs over these limits are rejected before decoding (0 = no limit)
+    MAX_DURATION_SEC = float(os.getenv('MAX_DURATION_SEC', 6 * 3600))
+    MAX_PIXELS = int(os.getenv('MAX_PIXELS', 7680 * 4320))
+    # Probe results kept by content hash
+    PROBE_CACHE_SIZE = int(os.getenv('PROBE_CACHE_SIZE', 1000))
+
+    # Admission of uploads, checked before the video is written (0 = no limit). Rejected
+    # Submit gets RESOURCE_EXHAUSTED with 'retry-after' (seconds) in trailing metadata.
+    # Input bytes of queued and running jobs
+    ADMIT_MAX_QUEUED_MB = int(os.getenv('ADMIT_MAX_QUEUED_MB', 4096))
+    # Free space left in TMP_DIR after the upload and uploads in progress
+    ADMIT_MIN_FREE_DISK_MB = int(os.getenv('ADMIT_MIN_FREE_DISK_MB', 1024))
+    # Estimated wall time for MAX_WORKERS to finish admitted jobs
+    ADMIT_MAX_BACKLOG_SEC = float(os.getenv('ADMIT_MAX_BACKLOG_SEC', 3600))
+    # Work estimate: seconds of video rendered per worker-second, and input bitrate
+    # (bytes/s) assumed for duration before probe
+    ADMIT_DECODE_SPEED = float(os.getenv('ADMIT_DECODE_SPEED', 20))
+    ADMIT_BYTES_PER_SEC = int(os.getenv('ADMIT_BYTES_PER_SEC', 250000))
+    # Retry hint when the drain time can't be estimated (disk full)
+    ADMIT_RETRY_DEFAULT_SEC = int(os.getenv('ADMIT_RETRY_DEFAULT_SEC', 60))
+
+    # Queue order: 'fifo', 'sjf' (shortest probed duration first) or 'fair' (fair share of
+    # worker time between tenants; video_id is the owner if no tenant given)
+    SCHED_POLICY = os.getenv('SCHED_POLICY', 'fifo')
+    # Serve higher Submit priority first, before the policy order. Off by default: priority comes
+    # from the client, so turn it on only when callers are trusted (e.g. only the app backend).
+    SCHED_USE_PRIORITY = os.getenv('SCHED_USE_PRIORITY', '0') == '1'
+    # Priority classes are 0..SCHED_MAX_PRIORITY, Submit priority is clamped into that range
+    SCHED_MAX_PRIORITY = int(os.getenv('SCHED_MAX_PRIORITY', 2))
+    # 'sjf': a second of waiting is worth that many seconds of video duration
+    SCHED_SJF_AGING = float(os.getenv('SCHED_SJF_AGING', 1.0))
+    # Cost of a job whose duration is unknown
+    SCHED_DEFAULT_COST_SEC = float(os.getenv('SCHED_DEFAULT_COST_SEC', 300))
+
+    # Finished jobs: dropped RESULT_GRACE_SEC after first GetResult or JOB_TTL_SEC after finish,
+    # oldest first while their results take over RETAINED_MAX_MB on disk (0 = no cap)
+    RESULT_GRACE_SEC = float(os.getenv('RESULT_GRACE_SEC', 600))
+    JOB_TTL_SEC = float(os.getenv('JOB_TTL_SEC', 24 * 3600))
+    RETAINED_MAX_MB = int(os.getenv('RETAINED_MAX_MB', 2048))
+    REAPER_INTERVAL_SEC = float(os.getenv('REAPER_INTERVAL_SEC', 30))
+
+    # Finished results cached on disk by hash of video + options
+    RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', '1') == '1'
+    RESULT_CACHE_MAX_MB = int(os.getenv('RESULT_CACHE_MAX_MB', 1024))
+    RESULT_CACHE_TTL_SEC = int(os.getenv('RESULT_CACHE_TTL_SEC', 7 * 24 * 3600))
+    
+    # Where process_video runs: 'thread' (in the worker thread) or 'process' (pool of worker
+    # processes, Pillow packing of parallel jobs doesn't contend for one GIL)
+    EXECUTION_BACKEND = os.getenv('EXECUTION_BACKEND', 'thread')
+    # Pool size for 'process' backend (0 = MAX_WORKERS)
+    PROCESS_POOL_SIZE = int(os.getenv('PROCESS_POOL_SIZE', 0))
+    # 'spawn' is safe with gRPC threads in the parent; 'forkserver' starts faster
+    PROCESS_START_METHOD = os.getenv('PROCESS_START_METHOD', 'spawn')
+    
+    # Persist jobs in SQLite so queued work survives restarts. On start, workspaces in TMP_DIR
+    # that no stored job refers to are removed, so don't share TMP_DIR between instances.
+    JOB_STORE_ENABLED = os.getenv('JOB_STORE_ENABLED', '0') == '1'
+    # Default <TMP_DIR>/ytsprites_jobs.db
+    JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', None)
+    # Status changes are written in batches that often
+    JOB_STORE_FLUSH_SEC = float(os.getenv('JOB_STORE_FLUSH_SEC', 0.5))
     
     # Temp paths
     # If None use system temp.
@@ -18,7 +109,62 @@ class Config:
     DEFAULT_STEP_SEC = 2.0
     DEFAULT_COLS = 10
     DEFAULT_ROWS = 10
-    DEFAULT_FORMAT = 'jpg'
+    DEFAULT_FORMAT = os.getenv('DEFAULT_FORMAT', 'jpg')
+    # Tile box when SpriteOptions has no tile_w/tile_h
+    DEFAULT_TILE_W = int(os.getenv('DEFAULT_TILE_W', 160))
+    DEFAULT_TILE_H = int(os.getenv('DEFAULT_TILE_H', 90))
+    # 'auto' (tile follows source aspect within the box) or 'pad' (fixed box, letterboxed)
+    DEFAULT_TILE_FIT = os.getenv('DEFAULT_TILE_FIT', 'auto')
+    # Limits on requested tiles
+    MAX_TILE_SIDE = int(os.getenv('MAX_TILE_SIDE', 1280))
+    MAX_TILE_SCALE = int(os.getenv('MAX_TILE_SCALE', 3))
+    # Max SpriteOptions.variants per job
+    MAX_VARIANTS = int(os.getenv('MAX_VARIANTS', 4))
     DEFAULT_QUALITY = 70
 
+    # Sheet encoders: quality used when SpriteOptions.quality is 0, and speed/size knobs
+    JPEG_QUALITY = int(os.getenv('JPEG_QUALITY', 85))
+    # Extra Huffman optimization pass: a few % smaller, slower encode
+    JPEG_OPTIMIZE = os.getenv('JPEG_OPTIMIZE', '1') == '1'
+    WEBP_QUALITY = int(os.getenv('WEBP_QUALITY', 80))
+    # 0 (fast) .. 6 (smallest)
+    WEBP_METHOD = int(os.getenv('WEBP_METHOD', 4))
+    AVIF_QUALITY = int(os.getenv('AVIF_QUALITY', 60))
+    # 0 (slowest, smallest) .. 10 (fastest)
+    AVIF_SPEED = int(os.getenv('AVIF_SPEED', 6))
+
+    # Sprite engine: 'pipe' (raw frames via ffmpeg stdout), 'ffmpeg' (ffmpeg tile filter builds sheets)
+    # or 'files' (JPEG frames on disk)
+    SPRITE_ENGINE = os.getenv('SPRITE_ENGINE', 'pipe')
+    # How raw tiles are laid out into a sheet: 'pil' (paste per tile) or 'numpy' (one array
+    # transpose per sheet, needs numpy installed, else 'pil' is used)
+    SPRITE_PACKER = os.getenv('SPRITE_PACKER', 'pil')
+
+    # Frame extraction: 'auto', 'decode', 'keyframe' or 'seek'. SpriteOptions.extract_mode overrides it.
+    DEFAULT_EXTRACT_MODE = os.getenv('EXTRACT_MODE', 'auto')
+    # 'auto' looks for faster modes only on videos at least that long
+    SEEK_AUTO_MIN_DURATION_SEC = float(os.getenv('SEEK_AUTO_MIN_DURATION_SEC', 600))
+    # 'auto' uses per-tile seek only for steps at least that long
+    SEEK_AUTO_MIN_STEP_SEC = float(os.getenv('SEEK_AUTO_MIN_STEP_SEC', 5))
+    # Max tile timestamp error accepted for keyframe-only decode
+    SEEK_TOLERANCE_SEC = float(os.getenv('SEEK_TOLERANCE_SEC', 2.0))
+    # Parallel ffmpeg processes for seek mode
+    SEEK_WORKERS = int(os.getenv('SEEK_WORKERS', 4))
+
+    # SpriteOptions.dedup: a tile joins the run of the previous one if their 64-bit
+    # perceptual hashes differ in at most that many bits
+    DEDUP_MAX_DISTANCE = int(os.getenv('DEDUP_MAX_DISTANCE', 4))
+
+    # Extraction progress from ffmpeg is reported (and cancel checked) that often
+    PROGRESS_INTERVAL_SEC = float(os.getenv('PROGRESS_INTERVAL_SEC', 0.5))
+    # Job's ffmpeg processes are killed when it runs longer than that (0 = no limit), job fails
+    JOB_TIMEOUT_SEC = float(os.getenv('JOB_TIMEOUT_SEC', 0))
+    # On cancel or timeout ffmpeg gets SIGTERM, then SIGKILL if still alive after that
+    FFMPEG_KILL_GRACE_SEC = float(os.getenv('FFMPEG_KILL_GRACE_SEC', 1.0))
+
+    # Split one job's timeline into up to N ranges extracted concurrently (1 = off)
+    EXTRACT_PARALLELISM = int(os.getenv('EXTRACT_PARALLELISM', 1))
+    # Don't make ranges shorter than that
+    SEGMENT_MIN_SEC = float(os.getenv('SEGMENT_MIN_SEC', 120))
+
 cfg = Config()
\ No newline at end of file
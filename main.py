@@ -1,17 +1,45 @@
+import asyncio
 import logging
-from services import server_srv, worker_srv
+import threading
+from config.service_cfg import cfg
+from runtime.queue_rt import job_manager
+from runtime.store_rt import open_job_store
+from runtime import metrics_rt
+from services import server_srv, worker_srv, remote_worker_srv
 
 def main():
     logging.basicConfig(level=logging.INFO)
     
-    print("Starting ytsprites service...")
+    print(f"Starting ytsprites service (role {cfg.ROLE}, {cfg.SERVER_MODE} mode)...")
     
-    worker_srv.start_workers()
+    if cfg.METRICS_PORT:
+        metrics_rt.start_http_server(cfg.METRICS_PORT)
+    
+    if cfg.ROLE == 'worker':
+        # Render node: no server and no local queue, jobs are leased from FRONTEND_ADDR
+        remote_worker_srv.start_workers()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            print("Stopping...")
+        return
+    
+    store = open_job_store()
+    if store:
+        job_manager.attach_store(store)
+        job_manager.restore()
+    job_manager.start_reaper()
     
     try:
-        server_srv.serve()
+        if cfg.SERVER_MODE == 'aio':
+            from services import aio_server_srv
+            asyncio.run(aio_server_srv.serve())
+        else:
+            if cfg.ROLE == 'all':
+                worker_srv.start_workers()
+            server_srv.serve()
     except KeyboardInterrupt:
         print("Stopping...")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
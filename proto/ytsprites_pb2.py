@@ -24,39 +24,67 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0fytsprites.proto\x12\x0cytsprites.v1\"^\n\rSpriteOptions\x12\x10\n\x08step_sec\x18\x01 \x01(\x01\x12\x0c\n\x04\x63ols\x18\x02 \x01(\x05\x12\x0c\n\x04rows\x18\x03 \x01(\x05\x12\x0e\n\x06\x66ormat\x18\x04 \x01(\t\x12\x0f\n\x07quality\x18\x05 \x01(\x05\"x\n\rSubmitRequest\x12\x10\n\x08video_id\x18\x01 \x01(\t\x12\x13\n\x0bvideo_bytes\x18\x02 \x01(\x0c\x12\x12\n\nvideo_mime\x18\x03 \x01(\t\x12,\n\x07options\x18\x04 \x01(\x0b\x32\x1b.ytsprites.v1.SpriteOptions\"G\n\x0bSubmitReply\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x02 \x01(\x08\x12\x16\n\x0equeue_position\x18\x03 \x01(\x05\"\x1f\n\rStatusRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"g\n\x0cStatusUpdate\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12%\n\x05state\x18\x02 \x01(\x0e\x32\x16.ytsprites.v1.JobState\x12\x0f\n\x07percent\x18\x03 \x01(\x05\x12\x0f\n\x07message\x18\x04 \x01(\t\"\"\n\x10GetResultRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\'\n\tSpriteBin\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\"f\n\x0bResultReply\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12(\n\x07sprites\x18\x02 \x03(\x0b\x32\x17.ytsprites.v1.SpriteBin\x12\x0b\n\x03vtt\x18\x03 \x01(\t\x12\x10\n\x08video_id\x18\x04 \x01(\t\"\x1f\n\rCancelRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"/\n\x0b\x43\x61ncelReply\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08\x63\x61nceled\x18\x02 \x01(\x08\"\x0f\n\rHealthRequest\"\x1d\n\x0bHealthReply\x12\x0e\n\x06status\x18\x01 \x01(\t*\xb0\x01\n\x08JobState\x12\x19\n\x15JOB_STATE_UNSPECIFIED\x10\x00\x12\x17\n\x13JOB_STATE_SUBMITTED\x10\x01\x12\x14\n\x10JOB_STATE_QUEUED\x10\x02\x12\x18\n\x14JOB_STATE_PROCESSING\x10\x03\x12\x12\n\x0eJOB_STATE_DONE\x10\x04\x12\x14\n\x10JOB_STATE_FAILED\x10\x05\x12\x16\n\x12JOB_STATE_CANCELED\x10\x06\x32\xe1\x02\n\x07Sprites\x12@\n\x06Submit\x12\x1b.ytsprites.v1.SubmitRequest\x1a\x19.ytsprites.v1.SubmitReply\x12H\n\x0bWatchStatus\x12\x1b.ytsprites.v1.StatusRequest\x1a\x1a.ytsprites.v1.StatusUpdate0\x01\x12\x46\n\tGetResult\x12\x1e.ytsprites.v1.GetResultRequest\x1a\x19.ytsprites.v1.ResultReply\x12@\n\x06\x43\x61ncel\x12\x1b.ytsprites.v1.CancelRequest\x1a\x19.ytsprites.v1.CancelReply\x12@\n\x06Health\x12\x1b.ytsprites.v1.HealthRequest\x1a\x19.ytsprites.v1.HealthReplyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0fytsprites.proto\x12\x0cytsprites.v1\"\xf8\x01\n\rSpriteOptions\x12\x10\n\x08step_sec\x18\x01 \x01(\x01\x12\x0c\n\x04\x63ols\x18\x02 \x01(\x05\x12\x0c\n\x04rows\x18\x03 \x01(\x05\x12\x0e\n\x06\x66ormat\x18\x04 \x01(\t\x12\x0f\n\x07quality\x18\x05 \x01(\x05\x12\x14\n\x0c\x65xtract_mode\x18\x06 \x01(\t\x12\x0e\n\x06tile_w\x18\x07 \x01(\x05\x12\x0e\n\x06tile_h\x18\x08 \x01(\x05\x12\x10\n\x08tile_fit\x18\t \x01(\t\x12\x12\n\ntile_scale\x18\n \x01(\x05\x12-\n\x08variants\x18\x0b \x03(\x0b\x32\x1b.ytsprites.v1.SpriteVariant\x12\r\n\x05\x64\x65\x64up\x18\x0c \x01(\x08\"\xa0\x01\n\rSpriteVariant\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0e\n\x06tile_w\x18\x02 \x01(\x05\x12\x0e\n\x06tile_h\x18\x03 \x01(\x05\x12\x10\n\x08tile_fit\x18\x04 \x01(\t\x12\x12\n\ntile_scale\x18\x05 \x01(\x05\x12\x0c\n\x04\x63ols\x18\x06 \x01(\x05\x12\x0c\n\x04rows\x18\x07 \x01(\x05\x12\x0e\n\x06\x66ormat\x18\x08 \x01(\t\x12\x0f\n\x07quality\x18\t \x01(\x05\"\x9a\x01\n\rSubmitRequest\x12\x10\n\x08video_id\x18\x01 \x01(\t\x12\x13\n\x0bvideo_bytes\x18\x02 \x01(\x0c\x12\x12\n\nvideo_mime\x18\x03 \x01(\t\x12,\n\x07options\x18\x04 \x01(\x0b\x32\x1b.ytsprites.v1.SpriteOptions\x12\x10\n\x08priority\x18\x05 \x01(\x05\x12\x0e\n\x06tenant\x18\x06 \x01(\t\"\xa5\x01\n\x0bSubmitChunk\x12\x10\n\x08video_id\x18\x01 \x01(\t\x12\x12\n\nvideo_mime\x18\x02 \x01(\t\x12,\n\x07options\x18\x03 \x01(\x0b\x32\x1b.ytsprites.v1.SpriteOptions\x12\x0c\n\x04\x64\x61ta\x18\x04 \x01(\x0c\x12\x10\n\x08priority\x18\x05 \x01(\x05\x12\x0e\n\x06tenant\x18\x06 \x01(\t\x12\x12\n\nvideo_size\x18\x07 \x01(\x03\"G\n\x0bSubmitReply\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x02 \x01(\x08\x12\x16\n\x0equeue_position\x18\x03 \x01(\x05\"\x1f\n\rStatusRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"g\n\x0cStatusUpdate\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12%\n\x05state\x18\x02 \x01(\x0e\x32\x16.ytsprites.v1.JobState\x12\x0f\n\x07percent\x18\x03 \x01(\x05\x12\x0f\n\x07message\x18\x04 \x01(\t\"\"\n\x10GetResultRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\'\n\tSpriteBin\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\"T\n\rVariantResult\x12\x0c\n\x04name\x18\x01 \x01(\t\x12(\n\x07sprites\x18\x02 \x03(\x0b\x32\x17.ytsprites.v1.SpriteBin\x12\x0b\n\x03vtt\x18\x03 \x01(\t\"\x95\x01\n\x0bResultReply\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12(\n\x07sprites\x18\x02 \x03(\x0b\x32\x17.ytsprites.v1.SpriteBin\x12\x0b\n\x03vtt\x18\x03 \x01(\t\x12\x10\n\x08video_id\x18\x04 \x01(\t\x12-\n\x08variants\x18\x05 \x03(\x0b\x32\x1b.ytsprites.v1.VariantResult\"v\n\x0bResultChunk\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08video_id\x18\x02 \x01(\t\x12\x0b\n\x03vtt\x18\x03 \x01(\t\x12\'\n\x06sprite\x18\x04 \x01(\x0b\x32\x17.ytsprites.v1.SpriteBin\x12\x0f\n\x07variant\x18\x05 \x01(\t\"\x1f\n\rCancelRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"/\n\x0b\x43\x61ncelReply\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08\x63\x61nceled\x18\x02 \x01(\x08\"\x0f\n\rHealthRequest\"\x1d\n\x0bHealthReply\x12\x0e\n\x06status\x18\x01 \x01(\t\"3\n\x0cLeaseRequest\x12\x11\n\tworker_id\x18\x01 \x01(\t\x12\x10\n\x08wait_sec\x18\x02 \x01(\x01\"\xcf\x01\n\nLeaseReply\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0e\n\x06job_id\x18\x02 \x01(\t\x12\x10\n\x08lease_id\x18\x03 \x01(\t\x12\x10\n\x08video_id\x18\x04 \x01(\t\x12\x12\n\nvideo_mime\x18\x05 \x01(\t\x12,\n\x07options\x18\x06 \x01(\x0b\x32\x1b.ytsprites.v1.SpriteOptions\x12\x14\n\x0c\x63ontent_hash\x18\x07 \x01(\t\x12\x12\n\nvideo_size\x18\x08 \x01(\x03\x12\x15\n\rlease_ttl_sec\x18\t \x01(\x01\"V\n\x10HeartbeatRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08lease_id\x18\x02 \x01(\t\x12\x0f\n\x07percent\x18\x03 \x01(\x05\x12\x0f\n\x07message\x18\x04 \x01(\t\".\n\x0eHeartbeatReply\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x10\n\x08\x63\x61nceled\x18\x02 \x01(\x08\"5\n\x11\x46\x65tchInputRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08lease_id\x18\x02 \x01(\t\"\x19\n\tDataChunk\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"x\n\rCompleteChunk\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08lease_id\x18\x02 \x01(\t\x12\x0b\n\x03vtt\x18\x03 \x01(\t\x12\'\n\x06sprite\x18\x04 \x01(\x0b\x32\x17.ytsprites.v1.SpriteBin\x12\x0f\n\x07variant\x18\x05 \x01(\t\">\n\x0b\x46\x61ilRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x10\n\x08lease_id\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"\x17\n\tWorkReply\x12\n\n\x02ok\x18\x01 \x01(\x08*\xb0\x01\n\x08JobState\x12\x19\n\x15JOB_STATE_UNSPECIFIED\x10\x00\x12\x17\n\x13JOB_STATE_SUBMITTED\x10\x01\x12\x14\n\x10JOB_STATE_QUEUED\x10\x02\x12\x18\n\x14JOB_STATE_PROCESSING\x10\x03\x12\x12\n\x0eJOB_STATE_DONE\x10\x04\x12\x14\n\x10JOB_STATE_FAILED\x10\x05\x12\x16\n\x12JOB_STATE_CANCELED\x10\x06\x32\xf9\x03\n\x07Sprites\x12@\n\x06Submit\x12\x1b.ytsprites.v1.SubmitRequest\x1a\x19.ytsprites.v1.SubmitReply\x12\x46\n\x0cSubmitStream\x12\x19.ytsprites.v1.SubmitChunk\x1a\x19.ytsprites.v1.SubmitReply(\x01\x12H\n\x0bWatchStatus\x12\x1b.ytsprites.v1.StatusRequest\x1a\x1a.ytsprites.v1.StatusUpdate0\x01\x12\x46\n\tGetResult\x12\x1e.ytsprites.v1.GetResultRequest\x1a\x19.ytsprites.v1.ResultReply\x12N\n\x0fGetResultStream\x12\x1e.ytsprites.v1.GetResultRequest\x1a\x19.ytsprites.v1.ResultChunk0\x01\x12@\n\x06\x43\x61ncel\x12\x1b.ytsprites.v1.CancelRequest\x1a\x19.ytsprites.v1.CancelReply\x12@\n\x06Health\x12\x1b.ytsprites.v1.HealthRequest\x1a\x19.ytsprites.v1.HealthReply2\xda\x02\n\x04Work\x12=\n\x05Lease\x12\x1a.ytsprites.v1.LeaseRequest\x1a\x18.ytsprites.v1.LeaseReply\x12I\n\tHeartbeat\x12\x1e.ytsprites.v1.HeartbeatRequest\x1a\x1c.ytsprites.v1.HeartbeatReply\x12H\n\nFetchInput\x12\x1f.ytsprites.v1.FetchInputRequest\x1a\x17.ytsprites.v1.DataChunk0\x01\x12\x42\n\x08\x43omplete\x12\x1b.ytsprites.v1.CompleteChunk\x1a\x17.ytsprites.v1.WorkReply(\x01\x12:\n\x04\x46\x61il\x12\x19.ytsprites.v1.FailRequest\x1a\x17.ytsprites.v1.WorkReplyb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ytsprites_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_JOBSTATE']._serialized_start=774
-  _globals['_JOBSTATE']._serialized_end=950
-  _globals['_SPRITEOPTIONS']._serialized_start=33
-  _globals['_SPRITEOPTIONS']._serialized_end=127
-  _globals['_SUBMITREQUEST']._serialized_start=129
-  _globals['_SUBMITREQUEST']._serialized_end=249
-  _globals['_SUBMITREPLY']._serialized_start=251
-  _globals['_SUBMITREPLY']._serialized_end=322
-  _globals['_STATUSREQUEST']._serialized_start=324
-  _globals['_STATUSREQUEST']._serialized_end=355
-  _globals['_STATUSUPDATE']._serialized_start=357
-  _globals['_STATUSUPDATE']._serialized_end=460
-  _globals['_GETRESULTREQUEST']._serialized_start=462
-  _globals['_GETRESULTREQUEST']._serialized_end=496
-  _globals['_SPRITEBIN']._serialized_start=498
-  _globals['_SPRITEBIN']._serialized_end=537
-  _globals['_RESULTREPLY']._serialized_start=539
-  _globals['_RESULTREPLY']._serialized_end=641
-  _globals['_CANCELREQUEST']._serialized_start=643
-  _globals['_CANCELREQUEST']._serialized_end=674
-  _globals['_CANCELREPLY']._serialized_start=676
-  _globals['_CANCELREPLY']._serialized_end=723
-  _globals['_HEALTHREQUEST']._serialized_start=725
-  _globals['_HEALTHREQUEST']._serialized_end=740
-  _globals['_HEALTHREPLY']._serialized_start=742
-  _globals['_HEALTHREPLY']._serialized_end=771
-  _globals['_SPRITES']._serialized_start=953
-  _globals['_SPRITES']._serialized_end=1306
+  _globals['_JOBSTATE']._serialized_start=2241
+  _globals['_JOBSTATE']._serialized_end=2417
+  _globals['_SPRITEOPTIONS']._serialized_start=34
+  _globals['_SPRITEOPTIONS']._serialized_end=282
+  _globals['_SPRITEVARIANT']._serialized_start=285
+  _globals['_SPRITEVARIANT']._serialized_end=445
+  _globals['_SUBMITREQUEST']._serialized_start=448
+  _globals['_SUBMITREQUEST']._serialized_end=602
+  _globals['_SUBMITCHUNK']._serialized_start=605
+  _globals['_SUBMITCHUNK']._serialized_end=770
+  _globals['_SUBMITREPLY']._serialized_start=772
+  _globals['_SUBMITREPLY']._serialized_end=843
+  _globals['_STATUSREQUEST']._serialized_start=845
+  _globals['_STATUSREQUEST']._serialized_end=876
+  _globals['_STATUSUPDATE']._serialized_start=878
+  _globals['_STATUSUPDATE']._serialized_end=981
+  _globals['_GETRESULTREQUEST']._serialized_start=983
+  _globals['_GETRESULTREQUEST']._serialized_end=1017
+  _globals['_SPRITEBIN']._serialized_start=1019
+  _globals['_SPRITEBIN']._serialized_end=1058
+  _globals['_VARIANTRESULT']._serialized_start=1060
+  _globals['_VARIANTRESULT']._serialized_end=1144
+  _globals['_RESULTREPLY']._serialized_start=1147
+  _globals['_RESULTREPLY']._serialized_end=1296
+  _globals['_RESULTCHUNK']._serialized_start=1298
+  _globals['_RESULTCHUNK']._serialized_end=1416
+  _globals['_CANCELREQUEST']._serialized_start=1418
+  _globals['_CANCELREQUEST']._serialized_end=1449
+  _globals['_CANCELREPLY']._serialized_start=1451
+  _globals['_CANCELREPLY']._serialized_end=1498
+  _globals['_HEALTHREQUEST']._serialized_start=1500
+  _globals['_HEALTHREQUEST']._serialized_end=1515
+  _globals['_HEALTHREPLY']._serialized_start=1517
+  _globals['_HEALTHREPLY']._serialized_end=1546
+  _globals['_LEASEREQUEST']._serialized_start=1548
+  _globals['_LEASEREQUEST']._serialized_end=1599
+  _globals['_LEASEREPLY']._serialized_start=1602
+  _globals['_LEASEREPLY']._serialized_end=1809
+  _globals['_HEARTBEATREQUEST']._serialized_start=1811
+  _globals['_HEARTBEATREQUEST']._serialized_end=1897
+  _globals['_HEARTBEATREPLY']._serialized_start=1899
+  _globals['_HEARTBEATREPLY']._serialized_end=1945
+  _globals['_FETCHINPUTREQUEST']._serialized_start=1947
+  _globals['_FETCHINPUTREQUEST']._serialized_end=2000
+  _globals['_DATACHUNK']._serialized_start=2002
+  _globals['_DATACHUNK']._serialized_end=2027
+  _globals['_COMPLETECHUNK']._serialized_start=2029
+  _globals['_COMPLETECHUNK']._serialized_end=2149
+  _globals['_FAILREQUEST']._serialized_start=2151
+  _globals['_FAILREQUEST']._serialized_end=2213
+  _globals['_WORKREPLY']._serialized_start=2215
+  _globals['_WORKREPLY']._serialized_end=2238
+  _globals['_SPRITES']._serialized_start=2420
+  _globals['_SPRITES']._serialized_end=2925
+  _globals['_WORK']._serialized_start=2928
+  _globals['_WORK']._serialized_end=3274
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,11 @@ class SpritesStub(object):
                 request_serializer=ytsprites__pb2.SubmitRequest.SerializeToString,
                 response_deserializer=ytsprites__pb2.SubmitReply.FromString,
                 _registered_method=True)
+        self.SubmitStream = channel.stream_unary(
+                '/ytsprites.v1.Sprites/SubmitStream',
+                request_serializer=ytsprites__pb2.SubmitChunk.SerializeToString,
+                response_deserializer=ytsprites__pb2.SubmitReply.FromString,
+                _registered_method=True)
         self.WatchStatus = channel.unary_stream(
                 '/ytsprites.v1.Sprites/WatchStatus',
                 request_serializer=ytsprites__pb2.StatusRequest.SerializeToString,
@@ -49,6 +54,11 @@ class SpritesStub(object):
                 request_serializer=ytsprites__pb2.GetResultRequest.SerializeToString,
                 response_deserializer=ytsprites__pb2.ResultReply.FromString,
                 _registered_method=True)
+        self.GetResultStream = channel.unary_stream(
+                '/ytsprites.v1.Sprites/GetResultStream',
+                request_serializer=ytsprites__pb2.GetResultRequest.SerializeToString,
+                response_deserializer=ytsprites__pb2.ResultChunk.FromString,
+                _registered_method=True)
         self.Cancel = channel.unary_unary(
                 '/ytsprites.v1.Sprites/Cancel',
                 request_serializer=ytsprites__pb2.CancelRequest.SerializeToString,
@@ -70,6 +80,12 @@ class SpritesServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SubmitStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def WatchStatus(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -82,6 +98,12 @@ class SpritesServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetResultStream(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Cancel(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -102,6 +124,11 @@ def add_SpritesServicer_to_server(servicer, server):
                     request_deserializer=ytsprites__pb2.SubmitRequest.FromString,
                     response_serializer=ytsprites__pb2.SubmitReply.SerializeToString,
             ),
+            'SubmitStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.SubmitStream,
+                    request_deserializer=ytsprites__pb2.SubmitChunk.FromString,
+                    response_serializer=ytsprites__pb2.SubmitReply.SerializeToString,
+            ),
             'WatchStatus': grpc.unary_stream_rpc_method_handler(
                     servicer.WatchStatus,
                     request_deserializer=ytsprites__pb2.StatusRequest.FromString,
@@ -112,6 +139,11 @@ def add_SpritesServicer_to_server(servicer, server):
                     request_deserializer=ytsprites__pb2.GetResultRequest.FromString,
                     response_serializer=ytsprites__pb2.ResultReply.SerializeToString,
             ),
+            'GetResultStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetResultStream,
+                    request_deserializer=ytsprites__pb2.GetResultRequest.FromString,
+                    response_serializer=ytsprites__pb2.ResultChunk.SerializeToString,
+            ),
             'Cancel': grpc.unary_unary_rpc_method_handler(
                     servicer.Cancel,
                     request_deserializer=ytsprites__pb2.CancelRequest.FromString,
@@ -160,6 +192,33 @@ class Sprites(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def SubmitStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/ytsprites.v1.Sprites/SubmitStream',
+            ytsprites__pb2.SubmitChunk.SerializeToString,
+            ytsprites__pb2.SubmitReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def WatchStatus(request,
             target,
@@ -214,6 +273,33 @@ class Sprites(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetResultStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/ytsprites.v1.Sprites/GetResultStream',
+            ytsprites__pb2.GetResultRequest.SerializeToString,
+            ytsprites__pb2.ResultChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def Cancel(request,
             target,
@@ -267,3 +353,247 @@ class Sprites(object):
             timeout,
             metadata,
             _registered_method=True)
+
+
+class WorkStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Lease = channel.unary_unary(
+                '/ytsprites.v1.Work/Lease',
+                request_serializer=ytsprites__pb2.LeaseRequest.SerializeToString,
+                response_deserializer=ytsprites__pb2.LeaseReply.FromString,
+                _registered_method=True)
+        self.Heartbeat = channel.unary_unary(
+                '/ytsprites.v1.Work/Heartbeat',
+                request_serializer=ytsprites__pb2.HeartbeatRequest.SerializeToString,
+                response_deserializer=ytsprites__pb2.HeartbeatReply.FromString,
+                _registered_method=True)
+        self.FetchInput = channel.unary_stream(
+                '/ytsprites.v1.Work/FetchInput',
+                request_serializer=ytsprites__pb2.FetchInputRequest.SerializeToString,
+                response_deserializer=ytsprites__pb2.DataChunk.FromString,
+                _registered_method=True)
+        self.Complete = channel.stream_unary(
+                '/ytsprites.v1.Work/Complete',
+                request_serializer=ytsprites__pb2.CompleteChunk.SerializeToString,
+                response_deserializer=ytsprites__pb2.WorkReply.FromString,
+                _registered_method=True)
+        self.Fail = channel.unary_unary(
+                '/ytsprites.v1.Work/Fail',
+                request_serializer=ytsprites__pb2.FailRequest.SerializeToString,
+                response_deserializer=ytsprites__pb2.WorkReply.FromString,
+                _registered_method=True)
+
+
+class WorkServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def Lease(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Heartbeat(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FetchInput(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Complete(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Fail(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_WorkServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Lease': grpc.unary_unary_rpc_method_handler(
+                    servicer.Lease,
+                    request_deserializer=ytsprites__pb2.LeaseRequest.FromString,
+                    response_serializer=ytsprites__pb2.LeaseReply.SerializeToString,
+            ),
+            'Heartbeat': grpc.unary_unary_rpc_method_handler(
+                    servicer.Heartbeat,
+                    request_deserializer=ytsprites__pb2.HeartbeatRequest.FromString,
+                    response_serializer=ytsprites__pb2.HeartbeatReply.SerializeToString,
+            ),
+            'FetchInput': grpc.unary_stream_rpc_method_handler(
+                    servicer.FetchInput,
+                    request_deserializer=ytsprites__pb2.FetchInputRequest.FromString,
+                    response_serializer=ytsprites__pb2.DataChunk.SerializeToString,
+            ),
+            'Complete': grpc.stream_unary_rpc_method_handler(
+                    servicer.Complete,
+                    request_deserializer=ytsprites__pb2.CompleteChunk.FromString,
+                    response_serializer=ytsprites__pb2.WorkReply.SerializeToString,
+            ),
+            'Fail': grpc.unary_unary_rpc_method_handler(
+                    servicer.Fail,
+                    request_deserializer=ytsprites__pb2.FailRequest.FromString,
+                    response_serializer=ytsprites__pb2.WorkReply.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'ytsprites.v1.Work', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('ytsprites.v1.Work', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Work(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Lease(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ytsprites.v1.Work/Lease',
+            ytsprites__pb2.LeaseRequest.SerializeToString,
+            ytsprites__pb2.LeaseReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Heartbeat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ytsprites.v1.Work/Heartbeat',
+            ytsprites__pb2.HeartbeatRequest.SerializeToString,
+            ytsprites__pb2.HeartbeatReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FetchInput(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/ytsprites.v1.Work/FetchInput',
+            ytsprites__pb2.FetchInputRequest.SerializeToString,
+            ytsprites__pb2.DataChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Complete(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/ytsprites.v1.Work/Complete',
+            ytsprites__pb2.CompleteChunk.SerializeToString,
+            ytsprites__pb2.WorkReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Fail(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/ytsprites.v1.Work/Fail',
+            ytsprites__pb2.FailRequest.SerializeToString,
+            ytsprites__pb2.WorkReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
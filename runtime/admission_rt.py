@@ -0,0 +1,72 @@
+import math
+import os
+import shutil
+from typing import Optional
+
+from config.service_cfg import cfg
+from utils import files_ut
+
+class AdmissionError(Exception):
+    """Submit rejected because of load; client may retry after retry_after_sec."""
+
+    def __init__(self, reason: str, retry_after_sec: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_sec = retry_after_sec
+
+def estimate_work_sec(size_bytes: int, duration_sec: Optional[float] = None) -> float:
+    """Worker-seconds to render a video: probed duration if known, else guessed from size."""
+    if not duration_sec:
+        duration_sec = size_bytes / max(1, cfg.ADMIT_BYTES_PER_SEC)
+    return duration_sec / max(0.001, cfg.ADMIT_DECODE_SPEED)
+
+def disk_free_bytes() -> Optional[int]:
+    """Free bytes where workspaces go (TMP_DIR is made if missing), None if it can't be measured."""
+    base = files_ut.tmp_base()
+    try:
+        os.makedirs(base, exist_ok=True)
+        return shutil.disk_usage(base).free
+    except OSError as e:
+        print(f"[ADMIT] free space of {base} unknown: {e}")
+        return None
+
+def _retry_after(sec: float) -> int:
+    return int(min(3600, max(1, math.ceil(sec))))
+
+def check_admission(load_bytes: int, load_work_sec: float, unwritten_bytes: int,
+                    size_bytes: int, work_sec: float) -> Optional[AdmissionError]:
+    """
+    Decides on a new upload of size_bytes before it is written, given the jobs admitted so far:
+    their input bytes, estimated work and bytes still to be written by uploads in progress.
+    Returns the rejection or None. Limits set to 0 are off.
+    """
+    workers = max(1, cfg.MAX_WORKERS)
+    backlog_sec = load_work_sec / workers
+    # Time for the current backlog to go down by `excess` of its `total`
+    def drain_time(excess, total):
+        return backlog_sec * excess / total if total > 0 else cfg.ADMIT_RETRY_DEFAULT_SEC
+
+    if cfg.ADMIT_MAX_BACKLOG_SEC:
+        new_backlog = backlog_sec + work_sec / workers
+        if load_work_sec and new_backlog > cfg.ADMIT_MAX_BACKLOG_SEC:
+            return AdmissionError(
+                f"Backlog of ~{backlog_sec:.0f}s work is over limit",
+                _retry_after(new_backlog - cfg.ADMIT_MAX_BACKLOG_SEC)
+            )
+
+    if cfg.ADMIT_MAX_QUEUED_MB:
+        max_bytes = cfg.ADMIT_MAX_QUEUED_MB * 1024 * 1024
+        if load_bytes and load_bytes + size_bytes > max_bytes:
+            return AdmissionError(
+                f"Queued uploads take {load_bytes / (1024 * 1024):.0f}MB, over limit",
+                _retry_after(drain_time(load_bytes + size_bytes - max_bytes, load_bytes))
+            )
+
+    # Unknown free space skips the rule, writing the upload will fail if the disk is really gone
+    free = disk_free_bytes() if cfg.ADMIT_MIN_FREE_DISK_MB else None
+    if free is not None:
+        free -= unwritten_bytes + size_bytes
+        if free < cfg.ADMIT_MIN_FREE_DISK_MB * 1024 * 1024:
+            return AdmissionError("Not enough free disk space", _retry_after(cfg.ADMIT_RETRY_DEFAULT_SEC))
+
+    return None
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from google.protobuf.json_format import MessageToDict
+
+from config.service_cfg import cfg
+from utils import files_ut, ffmpeg_ut
+from .models_rt import MediaInfo
+
+class ProbeCache:
+    """In-memory LRU of probe results keyed by content hash of the uploaded video."""
+
+    def __init__(self, max_entries=1000):
+        self._items: OrderedDict = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, content_hash) -> Optional[MediaInfo]:
+        if not content_hash:
+            return None
+        with self._lock:
+            info = self._items.get(content_hash)
+            if info is not None:
+                self._items.move_to_end(content_hash)
+            return info
+
+    def put(self, content_hash, info: MediaInfo):
+        if not content_hash:
+            return
+        with self._lock:
+            self._items[content_hash] = info
+            self._items.move_to_end(content_hash)
+            while len(self._items) > self._max_entries:
+                self._items.popitem(last=False)
+
+def normalize_options(options) -> dict:
+    """SpriteOptions with service defaults applied, so equal requests give equal keys."""
+    opts = MessageToDict(options, preserving_proto_field_name=True) if options is not None else {}
+    opts["step_sec"] = opts.get("step_sec") or cfg.DEFAULT_STEP_SEC
+    opts["cols"] = opts.get("cols") or cfg.DEFAULT_COLS
+    opts["rows"] = opts.get("rows") or cfg.DEFAULT_ROWS
+    encoder = ffmpeg_ut.find_encoder(opts.get("format"))
+    opts["format"] = encoder.name if encoder else (opts.get("format") or "").lower()
+    # Default quality differs per format
+    opts["quality"] = opts.get("quality") or (encoder.default_quality() if encoder else 0)
+    opts["extract_mode"] = (opts.get("extract_mode") or cfg.DEFAULT_EXTRACT_MODE).lower()
+    if not opts.get("tile_w") and not opts.get("tile_h"):
+        opts["tile_w"], opts["tile_h"] = cfg.DEFAULT_TILE_W, cfg.DEFAULT_TILE_H
+    opts["tile_fit"] = (opts.get("tile_fit") or cfg.DEFAULT_TILE_FIT).lower()
+    opts["tile_scale"] = opts.get("tile_scale") or 1
+    if options is not None and options.variants:
+        # By what each variant renders, not by which fields were given
+        opts["variants"] = [
+            {**normalize_options(ffmpeg_ut.variant_options(options, v)), "name": v.name} for v in options.variants
+        ]
+    return opts
+
+def result_key(content_hash, options) -> Optional[str]:
+    if not content_hash:
+        return None
+    norm = json.dumps(normalize_options(options), sort_keys=True)
+    return hashlib.sha256(f"{content_hash}|{norm}".encode()).hexdigest()
+
+class ResultCache:
+    """
+    Content-addressed results on disk: <TMP_DIR>/ytsprites_cache/<key>/ holds sprites, result.vtt
+    (result_<variant>.vtt per variant) and meta.json.
+    LRU by last use, capped by total bytes; entries older than ttl are dropped.
+    """
+
+    META = "meta.json"
+    VTT = "result.vtt"
+
+    def __init__(self, root, max_bytes, ttl_sec):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._ttl_sec = ttl_sec
+        # key -> (size_bytes, created_at), in LRU order
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        """Index entries left on disk by previous runs (oldest use first)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.isdir(self._root):
+            return
+        found = []
+        for key in os.listdir(self._root):
+            path = os.path.join(self._root, key)
+            try:
+                with open(os.path.join(path, self.META)) as f:
+                    meta = json.load(f)
+                found.append((os.path.getmtime(path), key, meta["size"], meta["created_at"]))
+            except (OSError, ValueError, KeyError):
+                # Unfinished or broken entry
+                shutil.rmtree(path, ignore_errors=True)
+        for _, key, size, created_at in sorted(found):
+            self._entries[key] = (size, created_at)
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        shutil.rmtree(os.path.join(self._root, key), ignore_errors=True)
+
+    def get(self, key) -> Optional[Tuple[List[Tuple[str, str]], str, List[Tuple[str, List[Tuple[str, str]], str]]]]:
+        """Returns ([(sprite_name, abs_path)], vtt, [(variant, [(sprite_name, abs_path)], vtt)]) or None."""
+        if not key:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry and self._ttl_sec and time.time() - entry[1] > self._ttl_sec:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        path = os.path.join(self._root, key)
+        try:
+            with open(os.path.join(path, self.META)) as f:
+                meta = json.load(f)
+            with open(os.path.join(path, self.VTT), encoding="utf-8") as f:
+                vtt = f.read()
+            variants = []
+            for v in meta.get("variants", []):
+                with open(os.path.join(path, self.variant_vtt(v["name"])), encoding="utf-8") as f:
+                    variants.append((v["name"], [(name, os.path.join(path, name)) for name in v["sprites"]], f.read()))
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self._drop(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return [(name, os.path.join(path, name)) for name in meta["sprites"]], vtt, variants
+
+    @staticmethod
+    def variant_vtt(name: str) -> str:
+        return f"result_{name}.vtt"
+
+    def put(self, key, sprite_paths: List[str], vtt: str, variants=()):
+        """Link or copy finished sprites into the cache. Never fails the caller.
+        variants: (name, sprite paths, vtt) of SpriteOptions.variants."""
+        if not key:
+            return
+        final = os.path.join(self._root, key)
+        tmp = os.path.join(self._root, f".tmp_{key}_{threading.get_ident()}")
+        try:
+            os.makedirs(tmp, exist_ok=True)
+
+            def link_all(paths):
+                names = []
+                for p in paths:
+                    name = os.path.basename(p)
+                    # Linked: job results and cache entry share the sheets on disk
+                    files_ut.link_or_copy(p, os.path.join(tmp, name))
+                    names.append(name)
+                return names
+
+            names = link_all(sprite_paths)
+            with open(os.path.join(tmp, self.VTT), "w", encoding="utf-8") as f:
+                f.write(vtt)
+            variant_meta = []
+            for name, paths, variant_vtt in variants:
+                variant_meta.append({"name": name, "sprites": link_all(paths)})
+                with open(os.path.join(tmp, self.variant_vtt(name)), "w", encoding="utf-8") as f:
+                    f.write(variant_vtt)
+            size = files_ut.dir_size(tmp)
+            created_at = time.time()
+            meta = {"sprites": names, "size": size, "created_at": created_at}
+            if variant_meta:
+                meta["variants"] = variant_meta
+            with open(os.path.join(tmp, self.META), "w") as f:
+                json.dump(meta, f)
+
+            with self._lock:
+                self._load()
+                if key in self._entries:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    return
+                os.rename(tmp, final)
+                self._entries[key] = (size, created_at)
+                self._evict()
+        except OSError as e:
+            print(f"[CACHE] put failed for {key}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _evict(self):
+        total = sum(size for size, _ in self._entries.values())
+        now = time.time()
+        for key in list(self._entries):
+            size, created_at = self._entries[key]
+            expired = self._ttl_sec and now - created_at > self._ttl_sec
+            if not expired and total <= self._max_bytes:
+                continue
+            self._drop(key)
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "result_cache_hits": self.hits,
+                "result_cache_misses": self.misses,
+                "result_cache_entries": len(self._entries),
+                "result_cache_bytes": sum(size for size, _ in self._entries.values()),
+            }
+
+# Global cache instances
+probe_cache = ProbeCache(cfg.PROBE_CACHE_SIZE)
+result_cache = ResultCache(
+    os.path.join(files_ut.tmp_base(), "ytsprites_cache"),
+    cfg.RESULT_CACHE_MAX_MB * 1024 * 1024,
+    cfg.RESULT_CACHE_TTL_SEC,
+) if cfg.RESULT_CACHE_ENABLED else None
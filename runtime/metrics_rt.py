@@ -0,0 +1,231 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Prefix of names in the text exposition
+PREFIX = "ytsprites_"
+
+# Seconds, from a sheet encode to a long decode
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+def _label_str(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        # labels tuple -> value(s)
+        self._values: Dict[tuple, object] = {}
+
+    @staticmethod
+    def _key(labels) -> tuple:
+        return tuple(sorted(labels.items()))
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """Set/inc/dec by hand, or read from fn on every collect."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, lock, fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, lock)
+        self._fn = fn
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, lock, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, lock)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # per-bucket counts (+Inf last), sum, count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+class Registry:
+    """Counters, gauges and histograms of this process. Exported as a flat dict for Info.All
+    and as Prometheus text; counters and histograms of pool processes are merged in."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text) -> Counter:
+        return self._add(Counter(name, help_text, self._lock))
+
+    def gauge(self, name, help_text, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._add(Gauge(name, help_text, self._lock, fn))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, self._lock, buckets))
+
+    def _collect(self) -> List[Tuple[_Metric, Dict[tuple, object]]]:
+        # Callback gauges are read outside the lock, they may take other locks
+        fn_values = {}
+        for m in self._metrics.values():
+            if isinstance(m, Gauge) and m._fn:
+                try:
+                    fn_values[m.name] = m._fn()
+                except Exception as e:
+                    print(f"[Metrics] Gauge {m.name} failed: {e}")
+        with self._lock:
+            out = []
+            for m in self._metrics.values():
+                if m.name in fn_values:
+                    values = {(): fn_values[m.name]}
+                elif isinstance(m, Histogram):
+                    values = {k: [list(v[0]), v[1], v[2]] for k, v in m._values.items()}
+                else:
+                    values = dict(m._values)
+                out.append((m, values))
+            return out
+
+    def snapshot(self) -> Dict[str, float]:
+        """Flat name{labels} -> value; histograms as _count and _sum."""
+        flat = {}
+        for m, values in self._collect():
+            for key, v in values.items():
+                labels = _label_str(key)
+                if isinstance(m, Histogram):
+                    flat[f"{m.name}_count{labels}"] = v[2]
+                    flat[f"{m.name}_sum{labels}"] = v[1]
+                else:
+                    flat[f"{m.name}{labels}"] = v
+        return flat
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        for m, values in self._collect():
+            name = PREFIX + m.name
+            lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            for key, v in sorted(values.items()):
+                if isinstance(m, Histogram):
+                    counts, total, count = v
+                    cumulative = 0
+                    for bound, n in zip((*m.buckets, "+Inf"), counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_label_str((*key, ('le', str(bound))))} {cumulative}")
+                    lines.append(f"{name}_sum{_label_str(key)} {total}")
+                    lines.append(f"{name}_count{_label_str(key)} {count}")
+                else:
+                    lines.append(f"{name}{_label_str(key)} {v}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self) -> Dict[str, Dict[tuple, object]]:
+        """Counters and histograms recorded so far, picklable; see merge()."""
+        with self._lock:
+            return {
+                m.name: {k: ([list(v[0]), v[1], v[2]] if isinstance(m, Histogram) else v) for k, v in m._values.items()}
+                for m in self._metrics.values() if isinstance(m, (Counter, Histogram))
+            }
+
+    def merge(self, dumped: Dict[str, Dict[tuple, object]]):
+        """Adds dump() of another process (e.g. a pool process after one job)."""
+        with self._lock:
+            for name, values in dumped.items():
+                m = self._metrics.get(name)
+                if m is None:
+                    continue
+                for key, v in values.items():
+                    if isinstance(m, Histogram):
+                        entry = m._values.setdefault(key, [[0] * (len(m.buckets) + 1), 0.0, 0])
+                        entry[0] = [a + b for a, b in zip(entry[0], v[0])]
+                        entry[1] += v[1]
+                        entry[2] += v[2]
+                    else:
+                        m._values[key] = m._values.get(key, 0) + v
+
+    def reset(self):
+        with self._lock:
+            for m in self._metrics.values():
+                if not (isinstance(m, Gauge) and m._fn):
+                    m._values.clear()
+
+registry = Registry()
+
+# Pipeline stages: queue_wait, upload, probe, extract (waiting on ffmpeg), pack (tiles pasted
+# into a sheet), encode (sheet saved), vtt, result (sending a result). extract is per sprite
+# range, pack and encode per sheet, the rest per job or call.
+stage_seconds = registry.histogram("stage_seconds", "Time spent in a pipeline stage")
+frames_total = registry.counter("frames_total", "Tiles extracted from videos")
+sheets_total = registry.counter("sheets_total", "Sprite sheets written")
+bytes_in_total = registry.counter("bytes_in_total", "Bytes of uploaded videos")
+bytes_out_total = registry.counter("bytes_out_total", "Bytes of sprites sent to clients")
+jobs_finished_total = registry.counter("jobs_finished_total", "Jobs finished by local workers, by state")
+workers_active = registry.gauge("workers_active", "Workers processing a job now")
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage=stage)
+
+class _ScrapeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port: int, host: str = "0.0.0.0"):
+    """Serves GET /metrics in a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _ScrapeHandler)
+    server.daemon_threads = True
+    t = threading.Thread(target=server.serve_forever, name="ytsprites-metrics", daemon=True)
+    t.start()
+    print(f"[Metrics] Scrape endpoint on http://{host}:{port}/metrics")
+    return server
@@ -1,13 +1,52 @@
 import time
+import threading
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from proto.ytsprites_pb2 import JobState, SpriteOptions
+from .subproc_rt import ProcGroup
+
+@dataclass
+class MediaInfo:
+    """Source params from a single ffprobe run."""
+    duration_sec: Optional[float] = None
+    size_bytes: Optional[int] = None
+    format_name: Optional[str] = None
+    codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    # Degrees, 0/90/180/270
+    rotation: int = 0
+    # Median distance between keyframes at the start of the stream
+    keyframe_interval_sec: Optional[float] = None
+
+@dataclass
+class VariantResult:
+    """Sheets and VTT of one of SpriteOptions.variants."""
+    name: str
+    sprites: List[tuple]
+    vtt_content: str
 
 @dataclass
 class JobResult:
+    # (sprite_name, abs_path): sheets stay on disk in the job workspace, read only when sent
     sprites: List[tuple]
     vtt_content: str
     video_id: str
+    # Bytes of sprite files on disk, variants included
+    size_bytes: int = 0
+    variants: List[VariantResult] = field(default_factory=list)
+
+    def all_sprites(self) -> List[tuple]:
+        """Sheets of the main result and of every variant."""
+        return self.sprites + [s for v in self.variants for s in v.sprites]
+
+@dataclass
+class Lease:
+    """Job handed to a remote worker until expires_at (monotonic), renewed by heartbeats."""
+    lease_id: str
+    worker_id: str
+    expires_at: float
 
 @dataclass
 class Job:
@@ -19,6 +58,18 @@ class Job:
     # Int paths
     temp_dir_path: Optional[str] = None
     video_file_path: Optional[str] = None
+    # sha256 of the uploaded video
+    content_hash: Optional[str] = None
+    probe: Optional[MediaInfo] = None
+
+    # Scheduling: higher priority goes sooner, tenant is the fair-share owner
+    priority: int = 0
+    tenant: str = ""
+    # Times the job was handed to a remote worker
+    attempts: int = 0
+    # Admission load: input bytes and estimated worker-seconds, counted until the job finishes
+    input_bytes: int = 0
+    work_sec: float = 0.0
     
     # State
     state: int = JobState.JOB_STATE_SUBMITTED
@@ -30,9 +81,57 @@ class Job:
     
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
+    # Last time the job entered the queue
+    queued_at: float = 0.0
+
+    # Status change notification: version grows on every update, waiters block on the condition,
+    # subscribers (e.g. asyncio bridges) are called after each update.
+    version: int = 0
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False, compare=False)
+    _subscribers: List[Callable] = field(default_factory=list, repr=False, compare=False)
+    # ffmpeg processes running for the job, stopped on cancel or timeout
+    procs: ProcGroup = field(default_factory=ProcGroup, repr=False, compare=False)
 
     def update_status(self, state, percent, msg=""):
-        self.state = state
-        self.percent = percent
-        self.message = msg
-        self.updated_at = time.time()
\ No newline at end of file
+        with self._cond:
+            self.state = state
+            self.percent = percent
+            self.message = msg
+            self.updated_at = time.time()
+            self.version += 1
+            self._cond.notify_all()
+            subscribers = list(self._subscribers)
+        for cb in subscribers:
+            try:
+                cb(self)
+            except Exception as e:
+                print(f"[JOB] subscriber failed for {self.job_id}: {e}")
+
+    def snapshot(self) -> Tuple[int, int, int, str]:
+        """Consistent (version, state, percent, message)."""
+        with self._cond:
+            return self.version, self.state, self.percent, self.message
+
+    def wait_for_update(self, last_version, timeout=None) -> int:
+        """Blocks until version differs from last_version, wake() or timeout. Returns current version."""
+        with self._cond:
+            if self.version == last_version:
+                self._cond.wait(timeout)
+            return self.version
+
+    def wake(self):
+        """Releases waiters without a status change (e.g. client disconnected)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def subscribe(self, cb: Callable):
+        with self._cond:
+            self._subscribers.append(cb)
+
+    def unsubscribe(self, cb: Callable):
+        with self._cond:
+            if cb in self._subscribers:
+                self._subscribers.remove(cb)
+
+    def is_finished(self) -> bool:
+        return self.state in (JobState.JOB_STATE_DONE, JobState.JOB_STATE_FAILED, JobState.JOB_STATE_CANCELED)
\ No newline at end of file
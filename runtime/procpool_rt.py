@@ -0,0 +1,106 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from config.service_cfg import cfg
+from .models_rt import Job, MediaInfo
+from .metrics_rt import registry
+from .subproc_rt import ProcGroup
+from proto.ytsprites_pb2 import SpriteOptions
+
+def _process_video_child(video_path, workspace, options_bytes, probe, engine, progress_q, cancel_ev):
+    """Runs in a pool process. Sheets stay in workspace, only their paths, the VTTs
+    and metrics recorded during the job go back."""
+    from utils import ffmpeg_ut
+    registry.reset()
+    procs = ProcGroup()
+    done = threading.Event()
+
+    def watch_cancel():
+        # Set by the parent on cancel or timeout, or below once the job is over
+        cancel_ev.wait()
+        if not done.is_set():
+            procs.stop(InterruptedError("Job canceled"))
+
+    threading.Thread(target=watch_cancel, daemon=True).start()
+
+    def on_progress(pct, msg):
+        if cancel_ev.is_set():
+            raise InterruptedError("Job canceled")
+        progress_q.put((pct, msg))
+
+    options = SpriteOptions.FromString(options_bytes)
+    try:
+        result = ffmpeg_ut.process_video(
+            video_path, workspace, options, on_progress, engine=engine, probe=probe, procs=procs
+        )
+    finally:
+        done.set()
+        cancel_ev.set()
+    return result, registry.dump()
+
+class ProcessBackend:
+    """
+    Runs process_video in a pool of worker processes, so Pillow packing of parallel jobs
+    doesn't share one GIL with each other and with gRPC threads.
+    Progress comes back through a managed queue, cancel goes to the child as a managed event,
+    where it stops the child's ffmpeg processes.
+    """
+
+    def __init__(self, workers: int, start_method: str = "spawn"):
+        ctx = multiprocessing.get_context(start_method)
+        self._manager = ctx.Manager()
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+        print(f"[ProcPool] Started {workers} processes ({start_method})")
+
+    def process_video(
+        self, job: Job, progress_cb, probe: MediaInfo, engine: Optional[str] = None
+    ) -> Tuple[List[str], str, List[Tuple[str, List[str], str]]]:
+        """Same contract as ffmpeg_ut.process_video for job's input; blocks the calling thread."""
+        progress_q = self._manager.Queue()
+        cancel_ev = self._manager.Event()
+
+        # Cancel or timeout of the job stops its ffmpeg in the child
+        hook = job.procs.on_stop(lambda _err: cancel_ev.set())
+        try:
+            job.procs.check()
+            future = self._pool.submit(
+                _process_video_child,
+                job.video_file_path, job.temp_dir_path, job.options.SerializeToString(), probe, engine, progress_q, cancel_ev
+            )
+            # Sentinel ends the relay loop below when the child is done either way
+            future.add_done_callback(lambda _f: progress_q.put(None))
+            while True:
+                item = progress_q.get()
+                if item is None:
+                    break
+                try:
+                    progress_cb(*item)
+                except (InterruptedError, TimeoutError):
+                    cancel_ev.set()
+            try:
+                result, metrics = future.result()
+            except InterruptedError:
+                # Child only knows it was stopped, the group knows why
+                job.procs.check()
+                raise
+            registry.merge(metrics)
+            return result
+        finally:
+            job.procs.remove_hook(hook)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
+
+_backend: Optional[ProcessBackend] = None
+_backend_lock = threading.Lock()
+
+def get_process_backend() -> ProcessBackend:
+    """Pool is started on first use, only when EXECUTION_BACKEND is 'process'."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = ProcessBackend(cfg.PROCESS_POOL_SIZE or cfg.MAX_WORKERS, cfg.PROCESS_START_METHOD)
+        return _backend
@@ -1,67 +1,493 @@
+import os
+import bisect
+import itertools
 import threading
+import time
 import uuid
-from collections import deque
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 
-from .models_rt import Job
+from config.service_cfg import cfg
+from utils import files_ut
+from .models_rt import Job, Lease
+from .sched_rt import Scheduler
+from .admission_rt import check_admission, estimate_work_sec
+from .metrics_rt import registry, observe_stage
 from proto.ytsprites_pb2 import JobState
 
+class SortedQueue:
+    """Job ids ordered by key. Position lookup is a bisect (O(log n)), not a scan."""
+
+    def __init__(self):
+        self._keys: List[tuple] = []
+        self._key_of: Dict[str, tuple] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, job_id):
+        return job_id in self._key_of
+
+    def push(self, job_id: str, key: tuple):
+        # job_id is the last key element, so keys are unique
+        key = (*key, job_id)
+        self._key_of[job_id] = key
+        bisect.insort(self._keys, key)
+
+    def pop_first(self) -> Optional[str]:
+        if not self._keys:
+            return None
+        key = self._keys.pop(0)
+        del self._key_of[key[-1]]
+        return key[-1]
+
+    def remove(self, job_id: str) -> bool:
+        key = self._key_of.pop(job_id, None)
+        if key is None:
+            return False
+        i = bisect.bisect_left(self._keys, key)
+        del self._keys[i]
+        return True
+
+    def position(self, job_id: str) -> int:
+        """1-based place in queue, 0 if not queued."""
+        key = self._key_of.get(job_id)
+        if key is None:
+            return 0
+        return bisect.bisect_left(self._keys, key) + 1
+
 class JobManager:
-    def __init__(self, max_queue=100):
+    def __init__(self, max_queue=100, policy: Optional[str] = None):
         self._jobs: Dict[str, Job] = {}
-        self._queue: deque = deque()
+        # Ordered by scheduler keys, so pop and position follow the policy
+        self._queue = SortedQueue()
+        self.scheduler = Scheduler(policy)
+        # Arrival order, last tie-break of every policy
+        self._seq = itertools.count()
+        # Jobs created with enqueue=False, waiting for their upload to finish
+        self._pending: set = set()
         self._max_queue = max_queue
         self._lock = threading.RLock()
+        # Signaled on every enqueue, take() waits on it
+        self._not_empty = threading.Condition(self._lock)
+        # Called with job_id whenever a job enters the queue (e.g. to wake asyncio workers)
+        self._enqueue_listeners: List[Callable] = []
+
+        # Retention of finished jobs: job_id -> (finished_at, result bytes), in finish order
+        self._retained: OrderedDict = OrderedDict()
+        self._retained_bytes = 0
+        # job_id -> drop deadline, set on first GetResult (grace is constant, so in deadline order)
+        self._fetched: OrderedDict = OrderedDict()
+        self._reaped = 0
+        self._reap_wakeup = threading.Event()
+        # Optional JobStore, see attach_store()
+        self._store = None
+        # job_id -> Lease of jobs processed by remote workers
+        self._leases: Dict[str, Lease] = {}
+
+        # Admission load of unfinished jobs (sums of Job.input_bytes / work_sec),
+        # _pending_bytes is the part of uploads still in progress
+        self._load_bytes = 0
+        self._load_work = 0.0
+        self._pending_bytes = 0
+        self._rejected = 0
 
-    def create_job(self, video_id, mime, options) -> Optional[str]:
-        """Creates a task and adds it to the queue. Returns the job_id or None if the queue is full."""
+    def add_enqueue_listener(self, cb: Callable):
+        self._enqueue_listeners.append(cb)
+
+    def _notify_enqueued(self, job_id):
+        self._not_empty.notify()
+        for cb in self._enqueue_listeners:
+            cb(job_id)
+
+    def _push(self, job: Job):
+        job.queued_at = time.time()
+        self._queue.push(job.job_id, self.scheduler.key(job, next(self._seq)))
+        self._notify_enqueued(job.job_id)
+
+    def _new_job(self, video_id, mime, options, priority=0, tenant="") -> Job:
+        job_id = str(uuid.uuid4())
+        job = Job(job_id=job_id, video_id=video_id, video_mime=mime, options=options,
+                  priority=priority, tenant=tenant)
+        self._register(job)
+        return job
+
+    def create_job(self, video_id, mime, options, enqueue=True, priority=0, tenant="",
+                   input_bytes=0) -> Optional[str]:
+        """Creates a task and adds it to the queue. Returns the job_id or None if the queue is full.
+        With enqueue=False the job stays SUBMITTED until enqueue_job() is called (upload in progress).
+        priority (higher goes sooner) and tenant (fair-share owner) are used by the scheduler.
+        input_bytes is the (expected) video size; raises AdmissionError if the load limits don't allow it."""
         with self._lock:
-            if len(self._queue) >= self._max_queue:
+            if len(self._queue) + len(self._pending) >= self._max_queue:
                 return None
-            
-            job_id = str(uuid.uuid4())
-            job = Job(job_id=job_id, video_id=video_id, video_mime=mime, options=options)
-            job.state = JobState.JOB_STATE_QUEUED
-            
-            self._jobs[job_id] = job
-            self._queue.append(job_id)
+
+            work_sec = estimate_work_sec(input_bytes)
+            rejection = check_admission(self._load_bytes, self._load_work, self._pending_bytes,
+                                        input_bytes, work_sec)
+            if rejection:
+                self._rejected += 1
+                raise rejection
+
+            job = self._new_job(video_id, mime, options, priority, tenant)
+            job_id = job.job_id
+
+            if enqueue:
+                job.update_status(JobState.JOB_STATE_QUEUED, 0)
+                self._push(job)
+            else:
+                self._pending.add(job_id)
+            self._set_load(job, input_bytes, work_sec)
             return job_id
 
+    def create_done_job(self, video_id, mime, options, result, temp_dir_path=None, content_hash=None) -> str:
+        """Registers an already finished job (result served from cache), bypasses the queue.
+        temp_dir_path holds the result files; it is set before the job is first saved to store."""
+        with self._lock:
+            job = self._new_job(video_id, mime, options)
+            job.result = result
+            job.temp_dir_path = temp_dir_path
+            job.content_hash = content_hash
+            job.update_status(JobState.JOB_STATE_DONE, 100, "Done (cached)")
+            return job.job_id
+
+    def enqueue_job(self, job_id) -> bool:
+        """Moves a job created with enqueue=False to the queue once its video is saved."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job_id not in self._pending:
+                return False
+            self._pending.discard(job_id)
+            self._pending_bytes -= job.input_bytes
+            if job.state == JobState.JOB_STATE_CANCELED:
+                return False
+            job.update_status(JobState.JOB_STATE_QUEUED, 0)
+            self._push(job)
+            return True
+
+    def discard_job(self, job_id):
+        """Forgets a job that never made it to the queue (e.g. failed upload)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job:
+                self._set_load(job, 0, 0.0)
+            self._pending.discard(job_id)
+            self._forget_retained(job_id)
+            if self._store:
+                self._store.delete(job_id)
+
     def get_job(self, job_id) -> Optional[Job]:
         with self._lock:
             return self._jobs.get(job_id)
 
     def pop_next_job(self) -> Optional[Job]:
-        """Takes the next task from the queue for the worker."""
+        """Takes the next task from the queue for the worker, None if there is none."""
         with self._lock:
-            if not self._queue:
-                return None
-            
-            job_id = self._queue.popleft()
-            job = self._jobs.get(job_id)
-            
-            # Pass cancelled tasks
-            if job and job.state == JobState.JOB_STATE_CANCELED:
-                return self.pop_next_job()
-                
-            return job
+            while self._queue:
+                job_id = self._queue.pop_first()
+                job = self._jobs.get(job_id)
+                if not job:
+                    continue
+                self.scheduler.on_pop(job)
+
+                # Pass cancelled tasks
+                if job.state != JobState.JOB_STATE_CANCELED:
+                    observe_stage("queue_wait", time.time() - job.queued_at)
+                    return job
+            return None
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Job]:
+        """Blocking pop_next_job(): waits up to timeout (None = forever) for a job to be enqueued."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            while True:
+                job = self.pop_next_job()
+                if job:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._not_empty.wait(remaining)
 
     def cancel_job(self, job_id) -> bool:
         with self._lock:
             job = self._jobs.get(job_id)
             if not job:
                 return False
-            # If the task is being processed, the worker should check it itself in the next step.
-            job.state = JobState.JOB_STATE_CANCELED
-            job.message = "Canceled by user"
-            return True
+            queued = self._queue.remove(job_id)
+            if queued:
+                self.scheduler.on_remove(job)
+            job.update_status(JobState.JOB_STATE_CANCELED, job.percent, "Canceled by user")
+        # Running ffmpeg of the job is terminated, its worker unwinds and removes the workspace
+        job.procs.stop(InterruptedError("Job canceled"))
+        if queued:
+            # No worker will pick it, drop the uploaded video now
+            files_ut.cleanup_workspace(job.temp_dir_path)
+        return True
 
     def get_queue_position(self, job_id) -> int:
         with self._lock:
+            return self._queue.position(job_id)
+
+    # Admission load
+
+    def _set_load(self, job: Job, input_bytes: int, work_sec: float):
+        self._load_bytes += input_bytes - job.input_bytes
+        self._load_work += work_sec - job.work_sec
+        if job.job_id in self._pending:
+            self._pending_bytes += input_bytes - job.input_bytes
+        job.input_bytes, job.work_sec = input_bytes, work_sec
+        if not self._load_bytes:
+            # No float drift once everything is done
+            self._load_work = 0.0
+
+    def update_load(self, job_id, input_bytes: int):
+        """Actual video size is known (and maybe probed duration): replaces the admission estimate."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.is_finished():
+                return
+            duration = job.probe.duration_sec if job.probe else None
+            self._set_load(job, input_bytes, estimate_work_sec(input_bytes, duration))
+
+    # Retention of finished jobs
+
+    def _on_job_update(self, job: Job):
+        """Job subscriber: records the change in store; retention of a job starts when it gets finished."""
+        if self._store:
+            self._store.save(job)
+        if not job.is_finished():
+            return
+        with self._lock:
+            if job.job_id not in self._jobs or job.job_id in self._retained:
+                return
+            self._set_load(job, 0, 0.0)
+            over_cap = self._retain(job, time.time())
+        if over_cap:
+            self._reap_wakeup.set()
+
+    def _retain(self, job: Job, finished_at: float) -> bool:
+        """Starts retention of a finished job. Returns True if retained bytes are over cap."""
+        size = job.result.size_bytes if job.result else 0
+        self._retained[job.job_id] = (finished_at, size)
+        self._retained_bytes += size
+        return bool(cfg.RETAINED_MAX_MB) and self._retained_bytes > cfg.RETAINED_MAX_MB * 1024 * 1024
+
+    def _forget_retained(self, job_id):
+        entry = self._retained.pop(job_id, None)
+        if entry:
+            self._retained_bytes -= entry[1]
+        self._fetched.pop(job_id, None)
+
+    def mark_fetched(self, job_id):
+        """Result was requested: keep the job RESULT_GRACE_SEC more (first request counts)."""
+        with self._lock:
+            if job_id in self._retained and job_id not in self._fetched:
+                self._fetched[job_id] = time.time() + cfg.RESULT_GRACE_SEC
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """Drops finished jobs past grace or TTL, then the oldest ones while over bytes cap.
+        Workspaces are removed outside the lock. Returns number of dropped jobs."""
+        now = now if now is not None else time.time()
+        cap = cfg.RETAINED_MAX_MB * 1024 * 1024
+        drop = []
+        with self._lock:
+            for job_id, deadline in self._fetched.items():
+                if deadline > now:
+                    break
+                drop.append(job_id)
+            for job_id, (finished_at, _) in self._retained.items():
+                if now - finished_at <= cfg.JOB_TTL_SEC:
+                    break
+                drop.append(job_id)
+            for job_id in drop:
+                self._forget_retained(job_id)
+
+            # Over cap: oldest finished first
+            while cap and self._retained_bytes > cap and self._retained:
+                job_id = next(iter(self._retained))
+                self._forget_retained(job_id)
+                drop.append(job_id)
+
+            workspaces = []
+            for job_id in drop:
+                job = self._jobs.pop(job_id, None)
+                if job:
+                    workspaces.append(job.temp_dir_path)
+                    if self._store:
+                        self._store.delete(job_id)
+            self._reaped += len(workspaces)
+
+        for path in workspaces:
+            files_ut.cleanup_workspace(path)
+        if workspaces:
+            print(f"[JobManager] Reaped {len(workspaces)} finished jobs")
+        return len(workspaces)
+
+    def _reaper_loop(self, interval):
+        # Expired leases are checked more often than finished jobs
+        tick = min(interval, cfg.LEASE_TTL_SEC / 2)
+        next_reap = 0.0
+        while True:
+            self._reap_wakeup.wait(tick)
             try:
-                return self._queue.index(job_id) + 1
-            except ValueError:
-                return 0
+                self.expire_leases()
+                if self._reap_wakeup.is_set() or time.monotonic() >= next_reap:
+                    self._reap_wakeup.clear()
+                    next_reap = time.monotonic() + interval
+                    self.reap()
+            except Exception as e:
+                print(f"[JobManager] Reaper failed: {e}")
+
+    def start_reaper(self, interval: Optional[float] = None):
+        """Background thread that runs reap() every REAPER_INTERVAL_SEC or when over bytes cap,
+        and expire_leases() at least twice per LEASE_TTL_SEC."""
+        t = threading.Thread(
+            target=self._reaper_loop, args=(interval or cfg.REAPER_INTERVAL_SEC,),
+            name="ytsprites-reaper", daemon=True
+        )
+        t.start()
+
+    # Leases for remote workers
+
+    def lease_job(self, worker_id: str, timeout: Optional[float] = None) -> Optional[Tuple[Job, Lease]]:
+        """take() on behalf of a remote worker: the job stays leased until complete/fail or expiry."""
+        job = self.take(timeout)
+        if not job:
+            return None
+        lease = Lease(uuid.uuid4().hex, worker_id, time.monotonic() + cfg.LEASE_TTL_SEC)
+        with self._lock:
+            self._leases[job.job_id] = lease
+            job.attempts += 1
+        job.update_status(JobState.JOB_STATE_PROCESSING, 0, f"Leased by {worker_id}")
+        return job, lease
+
+    def renew_lease(self, job_id: str, lease_id: str) -> Optional[Job]:
+        """Extends a valid lease, None if it is lost."""
+        with self._lock:
+            lease = self._leases.get(job_id)
+            if not lease or lease.lease_id != lease_id:
+                return None
+            lease.expires_at = time.monotonic() + cfg.LEASE_TTL_SEC
+            return self._jobs.get(job_id)
+
+    def release_lease(self, job_id: str, lease_id: str) -> Optional[Job]:
+        """Ends a valid lease (job completed, failed or canceled), None if it is lost."""
+        with self._lock:
+            lease = self._leases.get(job_id)
+            if not lease or lease.lease_id != lease_id:
+                return None
+            del self._leases[job_id]
+            return self._jobs.get(job_id)
+
+    def expire_leases(self, now: Optional[float] = None) -> int:
+        """Requeues jobs of workers that stopped heartbeating. Returns number of expired leases."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            expired = [job_id for job_id, lease in self._leases.items() if lease.expires_at <= now]
+            for job_id in expired:
+                lease = self._leases.pop(job_id)
+                job = self._jobs.get(job_id)
+                if not job or job.is_finished():
+                    continue
+                if job.attempts >= cfg.LEASE_MAX_ATTEMPTS:
+                    print(f"[JobManager] Lease of {job_id} by {lease.worker_id} expired, giving up")
+                    job.update_status(JobState.JOB_STATE_FAILED, 0, f"Worker lost {job.attempts} times")
+                    continue
+                print(f"[JobManager] Lease of {job_id} by {lease.worker_id} expired, requeued")
+                job.update_status(JobState.JOB_STATE_QUEUED, 0, "Requeued: worker lost")
+                self._push(job)
+        return len(expired)
+
+    # Persistence
+
+    def attach_store(self, store):
+        """Records every job change and removal in store (JobStore). Call before restore() and serving."""
+        self._store = store
+
+    def restore(self) -> int:
+        """
+        Loads jobs of the previous run from store and reconciles them with workspaces on disk:
+        QUEUED/PROCESSING jobs whose video survived are queued again (partial output removed),
+        finished jobs are kept while their files exist, unfinished uploads and workspaces
+        nobody refers to are removed. Returns number of requeued jobs.
+        """
+        if not self._store:
+            return 0
+        requeued = 0
+        keep_dirs = set()
+        drop_dirs = []
+        finished = []
+        with self._lock:
+            for job in self._store.load():
+                ws = job.temp_dir_path
+                if job.state in (JobState.JOB_STATE_QUEUED, JobState.JOB_STATE_PROCESSING):
+                    if job.video_file_path and os.path.exists(job.video_file_path):
+                        files_ut.cleanup_job_inputs(ws, keep=(os.path.basename(job.video_file_path),))
+                        self._register(job)
+                        job.update_status(JobState.JOB_STATE_QUEUED, 0, "Requeued after restart")
+                        self._push(job)
+                        self.update_load(job.job_id, os.path.getsize(job.video_file_path))
+                        keep_dirs.add(ws)
+                        requeued += 1
+                    else:
+                        self._register(job)
+                        job.update_status(JobState.JOB_STATE_FAILED, 0, "Input lost on restart")
+                        drop_dirs.append(ws)
+                elif job.state == JobState.JOB_STATE_DONE:
+                    if job.result and all(os.path.exists(path) for _, path in job.result.all_sprites()):
+                        self._register(job)
+                        finished.append(job)
+                        keep_dirs.add(ws)
+                    else:
+                        self._store.delete(job.job_id)
+                        drop_dirs.append(ws)
+                elif job.is_finished():
+                    # FAILED/CANCELED: status only
+                    self._register(job)
+                    finished.append(job)
+                    drop_dirs.append(ws)
+                else:
+                    # Upload was in progress, the client has to resubmit
+                    self._store.delete(job.job_id)
+                    drop_dirs.append(ws)
+            # Store gives creation order; the reaper's TTL scan needs finish order
+            for job in sorted(finished, key=lambda j: j.updated_at):
+                self._retain(job, job.updated_at)
+
+        for path in drop_dirs:
+            files_ut.cleanup_workspace(path)
+        orphans = [p for p in files_ut.list_workspaces() if p not in keep_dirs]
+        for path in orphans:
+            files_ut.cleanup_workspace(path)
+        print(f"[JobManager] Restored {len(self._jobs)} jobs, requeued {requeued}, "
+              f"removed {len(orphans)} orphan workspaces")
+        self._reap_wakeup.set()
+        return requeued
+
+    def _register(self, job: Job):
+        job.subscribe(self._on_job_update)
+        self._jobs[job.job_id] = job
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "jobs_total": len(self._jobs),
+                "jobs_queued": len(self._queue),
+                "jobs_pending_upload": len(self._pending),
+                "leases_active": len(self._leases),
+                "retained_jobs": len(self._retained),
+                "retained_bytes": self._retained_bytes,
+                "reaped_jobs": self._reaped,
+                "admitted_bytes": self._load_bytes,
+                "backlog_work_sec": round(self._load_work, 1),
+                "admission_rejected": self._rejected,
+            }
 
 # Global manager instance
-job_manager = JobManager()
\ No newline at end of file
+job_manager = JobManager(max_queue=cfg.MAX_QUEUE_SIZE)
+
+registry.gauge("queue_depth", "Jobs waiting in queue", lambda: job_manager.stats()["jobs_queued"])
+registry.gauge("retained_result_bytes", "Bytes of results kept for finished jobs",
+               lambda: job_manager.stats()["retained_bytes"])
+registry.gauge("tmp_dir_bytes", "Bytes of job workspaces in TMP_DIR", files_ut.workspaces_bytes)
@@ -0,0 +1,108 @@
+from typing import Dict, Optional
+
+from config.service_cfg import cfg
+from .models_rt import Job
+
+def job_cost(job: Job) -> float:
+    """Expected work of a job: probed duration in seconds, SCHED_DEFAULT_COST_SEC if not probed."""
+    if job.probe and job.probe.duration_sec:
+        return job.probe.duration_sec
+    return cfg.SCHED_DEFAULT_COST_SEC
+
+class FifoPolicy:
+    """Arrival order."""
+    name = "fifo"
+    needs_cost = False
+
+    def key(self, job: Job, seq: int) -> tuple:
+        return (seq,)
+
+    def on_pop(self, job: Job):
+        pass
+
+    def on_remove(self, job: Job):
+        pass
+
+class SjfPolicy(FifoPolicy):
+    """
+    Shortest expected job first by probed duration. Each second of waiting counts as
+    SCHED_SJF_AGING seconds less of duration, so long videos still get their turn.
+    """
+    name = "sjf"
+    needs_cost = True
+
+    def key(self, job: Job, seq: int) -> tuple:
+        return (job_cost(job) + cfg.SCHED_SJF_AGING * job.created_at, seq)
+
+class FairSharePolicy(FifoPolicy):
+    """
+    Start-time fair queueing over owners (tenant, or video_id without tenant). Each owner's next job
+    starts after its previous ones at virtual time; cost is the probed duration, so owners share
+    worker time rather than job count. A busy owner can't push other owners' jobs back.
+    """
+    name = "fair"
+    needs_cost = True
+
+    def __init__(self):
+        self._vtime = 0.0
+        # owner -> virtual finish of its last queued job
+        self._finish: Dict[str, float] = {}
+        # job_id -> virtual start, for jobs in queue
+        self._start: Dict[str, float] = {}
+
+    @staticmethod
+    def owner(job: Job) -> str:
+        return job.tenant or job.video_id
+
+    def key(self, job: Job, seq: int) -> tuple:
+        owner = self.owner(job)
+        start = max(self._vtime, self._finish.get(owner, 0.0))
+        self._finish[owner] = start + job_cost(job)
+        self._start[job.job_id] = start
+        return (start, seq)
+
+    def on_pop(self, job: Job):
+        start = self._start.pop(job.job_id, None)
+        if start is not None:
+            self._vtime = max(self._vtime, start)
+        # Owners with nothing queued anymore don't need their tag
+        if len(self._finish) > 4 * len(self._start) + 64:
+            self._finish = {o: f for o, f in self._finish.items() if f > self._vtime}
+
+    def on_remove(self, job: Job):
+        self._start.pop(job.job_id, None)
+
+POLICIES = {p.name: p for p in (FifoPolicy, SjfPolicy, FairSharePolicy)}
+
+class Scheduler:
+    """Queue keys for JobManager: priority class first (higher goes sooner), then the policy order."""
+
+    def __init__(self, policy: Optional[str] = None, use_priority: Optional[bool] = None):
+        name = (policy or cfg.SCHED_POLICY).lower()
+        if name not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {name}")
+        self.policy = POLICIES[name]()
+        self.use_priority = cfg.SCHED_USE_PRIORITY if use_priority is None else use_priority
+
+    @property
+    def name(self) -> str:
+        return self.policy.name
+
+    @property
+    def needs_cost(self) -> bool:
+        return self.policy.needs_cost
+
+    @staticmethod
+    def priority_class(priority: int) -> int:
+        """Client priority clamped to 0..SCHED_MAX_PRIORITY."""
+        return max(0, min(priority, cfg.SCHED_MAX_PRIORITY))
+
+    def key(self, job: Job, seq: int) -> tuple:
+        prio = -self.priority_class(job.priority) if self.use_priority else 0
+        return (prio, *self.policy.key(job, seq))
+
+    def on_pop(self, job: Job):
+        self.policy.on_pop(job)
+
+    def on_remove(self, job: Job):
+        self.policy.on_remove(job)
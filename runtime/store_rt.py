@@ -0,0 +1,167 @@
+import os
+import json
+import atexit
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from config.service_cfg import cfg
+from utils import files_ut
+from .models_rt import Job, JobResult, VariantResult
+from proto.ytsprites_pb2 import SpriteOptions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    video_id TEXT,
+    video_mime TEXT,
+    options BLOB,
+    priority INTEGER,
+    tenant TEXT,
+    content_hash TEXT,
+    temp_dir TEXT,
+    video_path TEXT,
+    state INTEGER,
+    percent INTEGER,
+    message TEXT,
+    result TEXT,
+    created_at REAL,
+    updated_at REAL
+)
+"""
+
+COLUMNS = ("job_id", "video_id", "video_mime", "options", "priority", "tenant", "content_hash",
+           "temp_dir", "video_path", "state", "percent", "message", "result", "created_at", "updated_at")
+
+def job_row(job: Job) -> tuple:
+    _, state, percent, message = job.snapshot()
+    result = None
+    if job.result:
+        result = json.dumps({
+            "sprites": [list(s) for s in job.result.sprites],
+            "vtt": job.result.vtt_content,
+            "size": job.result.size_bytes,
+            "variants": [
+                {"name": v.name, "sprites": [list(s) for s in v.sprites], "vtt": v.vtt_content}
+                for v in job.result.variants
+            ],
+        })
+    options = job.options.SerializeToString() if job.options is not None else b""
+    return (job.job_id, job.video_id, job.video_mime, options, job.priority, job.tenant, job.content_hash,
+            job.temp_dir_path, job.video_file_path, state, percent, message, result,
+            job.created_at, job.updated_at)
+
+def row_job(row: sqlite3.Row) -> Job:
+    job = Job(
+        job_id=row["job_id"], video_id=row["video_id"], video_mime=row["video_mime"],
+        options=SpriteOptions.FromString(row["options"] or b""),
+        temp_dir_path=row["temp_dir"], video_file_path=row["video_path"], content_hash=row["content_hash"],
+        priority=row["priority"] or 0, tenant=row["tenant"] or "",
+        state=row["state"], percent=row["percent"], message=row["message"] or "",
+        created_at=row["created_at"], updated_at=row["updated_at"],
+    )
+    if row["result"]:
+        res = json.loads(row["result"])
+        job.result = JobResult(
+            sprites=[tuple(s) for s in res["sprites"]], vtt_content=res["vtt"],
+            video_id=job.video_id, size_bytes=res["size"],
+            variants=[
+                VariantResult(name=v["name"], sprites=[tuple(s) for s in v["sprites"]], vtt_content=v["vtt"])
+                for v in res.get("variants", [])
+            ],
+        )
+    return job
+
+class JobStore:
+    """
+    Jobs persisted in SQLite (WAL) so queued work survives restarts.
+    save()/delete() only mark the job; a flusher thread writes the latest state of all marked jobs
+    in one transaction every JOB_STORE_FLUSH_SEC, so a job's progress updates cost one row write.
+    """
+
+    def __init__(self, path: str, flush_sec: float = 0.5):
+        self.path = path
+        self._flush_sec = flush_sec
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: a power loss may drop the last batch, never corrupts the file
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._dirty: Dict[str, Job] = {}
+        self._deleted: set = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, name="ytsprites-store", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def save(self, job: Job):
+        with self._lock:
+            self._deleted.discard(job.job_id)
+            self._dirty[job.job_id] = job
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._dirty.pop(job_id, None)
+            self._deleted.add(job_id)
+
+    def load(self) -> List[Job]:
+        with self._db_lock:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+        return [row_job(r) for r in rows]
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+        if not dirty and not deleted:
+            return
+        rows = [job_row(job) for job in dirty.values()]
+        placeholders = ",".join("?" * len(COLUMNS))
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            try:
+                if rows:
+                    self._db.executemany(
+                        f"INSERT OR REPLACE INTO jobs ({','.join(COLUMNS)}) VALUES ({placeholders})", rows
+                    )
+                if deleted:
+                    self._db.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in deleted])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self._flush_sec)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[STORE] flush failed: {e}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[STORE] final flush failed: {e}")
+        with self._db_lock:
+            self._db.close()
+
+def open_job_store() -> Optional[JobStore]:
+    """JobStore at JOB_STORE_PATH (default <TMP_DIR>/ytsprites_jobs.db) if JOB_STORE_ENABLED."""
+    if not cfg.JOB_STORE_ENABLED:
+        return None
+    path = cfg.JOB_STORE_PATH or os.path.join(files_ut.tmp_base(), "ytsprites_jobs.db")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    print(f"[STORE] Jobs persisted in {path}")
+    return JobStore(path, cfg.JOB_STORE_FLUSH_SEC)
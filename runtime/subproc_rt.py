@@ -0,0 +1,103 @@
+import os
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from config.service_cfg import cfg
+
+def _alive(proc) -> bool:
+    # subprocess.Popen or asyncio.subprocess.Process
+    if hasattr(proc, "poll"):
+        return proc.poll() is None
+    return proc.returncode is None
+
+def signal_proc(proc, sig):
+    """Signals the process group of proc (started with start_new_session=True), so children of ffmpeg go too."""
+    if not _alive(proc):
+        return
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+class ProcGroup:
+    """
+    Subprocesses running for one job. stop(error) sends SIGTERM to each of them, SIGKILL to those
+    still alive after FFMPEG_KILL_GRACE_SEC, and makes every later add() or check() raise error.
+    Pipelines started for the job raise error too once their process is gone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procs = set()
+        self._hooks: List[Callable] = []
+        self.error: Optional[BaseException] = None
+
+    def add(self, proc):
+        """Registers a started process. If the group is stopped already, proc is killed and error raised."""
+        with self._lock:
+            if self.error is None:
+                self._procs.add(proc)
+                return
+        signal_proc(proc, signal.SIGKILL)
+        raise self.error
+
+    def discard(self, proc):
+        with self._lock:
+            self._procs.discard(proc)
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+    def on_stop(self, cb: Callable):
+        """cb(error) is called on stop, e.g. to pass it to a pool process. Returns cb for remove_hook()."""
+        with self._lock:
+            self._hooks.append(cb)
+        return cb
+
+    def remove_hook(self, cb: Callable):
+        with self._lock:
+            if cb in self._hooks:
+                self._hooks.remove(cb)
+
+    def stop(self, error: BaseException) -> bool:
+        """Ends the group with error. False if it was stopped before."""
+        with self._lock:
+            if self.error is not None:
+                return False
+            self.error = error
+            procs = list(self._procs)
+            hooks = list(self._hooks)
+        for proc in procs:
+            signal_proc(proc, signal.SIGTERM)
+        for cb in hooks:
+            try:
+                cb(error)
+            except Exception as e:
+                print(f"[PROCS] stop hook failed: {e}")
+        if procs:
+            timer = threading.Timer(cfg.FFMPEG_KILL_GRACE_SEC, self._kill, args=(procs,))
+            timer.daemon = True
+            timer.start()
+        return True
+
+    @staticmethod
+    def _kill(procs):
+        for proc in procs:
+            signal_proc(proc, signal.SIGKILL)
+
+    @contextmanager
+    def deadline(self, sec: float):
+        """Stops the group with TimeoutError if the block runs longer than sec (0 = no limit)."""
+        if not sec or sec <= 0:
+            yield
+            return
+        timer = threading.Timer(sec, lambda: self.stop(TimeoutError(f"Job timed out after {sec:g}s")))
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
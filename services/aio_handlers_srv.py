@@ -0,0 +1,210 @@
+import asyncio
+import time
+import hashlib
+import grpc
+from proto import ytsprites_pb2
+from runtime.queue_rt import job_manager
+from runtime.admission_rt import AdmissionError
+from runtime.metrics_rt import observe_stage, bytes_in_total, bytes_out_total
+from runtime.models_rt import JobState
+from utils import files_ut
+from config.service_cfg import cfg
+from .handlers_srv import SpritesService
+from .aio_worker_srv import executor
+
+def _write_chunk(f, hasher, data):
+    hasher.update(data)
+    f.write(data)
+
+class AioSpritesService(SpritesService):
+    """SpritesService for grpc.aio: streams and fan-out are coroutines, disk and hashing go to executor."""
+
+    async def Submit(self, request, context):
+        size_mb = len(request.video_bytes) / (1024 * 1024)
+        print(f"[GRPC] Submit request: video_id={request.video_id}, size={size_mb:.2f}MB, mime={request.video_mime}")
+
+        if not request.video_bytes:
+            print("[GRPC] Submit Error: Empty video bytes")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('Empty video bytes')
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        error = self._check_options(request.options)
+        if error:
+            print(f"[GRPC] Submit Error: {error}")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        bytes_in_total.inc(len(request.video_bytes))
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, self._submit_bytes, request)
+        except AdmissionError as e:
+            return self._reject(context, e, "Submit")
+
+    async def SubmitStream(self, request_iterator, context):
+        loop = asyncio.get_running_loop()
+        try:
+            first = await request_iterator.__anext__()
+        except StopAsyncIteration:
+            print("[GRPC] SubmitStream Error: Empty stream")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('Empty upload stream')
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        print(f"[GRPC] SubmitStream request: video_id={first.video_id}, mime={first.video_mime}")
+
+        error = self._check_declared_size(first) or self._check_options(first.options)
+        if error:
+            print(f"[GRPC] SubmitStream Error: {error}")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        try:
+            job_id = job_manager.create_job(
+                video_id=first.video_id,
+                mime=first.video_mime,
+                options=first.options,
+                enqueue=False,
+                priority=first.priority,
+                tenant=first.tenant,
+                input_bytes=first.video_size
+            )
+        except AdmissionError as e:
+            return self._reject(context, e, "SubmitStream")
+
+        if not job_id:
+            print(f"[GRPC] SubmitStream Rejected: Queue full")
+            return ytsprites_pb2.SubmitReply(accepted=False, job_id="", queue_position=-1)
+
+        print(f"[GRPC] Job Created: {job_id}")
+
+        workspace = await loop.run_in_executor(executor, files_ut.create_job_workspace, job_id)
+        video_path = f"{workspace}/input_video"
+        max_bytes = cfg.MAX_VIDEO_SIZE_MB * 1024 * 1024
+        hasher = hashlib.sha256()
+        size = 0
+        error = None
+        start = time.perf_counter()
+        try:
+            f = await loop.run_in_executor(executor, open, video_path, 'wb')
+            try:
+                data = first.data
+                while True:
+                    if data:
+                        size += len(data)
+                        if size > max_bytes:
+                            error = f"Upload exceeds limit of {max_bytes} bytes"
+                            break
+                        await loop.run_in_executor(executor, _write_chunk, f, hasher, data)
+                    try:
+                        data = (await request_iterator.__anext__()).data
+                    except StopAsyncIteration:
+                        break
+            finally:
+                await loop.run_in_executor(executor, f.close)
+        except BaseException as e:
+            # Client gone or stream broken
+            print(f"[GRPC] SubmitStream Upload aborted: {e!r}")
+            job_manager.discard_job(job_id)
+            await loop.run_in_executor(executor, files_ut.cleanup_workspace, workspace)
+            raise
+        observe_stage("upload", time.perf_counter() - start)
+        bytes_in_total.inc(size)
+
+        if error or size == 0:
+            error = error or 'Empty video bytes'
+            print(f"[GRPC] SubmitStream Error: {error}")
+            job_manager.discard_job(job_id)
+            await loop.run_in_executor(executor, files_ut.cleanup_workspace, workspace)
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        return await loop.run_in_executor(
+            executor, self._finish_upload, job_id, first, workspace, video_path, size, hasher.hexdigest()
+        )
+
+    async def WatchStatus(self, request, context):
+        job = job_manager.get_job(request.job_id)
+        if not job:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details('Job not found')
+            return
+
+        # No thread per watcher: status changes set an asyncio event from whatever thread made them
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def on_update(_job):
+            loop.call_soon_threadsafe(changed.set)
+
+        job.subscribe(on_update)
+        try:
+            while True:
+                changed.clear()
+                _, state, percent, message = job.snapshot()
+                yield ytsprites_pb2.StatusUpdate(
+                    job_id=job.job_id,
+                    state=state,
+                    percent=percent,
+                    message=message
+                )
+
+                if state in [JobState.JOB_STATE_DONE, JobState.JOB_STATE_FAILED, JobState.JOB_STATE_CANCELED]:
+                    return
+
+                try:
+                    await asyncio.wait_for(changed.wait(), cfg.WATCH_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            job.unsubscribe(on_update)
+
+    async def GetResult(self, request, context):
+        job = self._result_job(request, context)
+        if not job:
+            return ytsprites_pb2.ResultReply()
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, self._result_reply, job)
+        except OSError as e:
+            self._result_lost(job, context, e)
+            return ytsprites_pb2.ResultReply()
+        finally:
+            observe_stage("result", time.perf_counter() - start)
+
+    async def GetResultStream(self, request, context):
+        job = self._result_job(request, context, "GetResultStream")
+        if not job:
+            return
+        loop = asyncio.get_running_loop()
+        res = job.result
+        start = time.perf_counter()
+        yield ytsprites_pb2.ResultChunk(job_id=job.job_id, video_id=res.video_id, vtt=res.vtt_content)
+        for variant, vtt, sprites in self._stream_outputs(res):
+            if variant:
+                yield ytsprites_pb2.ResultChunk(job_id=job.job_id, variant=variant, vtt=vtt)
+            for name, path in sprites:
+                try:
+                    sprite = await loop.run_in_executor(executor, self._read_sprite, name, path)
+                except OSError as e:
+                    self._result_lost(job, context, e)
+                    return
+                bytes_out_total.inc(len(sprite.data))
+                yield ytsprites_pb2.ResultChunk(job_id=job.job_id, variant=variant, sprite=sprite)
+        observe_stage("result", time.perf_counter() - start)
+        print(f"[GRPC] Streamed result: {len(res.all_sprites())} sprites")
+
+    async def Cancel(self, request, context):
+        # Canceling a queued job removes its input from disk
+        print(f"[GRPC] Cancel request: job_id={request.job_id}")
+        loop = asyncio.get_running_loop()
+        success = await loop.run_in_executor(executor, job_manager.cancel_job, request.job_id)
+        return ytsprites_pb2.CancelReply(job_id=request.job_id, canceled=success)
+
+    async def Health(self, request, context):
+        return SpritesService.Health(self, request, context)
@@ -0,0 +1,62 @@
+import grpc
+from grpc_reflection.v1alpha import reflection
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+from grpc_health.v1.health import aio as health_aio
+
+from config.service_cfg import cfg
+from proto import ytsprites_pb2_grpc, info_pb2_grpc
+from .aio_handlers_srv import AioSpritesService
+from .info_srv import AsyncInfoService
+from .aio_work_srv import AioWorkService, AioWorkAuthInterceptor
+from .work_srv import check_work_token
+from .server_srv import server_options, service_names, max_msg_size, work_address
+from . import aio_worker_srv
+
+async def serve_work():
+    """server_srv.serve_work for grpc.aio."""
+    check_work_token()
+    server = grpc.aio.server(options=server_options(), interceptors=[AioWorkAuthInterceptor()])
+    ytsprites_pb2_grpc.add_WorkServicer_to_server(AioWorkService(), server)
+    server.add_insecure_port(work_address())
+    await server.start()
+    print(f"[Server] Work service (aio) on {work_address()}")
+    return server
+
+async def serve():
+    """grpc.aio server with asyncio workers on the same loop."""
+    server = grpc.aio.server(options=server_options())
+
+    # Base service
+    ytsprites_pb2_grpc.add_SpritesServicer_to_server(AioSpritesService(), server)
+    # Job leases for remote render workers go on their own port
+    work_server = await serve_work() if cfg.ROLE == 'frontend' else None
+
+    # Health service
+    health_servicer = health_aio.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+    await health_servicer.set("", health_pb2.HealthCheckResponse.SERVING)
+
+    # Info service
+    info_pb2_grpc.add_InfoServicer_to_server(AsyncInfoService(), server)
+
+    # Reflection
+    names = service_names()
+    reflection.enable_server_reflection(names, server)
+
+    address = f'[::]:{cfg.GRPC_PORT}'
+    server.add_insecure_port(address)
+
+    print(f"[Server] Starting (aio) on {address}")
+    print(f"[Server] Max message size set to: {max_msg_size() / 1024 / 1024:.2f} MB")
+    print(f"[Server] Reflection enabled. Services: {names}")
+
+    await server.start()
+    # ROLE=frontend only leases jobs to remote workers
+    workers = aio_worker_srv.start_workers() if cfg.ROLE == 'all' else []
+    try:
+        await server.wait_for_termination()
+    finally:
+        for w in workers:
+            w.cancel()
+        if work_server:
+            await work_server.stop(None)
@@ -0,0 +1,66 @@
+import asyncio
+import grpc
+from runtime.queue_rt import job_manager
+from config.service_cfg import cfg
+from .work_srv import WorkService, work_token_ok, handler_like
+from .aio_worker_srv import executor
+
+async def _deny(request, context):
+    await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Bad or missing work token")
+
+class AioWorkAuthInterceptor(grpc.aio.ServerInterceptor):
+    """WorkAuthInterceptor for grpc.aio."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or work_token_ok(handler_call_details.invocation_metadata):
+            return handler
+        print(f"[WORK] Rejected {handler_call_details.method}: bad or missing token")
+        return handler_like(handler, _deny)
+
+class AioWorkService(WorkService):
+    """WorkService for grpc.aio: Lease long-polls on enqueue notifications, file I/O goes to executor."""
+
+    def __init__(self):
+        self._wakeup = None
+
+    async def Lease(self, request, context):
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            job_manager.add_enqueue_listener(lambda job_id: loop.call_soon_threadsafe(self._wakeup.set))
+        wait = min(request.wait_sec or cfg.LEASE_WAIT_SEC, cfg.LEASE_WAIT_SEC)
+        deadline = loop.time() + wait
+        while True:
+            # Clear first, then try: an enqueue in between still leaves the event set
+            self._wakeup.clear()
+            reply = self._lease_reply(request.worker_id, 0)
+            remaining = deadline - loop.time()
+            if reply.ok or remaining <= 0:
+                return reply
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def Heartbeat(self, request, context):
+        return WorkService.Heartbeat(self, request, context)
+
+    async def FetchInput(self, request, context):
+        loop = asyncio.get_running_loop()
+        chunks = WorkService.FetchInput(self, request, context)
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def Complete(self, request_iterator, context):
+        # Sync handler reads a plain iterator; sprites of one job are collected first
+        chunks = [chunk async for chunk in request_iterator]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, WorkService.Complete, self, iter(chunks), context)
+
+    async def Fail(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, WorkService.Fail, self, request, context)
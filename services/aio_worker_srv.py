@@ -0,0 +1,82 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config.service_cfg import cfg
+from runtime.queue_rt import job_manager
+from runtime.cache_rt import probe_cache
+from proto.ytsprites_pb2 import JobState
+from utils import ffmpeg_ut
+from runtime.procpool_rt import get_process_backend
+from .worker_srv import (
+    check_job_input, make_progress_cb, accept_probe, render_job, complete_job, fail_job, release_workspace,
+    job_started, job_ended,
+)
+
+# Pillow packing, sprite reads and other blocking bits of the asyncio runtime
+executor = ThreadPoolExecutor(max_workers=cfg.AIO_EXECUTOR_THREADS, thread_name_prefix="ytsprites-aio")
+
+async def process_job(job, tag):
+    loop = asyncio.get_running_loop()
+    workspace = None
+    job_started(job)
+    try:
+        job.update_status(JobState.JOB_STATE_PROCESSING, 0, "Starting...")
+
+        workspace = job.temp_dir_path
+        video_path = job.video_file_path
+        check_job_input(job)
+
+        # ffmpeg of the job is killed after JOB_TIMEOUT_SEC, job fails with TimeoutError
+        with job.procs.deadline(cfg.JOB_TIMEOUT_SEC):
+            probe = probe_cache.get(job.content_hash)
+            if probe is None:
+                probe = await ffmpeg_ut.probe_media_async(video_path, job.procs)
+            else:
+                print(f"[{tag}] Probe cache hit for {job.job_id}")
+            accept_probe(job, probe)
+
+            if cfg.EXECUTION_BACKEND == 'process':
+                # Executor thread only waits on the pool process
+                sprite_files_abs, vtt_text, variants = await loop.run_in_executor(executor, render_job, job, probe)
+            else:
+                sprite_files_abs, vtt_text, variants = await ffmpeg_ut.process_video_async(
+                    video_path, workspace, job.options, make_progress_cb(job), probe, executor, procs=job.procs
+                )
+
+        await loop.run_in_executor(executor, functools.partial(
+            complete_job, job, sprite_files_abs, vtt_text, tag, variants
+        ))
+
+    except InterruptedError:
+        print(f"[{tag}] Job {job.job_id} CANCELED")
+    except Exception as e:
+        fail_job(job, e, tag)
+    finally:
+        if workspace:
+            await loop.run_in_executor(executor, release_workspace, job, workspace)
+        job_ended(job)
+
+async def worker_loop(worker_id, wakeup: asyncio.Event):
+    tag = f"AioWorker-{worker_id}"
+    print(f"[{tag}] Started")
+    while True:
+        job = job_manager.pop_next_job()
+        if not job:
+            # Clear first, then re-check: an enqueue in between still leaves the event set
+            wakeup.clear()
+            job = job_manager.pop_next_job()
+            if not job:
+                await wakeup.wait()
+                continue
+
+        print(f"[{tag}] Picked job {job.job_id}")
+        await process_job(job, tag)
+
+def start_workers():
+    """Starts MAX_WORKERS worker coroutines on the running loop, woken by JobManager on enqueue."""
+    loop = asyncio.get_running_loop()
+    if cfg.EXECUTION_BACKEND == 'process':
+        get_process_backend()
+    wakeup = asyncio.Event()
+    job_manager.add_enqueue_listener(lambda job_id: loop.call_soon_threadsafe(wakeup.set))
+    return [loop.create_task(worker_loop(i, wakeup)) for i in range(cfg.MAX_WORKERS)]
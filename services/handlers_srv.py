@@ -1,12 +1,63 @@
+import os
 import time
+import uuid
+import hashlib
 import grpc
 from proto import ytsprites_pb2
 from proto import ytsprites_pb2_grpc
 from runtime.queue_rt import job_manager
-from runtime.models_rt import JobState
-from utils import files_ut
+from runtime.admission_rt import AdmissionError
+from runtime.metrics_rt import observe_stage, bytes_in_total, bytes_out_total
+from runtime.cache_rt import probe_cache, result_cache, result_key
+from runtime.models_rt import JobState, JobResult, VariantResult
+from utils import files_ut, ffmpeg_ut
+from config.service_cfg import cfg
 
 class SpritesService(ytsprites_pb2_grpc.SpritesServicer):
+
+    def _submit_cached(self, video_id, mime, options, content_hash):
+        """If the same video with the same options was rendered before, returns reply for an already DONE job."""
+        if result_cache is None:
+            return None
+        hit = result_cache.get(result_key(content_hash, options))
+        if not hit:
+            return None
+        sprites, vtt, variants = hit
+        # Job gets its own links to cached sheets, so cache eviction doesn't pull them from under it
+        workspace = files_ut.create_job_workspace(f"cached_{uuid.uuid4().hex}")
+        sprites_dir = os.path.join(workspace, "sprites")
+        size = 0
+
+        def link_sprites(cached):
+            nonlocal size
+            linked = []
+            for name, path in cached:
+                dst = os.path.join(sprites_dir, name)
+                files_ut.link_or_copy(path, dst)
+                linked.append((name, dst))
+                size += os.path.getsize(dst)
+            return linked
+
+        try:
+            os.makedirs(sprites_dir, exist_ok=True)
+            job_sprites = link_sprites(sprites)
+            job_variants = [
+                VariantResult(name=name, sprites=link_sprites(v_sprites), vtt_content=v_vtt)
+                for name, v_sprites, v_vtt in variants
+            ]
+        except OSError as e:
+            # Evicted meanwhile
+            print(f"[GRPC] Result cache read failed: {e}")
+            files_ut.cleanup_workspace(workspace)
+            return None
+
+        job_id = job_manager.create_done_job(
+            video_id, mime, options,
+            JobResult(sprites=job_sprites, vtt_content=vtt, video_id=video_id, size_bytes=size, variants=job_variants),
+            temp_dir_path=workspace, content_hash=content_hash
+        )
+        print(f"[GRPC] Result cache hit: job {job_id} DONE, {len(job_sprites)} sprites")
+        return ytsprites_pb2.SubmitReply(job_id=job_id, accepted=True, queue_position=0)
     
     def Submit(self, request, context):
         size_mb = len(request.video_bytes) / (1024 * 1024)
@@ -18,10 +69,43 @@ class SpritesService(ytsprites_pb2_grpc.SpritesServicer):
              context.set_details('Empty video bytes')
              return ytsprites_pb2.SubmitReply(accepted=False)
 
+        error = self._check_options(request.options)
+        if error:
+            print(f"[GRPC] Submit Error: {error}")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        bytes_in_total.inc(len(request.video_bytes))
+        try:
+            return self._submit_bytes(request)
+        except AdmissionError as e:
+            return self._reject(context, e, "Submit")
+
+    def _reject(self, context, e, rpc):
+        """Submit over the load limits: RESOURCE_EXHAUSTED with a retry hint."""
+        print(f"[GRPC] {rpc} Rejected: {e.reason}, retry after {e.retry_after_sec}s")
+        context.set_trailing_metadata((('retry-after', str(e.retry_after_sec)),))
+        context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+        context.set_details(f"{e.reason}, retry after {e.retry_after_sec}s")
+        return ytsprites_pb2.SubmitReply(accepted=False, job_id="", queue_position=-1)
+
+    def _submit_bytes(self, request):
+        """Unary Submit after validation: cache lookup, job creation, saving. No context calls.
+        Raises AdmissionError before the video is written."""
+        content_hash = hashlib.sha256(request.video_bytes).hexdigest()
+        cached = self._submit_cached(request.video_id, request.video_mime, request.options, content_hash)
+        if cached:
+            return cached
+
         job_id = job_manager.create_job(
             video_id=request.video_id,
             mime=request.video_mime,
-            options=request.options
+            options=request.options,
+            enqueue=False,
+            priority=request.priority,
+            tenant=request.tenant,
+            input_bytes=len(request.video_bytes)
         )
         
         if not job_id:
@@ -30,15 +114,150 @@ class SpritesService(ytsprites_pb2_grpc.SpritesServicer):
         
         print(f"[GRPC] Job Created: {job_id}")
         
-        # Save video
+        # Save video, then hand the job to workers
         job = job_manager.get_job(job_id)
         if job:
             workspace = files_ut.create_job_workspace(job_id)
             video_path = f"{workspace}/input_video"
+            start = time.perf_counter()
             files_ut.save_bytes_to_file(video_path, request.video_bytes)
+            observe_stage("upload", time.perf_counter() - start)
             job.temp_dir_path = workspace
             job.video_file_path = video_path
+            job.content_hash = content_hash
             print(f"[GRPC] Video saved to: {video_path}")
+            self._probe_for_queue(job)
+            job_manager.update_load(job_id, len(request.video_bytes))
+        job_manager.enqueue_job(job_id)
+
+        pos = job_manager.get_queue_position(job_id)
+        return ytsprites_pb2.SubmitReply(job_id=job_id, accepted=True, queue_position=pos)
+
+    def SubmitStream(self, request_iterator, context):
+        first = next(request_iterator, None)
+        if first is None:
+            print("[GRPC] SubmitStream Error: Empty stream")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('Empty upload stream')
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        print(f"[GRPC] SubmitStream request: video_id={first.video_id}, mime={first.video_mime}")
+
+        error = self._check_declared_size(first) or self._check_options(first.options)
+        if error:
+            print(f"[GRPC] SubmitStream Error: {error}")
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        # Admission happens here, before the rest of the upload is read
+        try:
+            job_id = job_manager.create_job(
+                video_id=first.video_id,
+                mime=first.video_mime,
+                options=first.options,
+                enqueue=False,
+                priority=first.priority,
+                tenant=first.tenant,
+                input_bytes=first.video_size
+            )
+        except AdmissionError as e:
+            return self._reject(context, e, "SubmitStream")
+
+        if not job_id:
+            print(f"[GRPC] SubmitStream Rejected: Queue full")
+            return ytsprites_pb2.SubmitReply(accepted=False, job_id="", queue_position=-1)
+
+        print(f"[GRPC] Job Created: {job_id}")
+
+        def chunks():
+            yield first.data
+            for chunk in request_iterator:
+                yield chunk.data
+
+        # Write chunks directly into workspace, only one chunk is held in memory
+        workspace = files_ut.create_job_workspace(job_id)
+        video_path = f"{workspace}/input_video"
+        max_bytes = cfg.MAX_VIDEO_SIZE_MB * 1024 * 1024
+        hasher = hashlib.sha256()
+        start = time.perf_counter()
+        try:
+            size = files_ut.save_chunks_to_file(video_path, chunks(), max_bytes, hasher)
+        except ValueError as e:
+            print(f"[GRPC] SubmitStream Error: {e}")
+            job_manager.discard_job(job_id)
+            files_ut.cleanup_workspace(workspace)
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return ytsprites_pb2.SubmitReply(accepted=False)
+        except Exception as e:
+            # Client gone or stream broken
+            print(f"[GRPC] SubmitStream Upload aborted: {e}")
+            job_manager.discard_job(job_id)
+            files_ut.cleanup_workspace(workspace)
+            raise
+        observe_stage("upload", time.perf_counter() - start)
+        bytes_in_total.inc(size)
+
+        if size == 0:
+            print("[GRPC] SubmitStream Error: Empty video bytes")
+            job_manager.discard_job(job_id)
+            files_ut.cleanup_workspace(workspace)
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('Empty video bytes')
+            return ytsprites_pb2.SubmitReply(accepted=False)
+
+        return self._finish_upload(job_id, first, workspace, video_path, size, hasher.hexdigest())
+
+    @staticmethod
+    def _check_declared_size(first):
+        """Error text if the upload announced in the first chunk is over MAX_VIDEO_SIZE_MB."""
+        max_bytes = cfg.MAX_VIDEO_SIZE_MB * 1024 * 1024
+        if first.video_size > max_bytes:
+            return f"Upload exceeds limit of {max_bytes} bytes"
+        return None
+
+    @staticmethod
+    def _check_options(options):
+        """Error text if SpriteOptions ask for something the service can't render."""
+        return ffmpeg_ut.options_error(options)
+
+    def _probe_for_queue(self, job):
+        """Policies ordering by expected work need duration before the job is queued.
+        The probe is cached by content hash, so the worker doesn't run it again."""
+        if not job_manager.scheduler.needs_cost or job.probe is not None:
+            return
+        probe = probe_cache.get(job.content_hash)
+        if probe is None:
+            try:
+                probe = ffmpeg_ut.probe_media(job.video_file_path)
+            except Exception as e:
+                # Worker will report it, job is queued with default cost
+                print(f"[GRPC] Probe before queue failed for {job.job_id}: {e}")
+                return
+            probe_cache.put(job.content_hash, probe)
+        job.probe = probe
+
+    def _finish_upload(self, job_id, first, workspace, video_path, size, content_hash):
+        """Streamed upload is on disk: serve from cache or queue the job. No context calls."""
+        cached = self._submit_cached(first.video_id, first.video_mime, first.options, content_hash)
+        if cached:
+            job_manager.discard_job(job_id)
+            files_ut.cleanup_workspace(workspace)
+            return cached
+
+        job = job_manager.get_job(job_id)
+        if job:
+            job.temp_dir_path = workspace
+            job.video_file_path = video_path
+            job.content_hash = content_hash
+            self._probe_for_queue(job)
+            job_manager.update_load(job_id, size)
+        print(f"[GRPC] Video saved to: {video_path}, size={size / (1024 * 1024):.2f}MB")
+        if not job_manager.enqueue_job(job_id):
+            # Canceled while uploading
+            files_ut.cleanup_workspace(workspace)
+            return ytsprites_pb2.SubmitReply(job_id=job_id, accepted=False, queue_position=-1)
 
         pos = job_manager.get_queue_position(job_id)
         return ytsprites_pb2.SubmitReply(job_id=job_id, accepted=True, queue_position=pos)
@@ -46,56 +265,122 @@ class SpritesService(ytsprites_pb2_grpc.SpritesServicer):
     def WatchStatus(self, request, context):
         # print(f"[GRPC] WatchStatus connected: job_id={request.job_id}")
         
-        job_id = request.job_id
-        while True:
-            job = job_manager.get_job(job_id)
-            if not job:
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details('Job not found')
-                return
+        job = job_manager.get_job(request.job_id)
+        if not job:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details('Job not found')
+            return
 
+        # Pushes every status change as soon as it happens; resends current state as heartbeat
+        context.add_callback(job.wake)
+        version = -1
+        while context.is_active():
+            version, state, percent, message = job.snapshot()
             yield ytsprites_pb2.StatusUpdate(
                 job_id=job.job_id,
-                state=job.state,
-                percent=job.percent,
-                message=job.message
+                state=state,
+                percent=percent,
+                message=message
             )
             
-            if job.state in [JobState.JOB_STATE_DONE, JobState.JOB_STATE_FAILED, JobState.JOB_STATE_CANCELED]:
-                # print(f"[GRPC] WatchStatus finished: job_id={request.job_id}, state={job.state}")
+            if state in [JobState.JOB_STATE_DONE, JobState.JOB_STATE_FAILED, JobState.JOB_STATE_CANCELED]:
+                # print(f"[GRPC] WatchStatus finished: job_id={request.job_id}, state={state}")
                 return
             
-            time.sleep(1)
+            job.wait_for_update(version, cfg.WATCH_HEARTBEAT_SEC)
 
-    def GetResult(self, request, context):
-        print(f"[GRPC] GetResult request: job_id={request.job_id}")
+    def _result_job(self, request, context, rpc="GetResult"):
+        """Job whose result can be sent, or None with the error set on context."""
+        print(f"[GRPC] {rpc} request: job_id={request.job_id}")
         job = job_manager.get_job(request.job_id)
         if not job:
-            print("[GRPC] GetResult Error: Job not found")
+            print(f"[GRPC] {rpc} Error: Job not found")
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details('Job not found')
-            return ytsprites_pb2.ResultReply()
+            return None
             
-        if job.state != JobState.JOB_STATE_DONE:
-            print(f"[GRPC] GetResult Error: Job not ready (state={job.state})")
+        if job.state != JobState.JOB_STATE_DONE or not job.result:
+            print(f"[GRPC] {rpc} Error: Job not ready (state={job.state})")
             context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
             context.set_details('Job not ready')
-            return ytsprites_pb2.ResultReply()
+            return None
+        job_manager.mark_fetched(job.job_id)
+        return job
 
+    @staticmethod
+    def _read_sprite(name, path):
+        with open(path, 'rb') as f:
+            return ytsprites_pb2.SpriteBin(name=name, data=f.read())
+
+    def _result_reply(self, job):
+        """Whole result in one message, sprites read from disk."""
         res = job.result
-        sprites_proto = []
-        if res:
-            for name, data in res.sprites:
-                sprites_proto.append(ytsprites_pb2.SpriteBin(name=name, data=data))
-            
-            print(f"[GRPC] Returning result: {len(sprites_proto)} sprites")
-            return ytsprites_pb2.ResultReply(
-                job_id=job.job_id,
-                sprites=sprites_proto,
-                vtt=res.vtt_content,
-                video_id=res.video_id
+        sprites_proto = [self._read_sprite(name, path) for name, path in res.sprites]
+        variants_proto = [
+            ytsprites_pb2.VariantResult(
+                name=v.name,
+                sprites=[self._read_sprite(name, path) for name, path in v.sprites],
+                vtt=v.vtt_content,
             )
-        return ytsprites_pb2.ResultReply()
+            for v in res.variants
+        ]
+        bytes_out_total.inc(sum(len(s.data) for s in sprites_proto))
+        bytes_out_total.inc(sum(len(s.data) for v in variants_proto for s in v.sprites))
+        print(f"[GRPC] Returning result: {len(sprites_proto)} sprites, {len(variants_proto)} variants")
+        return ytsprites_pb2.ResultReply(
+            job_id=job.job_id,
+            sprites=sprites_proto,
+            vtt=res.vtt_content,
+            video_id=res.video_id,
+            variants=variants_proto,
+        )
+
+    @staticmethod
+    def _stream_outputs(res):
+        """(variant, vtt, sprites) in ResultChunk order: the main result (its VTT goes in the first chunk), then variants."""
+        return [("", res.vtt_content, res.sprites), *((v.name, v.vtt_content, v.sprites) for v in res.variants)]
+
+    def _result_lost(self, job, context, e):
+        print(f"[GRPC] Result files of {job.job_id} are gone: {e}")
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details('Result expired')
+
+    def GetResult(self, request, context):
+        job = self._result_job(request, context)
+        if not job:
+            return ytsprites_pb2.ResultReply()
+        start = time.perf_counter()
+        try:
+            return self._result_reply(job)
+        except OSError as e:
+            self._result_lost(job, context, e)
+            return ytsprites_pb2.ResultReply()
+        finally:
+            # Sending the reply isn't included, it happens after return
+            observe_stage("result", time.perf_counter() - start)
+
+    def GetResultStream(self, request, context):
+        job = self._result_job(request, context, "GetResultStream")
+        if not job:
+            return
+        res = job.result
+        start = time.perf_counter()
+        yield ytsprites_pb2.ResultChunk(job_id=job.job_id, video_id=res.video_id, vtt=res.vtt_content)
+        for variant, vtt, sprites in self._stream_outputs(res):
+            if variant:
+                # Opens the variant, its sprites follow
+                yield ytsprites_pb2.ResultChunk(job_id=job.job_id, variant=variant, vtt=vtt)
+            # One sheet in memory at a time
+            for name, path in sprites:
+                try:
+                    sprite = self._read_sprite(name, path)
+                except OSError as e:
+                    self._result_lost(job, context, e)
+                    return
+                bytes_out_total.inc(len(sprite.data))
+                yield ytsprites_pb2.ResultChunk(job_id=job.job_id, variant=variant, sprite=sprite)
+        observe_stage("result", time.perf_counter() - start)
+        print(f"[GRPC] Streamed result: {len(res.all_sprites())} sprites")
 
     def Cancel(self, request, context):
         print(f"[GRPC] Cancel request: job_id={request.job_id}")
@@ -2,6 +2,9 @@ import time
 import socket
 from proto import info_pb2, info_pb2_grpc
 from config.service_cfg import cfg
+from runtime.cache_rt import result_cache
+from runtime.queue_rt import job_manager
+from runtime.metrics_rt import registry
 
 class InfoService(info_pb2_grpc.InfoServicer):
     def __init__(self):
@@ -11,6 +14,11 @@ class InfoService(info_pb2_grpc.InfoServicer):
 
     def All(self, request, context):
         uptime = time.time() - self.start_time
+        metrics = {"uptime_sec": uptime}
+        metrics.update(job_manager.stats())
+        if result_cache is not None:
+            metrics.update(result_cache.stats())
+        metrics.update(registry.snapshot())
         response = info_pb2.InfoResponse(
             app_name="YurTube Sprites Generation Service",
             instance_id=self.instance_id,
@@ -18,6 +26,10 @@ class InfoService(info_pb2_grpc.InfoServicer):
             version="1.0.0",
             uptime=int(uptime),
             labels={"env": "production"},
-            metrics={"uptime_sec": uptime},
+            metrics=metrics,
         )
-        return response
\ No newline at end of file
+        return response
+
+class AsyncInfoService(InfoService):
+    async def All(self, request, context):
+        return InfoService.All(self, request, context)
@@ -0,0 +1,150 @@
+import os
+import time
+import socket
+import threading
+import grpc
+from proto import ytsprites_pb2
+from proto import ytsprites_pb2_grpc
+from runtime.models_rt import Job
+from proto.ytsprites_pb2 import JobState
+from config.service_cfg import cfg
+from utils import files_ut
+from runtime.procpool_rt import get_process_backend
+from .worker_srv import check_job_input, probe_job, render_job, job_started, job_ended
+from .server_srv import server_options
+from .work_srv import work_metadata, check_work_token
+
+def worker_name() -> str:
+    return cfg.WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+
+class Heartbeat:
+    """Renews the lease and reports progress of the local job copy every LEASE_HEARTBEAT_SEC.
+    Lost lease or cancel on the frontend cancels the local job and terminates its ffmpeg."""
+
+    def __init__(self, stub, job: Job, lease_id: str, interval: float, tag: str):
+        self._stub = stub
+        self._job = job
+        self._lease_id = lease_id
+        self._interval = interval
+        self._tag = tag
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.wait(self._interval):
+            _, state, percent, message = self._job.snapshot()
+            if state == JobState.JOB_STATE_CANCELED:
+                return
+            try:
+                reply = self._stub.Heartbeat(ytsprites_pb2.HeartbeatRequest(
+                    job_id=self._job.job_id, lease_id=self._lease_id, percent=percent, message=message
+                ), timeout=self._interval, metadata=work_metadata())
+            except grpc.RpcError as e:
+                # Frontend unreachable for a moment, lease may still be alive
+                print(f"[{self._tag}] Heartbeat failed: {e.code()}")
+                continue
+            if not reply.ok or reply.canceled:
+                reason = "Lease lost" if not reply.ok else "Canceled by user"
+                self._job.update_status(JobState.JOB_STATE_CANCELED, percent, reason)
+                self._job.procs.stop(InterruptedError(reason))
+                return
+
+def run_leased(stub, lease, tag):
+    """Download input, render with the local pipeline, upload sprites to the frontend."""
+    workspace = files_ut.create_job_workspace(f"remote_{lease.job_id}")
+    job = Job(
+        job_id=lease.job_id, video_id=lease.video_id, video_mime=lease.video_mime, options=lease.options,
+        temp_dir_path=workspace, video_file_path=os.path.join(workspace, "input_video"),
+        content_hash=lease.content_hash or None,
+    )
+    job.update_status(JobState.JOB_STATE_PROCESSING, 0, "Downloading...")
+    job_started(job)
+    try:
+        interval = min(cfg.LEASE_HEARTBEAT_SEC, lease.lease_ttl_sec / 3)
+        with Heartbeat(stub, job, lease.lease_id, interval, tag):
+            chunks = stub.FetchInput(
+                ytsprites_pb2.FetchInputRequest(job_id=lease.job_id, lease_id=lease.lease_id), metadata=work_metadata()
+            )
+            size = files_ut.save_chunks_to_file(job.video_file_path, (c.data for c in chunks))
+            print(f"[{tag}] Input of {lease.job_id} fetched, {size / (1024 * 1024):.2f}MB")
+
+            check_job_input(job)
+            with job.procs.deadline(cfg.JOB_TIMEOUT_SEC):
+                probe = probe_job(job, tag)
+                sprite_files_abs, vtt_text, variants = render_job(job, probe)
+
+            def upload():
+                # Main result, then each variant: a chunk with its name and VTT, followed by its sprites
+                for name, paths, vtt in [("", sprite_files_abs, vtt_text), *variants]:
+                    yield ytsprites_pb2.CompleteChunk(job_id=lease.job_id, lease_id=lease.lease_id, variant=name, vtt=vtt)
+                    # One sheet in memory at a time
+                    for path in paths:
+                        with open(path, 'rb') as f:
+                            sprite = ytsprites_pb2.SpriteBin(name=os.path.basename(path), data=f.read())
+                        yield ytsprites_pb2.CompleteChunk(
+                            job_id=lease.job_id, lease_id=lease.lease_id, variant=name, sprite=sprite
+                        )
+
+            reply = stub.Complete(upload(), metadata=work_metadata())
+            print(f"[{tag}] Job {lease.job_id} {'DONE' if reply.ok else 'result rejected (lease lost)'}")
+            # Local copy ends in the state the frontend knows, for job_ended()
+            if reply.ok:
+                job.update_status(JobState.JOB_STATE_DONE, 100, "Done")
+            else:
+                job.update_status(JobState.JOB_STATE_CANCELED, 0, "Lease lost")
+
+    except InterruptedError:
+        print(f"[{tag}] Job {lease.job_id} stopped: {job.message}")
+    except Exception as e:
+        print(f"[{tag}] Job {lease.job_id} FAILED: {e}")
+        job.update_status(JobState.JOB_STATE_FAILED, 0, str(e))
+        try:
+            stub.Fail(
+                ytsprites_pb2.FailRequest(job_id=lease.job_id, lease_id=lease.lease_id, error=str(e)),
+                metadata=work_metadata()
+            )
+        except grpc.RpcError as rpc_e:
+            # Lease will expire and the job goes to another worker
+            print(f"[{tag}] Fail report failed: {rpc_e.code()}")
+    finally:
+        files_ut.cleanup_workspace(workspace)
+        job_ended(job)
+
+def worker_loop(worker_id):
+    tag = f"RemoteWorker-{worker_id}"
+    name = f"{worker_name()}/{worker_id}"
+    channel = grpc.insecure_channel(cfg.FRONTEND_ADDR, options=server_options())
+    stub = ytsprites_pb2_grpc.WorkStub(channel)
+    print(f"[{tag}] Started, frontend {cfg.FRONTEND_ADDR}")
+    while True:
+        try:
+            lease = stub.Lease(
+                ytsprites_pb2.LeaseRequest(worker_id=name, wait_sec=cfg.LEASE_WAIT_SEC),
+                # Frontend may be (re)starting
+                timeout=cfg.LEASE_WAIT_SEC + 10, wait_for_ready=True, metadata=work_metadata()
+            )
+        except grpc.RpcError as e:
+            print(f"[{tag}] Lease failed: {e.code()}, retrying")
+            time.sleep(2)
+            continue
+        if not lease.ok:
+            continue
+        print(f"[{tag}] Leased job {lease.job_id}")
+        run_leased(stub, lease, tag)
+
+def start_workers():
+    """MAX_WORKERS threads leasing jobs from FRONTEND_ADDR (ROLE=worker)."""
+    check_work_token()
+    if cfg.EXECUTION_BACKEND == 'process':
+        get_process_backend()
+    for i in range(cfg.MAX_WORKERS):
+        t = threading.Thread(target=worker_loop, args=(i,), daemon=True)
+        t.start()
@@ -8,22 +8,55 @@ from config.service_cfg import cfg
 from proto import ytsprites_pb2_grpc, info_pb2_grpc
 from .handlers_srv import SpritesService
 from .info_srv import InfoService
+from .work_srv import WorkService, WorkAuthInterceptor, check_work_token
 
-def serve():
-    # Calc size, + add some extra.
-    max_msg_size = (cfg.MAX_VIDEO_SIZE_MB + 5) * 1024 * 1024
-    options = [
-        ('grpc.max_receive_message_length', max_msg_size),
-        ('grpc.max_send_message_length', max_msg_size),
+def max_msg_size():
+    # Calc size, + add some extra. Only unary Submit needs it, SubmitStream chunks are small.
+    return (cfg.MAX_VIDEO_SIZE_MB + 5) * 1024 * 1024
+
+def server_options():
+    return [
+        ('grpc.max_receive_message_length', max_msg_size()),
+        ('grpc.max_send_message_length', max_msg_size()),
     ]
+
+def service_names():
+    return (
+        ytsprites_pb2_grpc.SpritesServicer.__module__.split(".")[1],
+        health_pb2_grpc.HealthServicer.__module__.split(".")[1],
+        info_pb2_grpc.InfoServicer.__module__.split(".")[1],
+        reflection.SERVICE_NAME,
+    )
+
+def work_address():
+    return f'[::]:{cfg.WORK_PORT}'
+
+def serve_work():
+    """Work service for remote render workers on WORK_PORT, token-checked (ROLE=frontend only)."""
+    check_work_token()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=cfg.GRPC_THREADS),
+        options=server_options(),
+        interceptors=[WorkAuthInterceptor()],
+    )
+    ytsprites_pb2_grpc.add_WorkServicer_to_server(WorkService(), server)
+    server.add_insecure_port(work_address())
+    server.start()
+    print(f"[Server] Work service on {work_address()}")
+    return server
+
+def serve():
+    options = server_options()
     
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10), 
+        futures.ThreadPoolExecutor(max_workers=cfg.GRPC_THREADS), 
         options=options
     )
     
     # Base service
     ytsprites_pb2_grpc.add_SpritesServicer_to_server(SpritesService(), server)
+    # Job leases for remote render workers go on their own port
+    work_server = serve_work() if cfg.ROLE == 'frontend' else None
     
     # Health service
     health_servicer = health.HealthServicer()
@@ -35,20 +68,19 @@ def serve():
     info_pb2_grpc.add_InfoServicer_to_server(info_servicer, server)
     
     # Reflection
-    service_names = (
-        ytsprites_pb2_grpc.SpritesServicer.__module__.split(".")[1],
-        health_pb2_grpc.HealthServicer.__module__.split(".")[1],
-        info_pb2_grpc.InfoServicer.__module__.split(".")[1],
-        reflection.SERVICE_NAME,
-    )
-    reflection.enable_server_reflection(service_names, server)
+    names = service_names()
+    reflection.enable_server_reflection(names, server)
     
     address = f'[::]:{cfg.GRPC_PORT}'
     server.add_insecure_port(address)
     
     print(f"[Server] Starting on {address}")
-    print(f"[Server] Max message size set to: {max_msg_size / 1024 / 1024:.2f} MB")
-    print(f"[Server] Reflection enabled. Services: {service_names}")
+    print(f"[Server] Max message size set to: {max_msg_size() / 1024 / 1024:.2f} MB")
+    print(f"[Server] Reflection enabled. Services: {names}")
     
     server.start()
-    server.wait_for_termination()
\ No newline at end of file
+    try:
+        server.wait_for_termination()
+    finally:
+        if work_server:
+            work_server.stop(None)
\ No newline at end of file
@@ -0,0 +1,142 @@
+import os
+import hmac
+import grpc
+from proto import ytsprites_pb2
+from proto import ytsprites_pb2_grpc
+from runtime.queue_rt import job_manager
+from runtime.models_rt import JobState
+from config.service_cfg import cfg
+from .worker_srv import complete_job, release_workspace
+
+# Input video is sent in pieces of that size
+CHUNK_SIZE = 1024 * 1024
+# Metadata key of WORK_TOKEN
+WORK_TOKEN_KEY = "x-work-token"
+
+def check_work_token():
+    if not cfg.WORK_TOKEN:
+        raise RuntimeError("ROLE=frontend and ROLE=worker need WORK_TOKEN, the same on both")
+
+def work_metadata():
+    """Metadata remote workers send with every Work call."""
+    return ((WORK_TOKEN_KEY, cfg.WORK_TOKEN),)
+
+def work_token_ok(metadata) -> bool:
+    sent = next((v for k, v in metadata or () if k == WORK_TOKEN_KEY), "")
+    return bool(cfg.WORK_TOKEN) and hmac.compare_digest(str(sent).encode(), cfg.WORK_TOKEN.encode())
+
+def handler_like(handler, behavior):
+    """RPC method handler of the same kind as handler, running behavior instead."""
+    if handler.request_streaming and handler.response_streaming:
+        return grpc.stream_stream_rpc_method_handler(behavior)
+    if handler.request_streaming:
+        return grpc.stream_unary_rpc_method_handler(behavior)
+    if handler.response_streaming:
+        return grpc.unary_stream_rpc_method_handler(behavior)
+    return grpc.unary_unary_rpc_method_handler(behavior)
+
+def _deny(request, context):
+    context.abort(grpc.StatusCode.UNAUTHENTICATED, "Bad or missing work token")
+
+class WorkAuthInterceptor(grpc.ServerInterceptor):
+    """Rejects Work calls without the right WORK_TOKEN in metadata."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or work_token_ok(handler_call_details.invocation_metadata):
+            return handler
+        print(f"[WORK] Rejected {handler_call_details.method}: bad or missing token")
+        return handler_like(handler, _deny)
+
+class WorkService(ytsprites_pb2_grpc.WorkServicer):
+    """Leases queued jobs to remote render workers (ROLE=worker)."""
+
+    def Lease(self, request, context):
+        wait = min(request.wait_sec or cfg.LEASE_WAIT_SEC, cfg.LEASE_WAIT_SEC)
+        return self._lease_reply(request.worker_id, wait)
+
+    def _lease_reply(self, worker_id, wait):
+        leased = job_manager.lease_job(worker_id, wait)
+        if not leased:
+            return ytsprites_pb2.LeaseReply(ok=False)
+        job, lease = leased
+        print(f"[WORK] Job {job.job_id} leased to {worker_id} (attempt {job.attempts})")
+        return ytsprites_pb2.LeaseReply(
+            ok=True,
+            job_id=job.job_id,
+            lease_id=lease.lease_id,
+            video_id=job.video_id,
+            video_mime=job.video_mime,
+            options=job.options,
+            content_hash=job.content_hash or "",
+            video_size=os.path.getsize(job.video_file_path) if job.video_file_path else 0,
+            lease_ttl_sec=cfg.LEASE_TTL_SEC,
+        )
+
+    def Heartbeat(self, request, context):
+        job = job_manager.renew_lease(request.job_id, request.lease_id)
+        if not job:
+            return ytsprites_pb2.HeartbeatReply(ok=False)
+        if job.state == JobState.JOB_STATE_CANCELED:
+            job_manager.release_lease(request.job_id, request.lease_id)
+            return ytsprites_pb2.HeartbeatReply(ok=True, canceled=True)
+        job.update_status(JobState.JOB_STATE_PROCESSING, request.percent, request.message)
+        return ytsprites_pb2.HeartbeatReply(ok=True)
+
+    def FetchInput(self, request, context):
+        job = job_manager.renew_lease(request.job_id, request.lease_id)
+        if not job or not job.video_file_path:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details('Lease lost')
+            return
+        with open(job.video_file_path, 'rb') as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                yield ytsprites_pb2.DataChunk(data=data)
+
+    def Complete(self, request_iterator, context):
+        first = next(request_iterator, None)
+        if first is None:
+            return ytsprites_pb2.WorkReply(ok=False)
+        job = job_manager.renew_lease(first.job_id, first.lease_id)
+        if not job:
+            print(f"[WORK] Complete for {first.job_id} ignored: lease lost")
+            return ytsprites_pb2.WorkReply(ok=False)
+
+        # Sprites land where a local worker would have put them
+        sprites_dir = os.path.join(job.temp_dir_path, "sprites")
+        os.makedirs(sprites_dir, exist_ok=True)
+        paths = []
+        # variant name -> (sprite paths, vtt), in upload order
+        variants = {}
+        for chunk in request_iterator:
+            if chunk.variant and chunk.variant not in variants:
+                variants[chunk.variant] = ([], chunk.vtt)
+            name = os.path.basename(chunk.sprite.name)
+            if not name:
+                continue
+            path = os.path.join(sprites_dir, name)
+            with open(path, 'wb') as f:
+                f.write(chunk.sprite.data)
+            (variants[chunk.variant][0] if chunk.variant else paths).append(path)
+
+        if not job_manager.release_lease(first.job_id, first.lease_id):
+            return ytsprites_pb2.WorkReply(ok=False)
+        if job.state == JobState.JOB_STATE_CANCELED:
+            release_workspace(job, job.temp_dir_path)
+            return ytsprites_pb2.WorkReply(ok=True)
+        complete_job(job, paths, first.vtt, "WORK", [(n, p, v) for n, (p, v) in variants.items()])
+        release_workspace(job, job.temp_dir_path)
+        return ytsprites_pb2.WorkReply(ok=True)
+
+    def Fail(self, request, context):
+        job = job_manager.release_lease(request.job_id, request.lease_id)
+        if not job:
+            return ytsprites_pb2.WorkReply(ok=False)
+        if job.state != JobState.JOB_STATE_CANCELED:
+            print(f"[WORK] Job {job.job_id} FAILED on worker: {request.error}")
+            job.update_status(JobState.JOB_STATE_FAILED, 0, request.error)
+        release_workspace(job, job.temp_dir_path)
+        return ytsprites_pb2.WorkReply(ok=True)
@@ -1,80 +1,156 @@
 import threading
-import time
 import os
 from config.service_cfg import cfg
 from runtime.queue_rt import job_manager
-from runtime.models_rt import JobResult
+from runtime.cache_rt import probe_cache, result_cache, result_key
+from runtime.procpool_rt import get_process_backend
+from runtime.models_rt import JobResult, VariantResult
+from runtime.metrics_rt import workers_active, jobs_finished_total
 from proto.ytsprites_pb2 import JobState
 from utils import files_ut, ffmpeg_ut
 
+def check_job_input(job):
+    if not job.temp_dir_path or not job.video_file_path or not os.path.exists(job.video_file_path):
+        raise FileNotFoundError("Video file or workspace lost")
+
+def make_progress_cb(job):
+    def on_progress(pct, msg):
+        # Canceling check
+        if job.state == JobState.JOB_STATE_CANCELED:
+            raise InterruptedError("Job canceled")
+        # Timed out between ffmpeg runs
+        job.procs.check()
+        job.update_status(JobState.JOB_STATE_PROCESSING, pct, msg)
+    return on_progress
+
+def accept_probe(job, probe):
+    """Keeps probe for resubmissions and later stages, rejects oversized inputs."""
+    probe_cache.put(job.content_hash, probe)
+    ffmpeg_ut.check_media_limits(probe)
+    job.probe = probe
+
+def probe_job(job, tag):
+    """Probe once (or reuse by content hash), every later stage uses job.probe."""
+    probe = probe_cache.get(job.content_hash)
+    if probe is None:
+        probe = ffmpeg_ut.probe_media(job.video_file_path, job.procs)
+    else:
+        print(f"[{tag}] Probe cache hit for {job.job_id}")
+    accept_probe(job, probe)
+    return probe
+
+def render_job(job, probe):
+    """Runs process_video for the job in this thread or in the process pool (EXECUTION_BACKEND)."""
+    progress_cb = make_progress_cb(job)
+    if cfg.EXECUTION_BACKEND == 'process':
+        return get_process_backend().process_video(job, progress_cb, probe)
+    return ffmpeg_ut.process_video(
+        job.video_file_path, job.temp_dir_path, job.options, progress_cb, probe=probe, procs=job.procs
+    )
+
+def result_sprites(sprite_files_abs, tag):
+    """(sprite_name, abs_path) of existing sheets and their total size."""
+    sprites = []
+    size = 0
+    for abs_path in sprite_files_abs:
+        if os.path.exists(abs_path):
+            # Sprites filenames for client w/o paths!!
+            sprites.append((os.path.basename(abs_path), abs_path))
+            size += os.path.getsize(abs_path)
+        else:
+            print(f"[{tag}] Warning: Result file not found {abs_path}")
+    return sprites, size
+
+def complete_job(job, sprite_files_abs, vtt_text, tag, variants=()):
+    """Caches the result, records sprite paths in JobResult and marks job DONE.
+    variants: (name, sprite paths, vtt) of SpriteOptions.variants."""
+    if result_cache is not None:
+        result_cache.put(result_key(job.content_hash, job.options), sprite_files_abs, vtt_text, variants)
+
+    # Sheets stay in the workspace, GetResult reads them from there
+    sprites, size = result_sprites(sprite_files_abs, tag)
+    variant_results = []
+    for name, paths, vtt in variants:
+        v_sprites, v_size = result_sprites(paths, tag)
+        variant_results.append(VariantResult(name=name, sprites=v_sprites, vtt_content=vtt))
+        size += v_size
+
+    job.result = JobResult(
+        sprites=sprites,
+        vtt_content=vtt_text,
+        video_id=job.video_id,
+        size_bytes=size,
+        variants=variant_results,
+    )
+
+    job.update_status(JobState.JOB_STATE_DONE, 100, "Done")
+    print(f"[{tag}] Job {job.job_id} DONE. Generated {len(sprites)} sprites"
+          + (f", {len(variant_results)} variants." if variant_results else "."))
+
+def release_workspace(job, workspace):
+    """Done jobs keep their sprites on disk, everything else is removed."""
+    if job.state == JobState.JOB_STATE_DONE and job.result:
+        files_ut.cleanup_job_inputs(workspace)
+    else:
+        files_ut.cleanup_workspace(workspace)
+
+def fail_job(job, e, tag):
+    print(f"[{tag}] Job {job.job_id} FAILED: {e}")
+    import traceback
+    traceback.print_exc()
+    job.update_status(JobState.JOB_STATE_FAILED, 0, str(e))
+
+def job_started(job):
+    workers_active.inc()
+
+def job_ended(job):
+    """Counts the job by the state it ended in."""
+    workers_active.dec()
+    jobs_finished_total.inc(state=JobState.Name(job.state).replace("JOB_STATE_", "").lower())
+
 def worker_loop(worker_id):
-    print(f"[Worker-{worker_id}] Started")
+    tag = f"Worker-{worker_id}"
+    print(f"[{tag}] Started")
     while True:
-        job = job_manager.pop_next_job()
+        job = job_manager.take()
         if not job:
-            time.sleep(1)
             continue
-            
-        print(f"[Worker-{worker_id}] Picked job {job.job_id}")
-        
+
+        print(f"[{tag}] Picked job {job.job_id}")
+
         workspace = None
+        job_started(job)
         try:
             job.update_status(JobState.JOB_STATE_PROCESSING, 0, "Starting...")
-            
+
             # Use created workspace
             workspace = job.temp_dir_path
-            video_path = job.video_file_path
-            
-            if not workspace or not video_path or not os.path.exists(video_path):
-                 raise FileNotFoundError("Video file or workspace lost")
-
-            def on_progress(pct, msg):
-                # Canceling check
-                if job.state == JobState.JOB_STATE_CANCELED:
-                    raise InterruptedError("Job canceled")
-                job.update_status(JobState.JOB_STATE_PROCESSING, pct, msg)
-
-            # Run processing
-            # Returns list of abs paths and vtt text
-            sprite_files_abs, vtt_text = ffmpeg_ut.process_video(
-                video_path, workspace, job.options, on_progress
-            )
-            
-            # Gather results
-            sprites_data = []
-            for abs_path in sprite_files_abs:
-                if os.path.exists(abs_path):
-                    # Sprites filenames for client w/o paths!!
-                    name = os.path.basename(abs_path)
-                    with open(abs_path, 'rb') as f:
-                        data = f.read()
-                    sprites_data.append((name, data))
-                else:
-                    print(f"[Worker-{worker_id}] Warning: Result file not found {abs_path}")
-            
-            job.result = JobResult(
-                sprites=sprites_data,
-                vtt_content=vtt_text,
-                video_id=job.video_id
-            )
-            
-            job.update_status(JobState.JOB_STATE_DONE, 100, "Done")
-            print(f"[Worker-{worker_id}] Job {job.job_id} DONE. Generated {len(sprites_data)} sprites.")
-            
+            check_job_input(job)
+
+            # ffmpeg of the job is killed after JOB_TIMEOUT_SEC, job fails with TimeoutError
+            with job.procs.deadline(cfg.JOB_TIMEOUT_SEC):
+                probe = probe_job(job, tag)
+
+                # Run processing
+                # Returns list of abs paths, vtt text and variants
+                sprite_files_abs, vtt_text, variants = render_job(job, probe)
+
+            complete_job(job, sprite_files_abs, vtt_text, tag, variants)
+
         except InterruptedError:
-            print(f"[Worker-{worker_id}] Job {job.job_id} CANCELED")
+            print(f"[{tag}] Job {job.job_id} CANCELED")
             # Status is CANCELED already
         except Exception as e:
-            print(f"[Worker-{worker_id}] Job {job.job_id} FAILED: {e}")
-            import traceback
-            traceback.print_exc()
-            job.update_status(JobState.JOB_STATE_FAILED, 0, str(e))
+            fail_job(job, e, tag)
         finally:
             # Clean temps
             if workspace:
-                files_ut.cleanup_workspace(workspace)
+                release_workspace(job, workspace)
+            job_ended(job)
 
 def start_workers():
+    if cfg.EXECUTION_BACKEND == 'process':
+        get_process_backend()
     for i in range(cfg.MAX_WORKERS):
         t = threading.Thread(target=worker_loop, args=(i,), daemon=True)
-        t.start()
\ No newline at end of file
+        t.start()
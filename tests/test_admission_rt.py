@@ -0,0 +1,44 @@
+"""Unit tests of runtime.admission_rt."""
+import os
+
+import pytest
+
+from config.service_cfg import cfg
+from proto.ytsprites_pb2 import SpriteOptions
+from runtime.admission_rt import AdmissionError, check_admission, disk_free_bytes
+from runtime.queue_rt import JobManager
+
+
+@pytest.fixture
+def missing_tmp(monkeypatch, tmp_path):
+    base = tmp_path / "does_not_exist_yt"
+    monkeypatch.setattr(cfg, "TMP_DIR", str(base))
+    monkeypatch.setattr(cfg, "ADMIT_MIN_FREE_DISK_MB", 1)
+    return base
+
+
+def test_disk_free_creates_tmp_dir(missing_tmp):
+    assert disk_free_bytes() > 0
+    assert os.path.isdir(missing_tmp)
+
+
+def test_missing_tmp_dir_admits(missing_tmp):
+    assert check_admission(0, 0.0, 0, 1024, 1.0) is None
+    assert JobManager().create_job("vid", "video/mp4", SpriteOptions(), input_bytes=1024)
+
+
+def test_unknown_disk_skips_rule(monkeypatch, tmp_path):
+    # TMP_DIR under a regular file can't be made
+    blocker = tmp_path / "file"
+    blocker.write_bytes(b"")
+    monkeypatch.setattr(cfg, "TMP_DIR", str(blocker / "tmp"))
+    monkeypatch.setattr(cfg, "ADMIT_MIN_FREE_DISK_MB", 1)
+    assert disk_free_bytes() is None
+    assert check_admission(0, 0.0, 0, 1024, 1.0) is None
+
+
+def test_low_disk_rejects(monkeypatch, missing_tmp):
+    monkeypatch.setattr(cfg, "ADMIT_MIN_FREE_DISK_MB", 1 << 40)
+    rejection = check_admission(0, 0.0, 0, 1024, 1.0)
+    assert isinstance(rejection, AdmissionError)
+    assert rejection.retry_after_sec >= 1
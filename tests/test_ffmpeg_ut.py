@@ -0,0 +1,139 @@
+"""Unit tests of the pure helpers in utils.ffmpeg_ut (no ffmpeg needed).
+
+Run from repo root: python -m pytest -q
+"""
+import pytest
+from PIL import Image
+
+from config.service_cfg import cfg
+from proto.ytsprites_pb2 import SpriteOptions
+from utils.ffmpeg_ut import (
+    dedup_frames, generate_vtt, options_error, parse_progress_line, plan_segments, progress_time, short_segments,
+)
+
+TILE_W, TILE_H = 32, 18
+
+
+def gradient(reverse=False, lift=0):
+    """Raw rgb24 tile with a horizontal brightness ramp."""
+    img = Image.new("RGB", (TILE_W, TILE_H))
+    for x in range(TILE_W):
+        v = min(255, (TILE_W - 1 - x if reverse else x) * 8 + lift)
+        for y in range(TILE_H):
+            img.putpixel((x, y), (v, v, v))
+    return img.tobytes()
+
+
+def cues(vtt):
+    """(start --> end, target) pairs of a WebVTT text."""
+    blocks = vtt.strip().split("\n\n")[1:]
+    return [tuple(b.split("\n")) for b in blocks]
+
+
+def test_vtt_one_interval_per_tile():
+    assert cues(generate_vtt(3, 2.0, 2, 1, 160, 90)) == [
+        ("00:00:00.000 --> 00:00:02.000", "sprite_0001.jpg#xywh=0,0,160,90"),
+        ("00:00:02.000 --> 00:00:04.000", "sprite_0001.jpg#xywh=160,0,160,90"),
+        ("00:00:04.000 --> 00:00:06.000", "sprite_0002.jpg#xywh=0,0,160,90"),
+    ]
+
+
+def test_vtt_spans_stretch_cues():
+    assert cues(generate_vtt(3, 1.0, 2, 2, 160, 90, "webp", "hd", spans=[3, 1, 2])) == [
+        ("00:00:00.000 --> 00:00:03.000", "sprite_hd_0001.webp#xywh=0,0,160,90"),
+        ("00:00:03.000 --> 00:00:04.000", "sprite_hd_0001.webp#xywh=160,0,160,90"),
+        ("00:00:04.000 --> 00:00:06.000", "sprite_hd_0001.webp#xywh=0,90,160,90"),
+    ]
+
+
+def test_dedup_frames_runs():
+    a, b = gradient(), gradient(reverse=True)
+    # Brightness shift keeps the hash, so it stays in the run
+    frames = [a, gradient(lift=4), a, b, a, a]
+    runs = []
+    kept = list(dedup_frames(frames, TILE_W, TILE_H, runs, max_distance=4))
+    assert kept == [a, b, a]
+    assert runs == [3, 1, 2]
+    assert sum(runs) == len(frames)
+
+
+def test_dedup_frames_zero_distance_keeps_changes():
+    a, b = gradient(), gradient(reverse=True)
+    runs = []
+    assert list(dedup_frames([a, b, a], TILE_W, TILE_H, runs, max_distance=0)) == [a, b, a]
+    assert runs == [1, 1, 1]
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    monkeypatch.setattr(cfg, "EXTRACT_PARALLELISM", 4)
+    monkeypatch.setattr(cfg, "SEGMENT_MIN_SEC", 10)
+
+
+@pytest.mark.parametrize("duration, interval, per_sprite", [
+    (600.0, 1.0, 100),
+    (601.0, 2.0, 25),
+    (95.0, 1.0, 10),
+    (3600.0, 5.0, 100),
+])
+def test_plan_segments_cover_whole_sheets(parallel, duration, interval, per_sprite):
+    segments = plan_segments(duration, interval, per_sprite)
+    est_frames = int(duration / interval + 0.5)
+    total_sheets = -(-est_frames // per_sprite)
+    assert 1 < len(segments) <= cfg.EXTRACT_PARALLELISM
+    # Ranges are back to back, each but the last fills whole sheets
+    for (start, dur, first, max_frames), (next_start, _, next_first, _) in zip(segments, segments[1:]):
+        assert max_frames % per_sprite == 0
+        assert next_first == first + max_frames // per_sprite
+        assert next_start == pytest.approx(start + dur)
+        assert dur == pytest.approx(max_frames * interval)
+    start, dur, first, max_frames = segments[-1]
+    assert dur is None and max_frames is None
+    whole = sum(m // per_sprite for _, _, _, m in segments[:-1])
+    assert whole == first < total_sheets
+
+
+def test_plan_segments_single(parallel, monkeypatch):
+    assert plan_segments(None, 1.0, 100) == [(0.0, None, 0, None)]
+    # Shorter than two segments
+    assert plan_segments(15.0, 1.0, 5) == [(0.0, None, 0, None)]
+    monkeypatch.setattr(cfg, "EXTRACT_PARALLELISM", 1)
+    assert plan_segments(600.0, 1.0, 100) == [(0.0, None, 0, None)]
+
+
+def test_short_segments():
+    segments = [(0.0, 100.0, 0, 100), (100.0, 100.0, 1, 100), (200.0, None, 2, None)]
+    assert short_segments(segments, [100, 100, 7]) == []
+    assert short_segments(segments, [100, 99, 7]) == [100.0]
+    assert short_segments(segments, [0, 100, 0]) == [0.0]
+
+
+@pytest.mark.parametrize("line, parsed", [
+    ("out_time_us=1500000\n", ("out_time_us", "1500000")),
+    ("out_time_ms=1500000", ("out_time_ms", "1500000")),
+    ("progress=end", ("progress", "end")),
+    ("stream_0_0_q=2.0", ("stream_0_0_q", "2.0")),
+    ("frame=  12 fps=0.0 q=2.0 size=N/A", None),
+    ("[mjpeg @ 0x55] bitrate=1 is not a key", None),
+    ("Input #0, mov,mp4, from 'in.mp4':", None),
+    ("", None),
+])
+def test_parse_progress_line(line, parsed):
+    assert parse_progress_line(line) == parsed
+
+
+def test_progress_time():
+    assert progress_time("out_time_us", "1500000") == 1.5
+    # ffmpeg's out_time_ms is in microseconds too
+    assert progress_time("out_time_ms", "2000000") == 2.0
+    assert progress_time("out_time_us", "N/A") is None
+    assert progress_time("frame", "12") is None
+
+
+@pytest.mark.parametrize("mode", ["", "auto", "decode", "keyframe", "seek", "Seek"])
+def test_options_error_extract_mode(mode):
+    assert options_error(SpriteOptions(extract_mode=mode)) is None
+
+
+def test_options_error_unknown_extract_mode():
+    assert "extract_mode" in options_error(SpriteOptions(extract_mode="keyframes"))
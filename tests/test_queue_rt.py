@@ -0,0 +1,59 @@
+"""Unit tests of runtime.queue_rt JobManager retention and restore."""
+import time
+
+import pytest
+
+from config.service_cfg import cfg
+from proto.ytsprites_pb2 import JobState, SpriteOptions
+from runtime.models_rt import Job, JobResult
+from runtime.queue_rt import JobManager
+from runtime.store_rt import JobStore
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    # restore() removes workspaces nobody refers to in TMP_DIR
+    monkeypatch.setattr(cfg, "TMP_DIR", str(tmp_path / "tmp"))
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def finished_job(job_id, created_at, finished_at):
+    job = Job(job_id, job_id, "video/mp4", SpriteOptions(), created_at=created_at)
+    job.state = JobState.JOB_STATE_FAILED
+    job.updated_at = finished_at
+    return job
+
+
+def test_restore_retains_in_finish_order(monkeypatch, store):
+    monkeypatch.setattr(cfg, "JOB_TTL_SEC", 3600)
+    now = time.time()
+    # Created first, finished last
+    store.save(finished_job("slow", now - 7200, now - 60))
+    store.save(finished_job("fast", now - 7000, now - 7000))
+    store.flush()
+
+    manager = JobManager()
+    manager.attach_store(store)
+    manager.restore()
+    assert manager.reap(now) == 1
+    assert manager.get_job("fast") is None
+    assert manager.get_job("slow") is not None
+
+
+def test_done_job_saved_with_workspace(store, tmp_path):
+    manager = JobManager()
+    manager.attach_store(store)
+    sprite = tmp_path / "sprite_0001.jpg"
+    sprite.write_bytes(b"jpg")
+    result = JobResult(sprites=[(sprite.name, str(sprite))], vtt_content="WEBVTT\n", video_id="vid", size_bytes=3)
+    job_id = manager.create_done_job("vid", "video/mp4", SpriteOptions(), result,
+                                     temp_dir_path=str(tmp_path), content_hash="ab" * 32)
+    # The first save is what a flush racing the cache hit would store
+    store.flush()
+    saved = {job.job_id: job for job in store.load()}[job_id]
+    assert saved.state == JobState.JOB_STATE_DONE
+    assert saved.temp_dir_path == str(tmp_path)
+    assert saved.content_hash == "ab" * 32
+    assert saved.result.sprites == [(sprite.name, str(sprite))]
@@ -0,0 +1,53 @@
+"""Unit tests of runtime.sched_rt queue keys."""
+import pytest
+
+from config.service_cfg import cfg
+from proto.ytsprites_pb2 import SpriteOptions
+from runtime.models_rt import Job, MediaInfo
+from runtime.sched_rt import Scheduler
+
+
+def job(job_id, priority=0, tenant="", duration=None):
+    j = Job(job_id, job_id, "video/mp4", SpriteOptions(), priority=priority, tenant=tenant)
+    if duration:
+        j.probe = MediaInfo(duration, 1, "mp4", "h264", 640, 360, 25.0, 0, 2.0)
+    return j
+
+
+def order(scheduler, jobs):
+    keys = {j.job_id: scheduler.key(j, seq) for seq, j in enumerate(jobs)}
+    return sorted(keys, key=keys.get)
+
+
+@pytest.mark.parametrize("priority, cls", [(-5, 0), (0, 0), (1, 1), (2, 2), (3, 2), (2**31 - 1, 2)])
+def test_priority_class_clamped(monkeypatch, priority, cls):
+    monkeypatch.setattr(cfg, "SCHED_MAX_PRIORITY", 2)
+    assert Scheduler.priority_class(priority) == cls
+
+
+def test_priority_off_keeps_policy_order():
+    jobs = [job("a"), job("b", priority=2), job("c", priority=-1)]
+    assert order(Scheduler("fifo", use_priority=False), jobs) == ["a", "b", "c"]
+
+
+def test_priority_classes_go_first(monkeypatch):
+    monkeypatch.setattr(cfg, "SCHED_MAX_PRIORITY", 2)
+    jobs = [job("a"), job("b", priority=2), job("c", priority=1), job("d", priority=2**31 - 1), job("e", priority=-9)]
+    # Out-of-range priorities share the edge classes, arrival order inside a class
+    assert order(Scheduler("fifo", use_priority=True), jobs) == ["b", "d", "c", "a", "e"]
+
+
+def test_sjf_within_class(monkeypatch):
+    monkeypatch.setattr(cfg, "SCHED_SJF_AGING", 0.0)
+    jobs = [job("long", duration=3600), job("short", duration=60), job("urgent", priority=1, duration=7200)]
+    assert order(Scheduler("sjf", use_priority=True), jobs) == ["urgent", "short", "long"]
+
+
+def test_fair_share_interleaves_owners():
+    jobs = [job(f"bulk{i}", tenant="bulk", duration=600) for i in range(3)] + [job("clip", tenant="user", duration=600)]
+    assert order(Scheduler("fair", use_priority=False), jobs)[:2] == ["bulk0", "clip"]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Scheduler("lifo")
@@ -1,96 +1,896 @@
 import os
 import math
+import time
 import subprocess
 import shutil
-from typing import List, Tuple, Optional
-from PIL import Image
+import threading
+import json
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
+from PIL import Image, ImageOps, features
+try:
+    import numpy as np
+except ImportError:
+    # Optional, only the 'numpy' sheet packer uses it
+    np = None
 from config.service_cfg import cfg
+from proto.ytsprites_pb2 import SpriteOptions
+from runtime.models_rt import MediaInfo
+from runtime.subproc_rt import ProcGroup
+from runtime.metrics_rt import observe_stage, frames_total, sheets_total
 
-DEFAULT_TILE_W = 160
-DEFAULT_TILE_H = 90
+TILE_FITS = ("auto", "pad")
+# SpriteVariant fields that override SpriteOptions when set (tile_w/tile_h go together)
+VARIANT_FIELDS = ("cols", "rows", "format", "quality", "tile_fit", "tile_scale")
+VARIANT_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+
+
+@dataclass
+class SpriteParams:
+    """Effective sprite params: SpriteOptions with service defaults applied."""
+    interval: float
+    cols: int
+    rows: int
+    tile_w: int
+    tile_h: int
+    quality: int
+    format: str = "jpg"
+    fit: str = "auto"
+    # Runs of near-identical tiles collapse into one (SpriteOptions.dedup)
+    dedup: bool = False
+
+    @property
+    def per_sprite(self) -> int:
+        return self.cols * self.rows
+
+
+def resolve_params(options, probe: Optional[MediaInfo] = None) -> SpriteParams:
+    """probe gives the source aspect for tile geometry, without it tiles are the plain box."""
+    encoder = get_encoder(options.format)
+    tile_w, tile_h = tile_geometry(options, probe)
+    return SpriteParams(
+        interval=options.step_sec if options.step_sec > 0 else cfg.DEFAULT_STEP_SEC,
+        cols=options.cols if options.cols > 0 else cfg.DEFAULT_COLS,
+        rows=options.rows if options.rows > 0 else cfg.DEFAULT_ROWS,
+        tile_w=tile_w,
+        tile_h=tile_h,
+        quality=options.quality if options.quality > 0 else encoder.default_quality(),
+        format=encoder.name,
+        fit=(options.tile_fit or cfg.DEFAULT_TILE_FIT).lower(),
+        dedup=options.dedup,
+    )
+
+
+def variant_options(options, variant) -> SpriteOptions:
+    """SpriteOptions of a variant: its set fields over the job's options."""
+    merged = SpriteOptions()
+    merged.CopyFrom(options)
+    del merged.variants[:]
+    for name in VARIANT_FIELDS:
+        value = getattr(variant, name)
+        if value:
+            setattr(merged, name, value)
+    if variant.tile_w or variant.tile_h:
+        merged.tile_w, merged.tile_h = variant.tile_w, variant.tile_h
+    return merged
+
+
+def resolve_variants(options, probe: Optional[MediaInfo] = None) -> List[Tuple[str, SpriteParams]]:
+    """(name, params) of every output: the main one (name "") first, then SpriteOptions.variants."""
+    outputs = [("", resolve_params(options, probe))]
+    for variant in options.variants:
+        outputs.append((variant.name, resolve_params(variant_options(options, variant), probe)))
+    return outputs
+
+
+def display_aspect(probe: Optional[MediaInfo]) -> Optional[float]:
+    """Width/height of decoded frames: ffmpeg applies rotation, so 90/270 swap the sides."""
+    if not probe or not probe.width or not probe.height:
+        return None
+    if probe.rotation in (90, 270):
+        return probe.height / probe.width
+    return probe.width / probe.height
+
+
+def _even(v: float) -> int:
+    # Chroma subsampled encoders want even sides
+    return max(2, int(round(v / 2)) * 2)
+
+
+def tile_geometry(options, probe: Optional[MediaInfo] = None) -> Tuple[int, int]:
+    """
+    Tile size for SpriteOptions and source. The box is tile_w x tile_h (DEFAULT_TILE_W x DEFAULT_TILE_H
+    if both are 0). 'auto' fit shrinks one side of the box to the source aspect, so tiles carry no padding;
+    'pad' keeps the box. A side given as 0 always follows the source aspect (16:9 if unknown).
+    Both sides are multiplied by tile_scale.
+    """
+    box_w, box_h = options.tile_w, options.tile_h
+    if not box_w and not box_h:
+        box_w, box_h = cfg.DEFAULT_TILE_W, cfg.DEFAULT_TILE_H
+    fit = (options.tile_fit or cfg.DEFAULT_TILE_FIT).lower()
+    aspect = display_aspect(probe)
+
+    if box_w and box_h and (fit == "pad" or aspect is None):
+        w, h = box_w, box_h
+    else:
+        aspect = aspect or 16 / 9
+        if not box_h or (box_w and box_w / box_h <= aspect):
+            # Source is wider than the box: full width
+            w, h = box_w, box_w / aspect
+        else:
+            w, h = box_h * aspect, box_h
+
+    scale = options.tile_scale or 1
+    # A side derived from a tall or wide source can get past the limit
+    return _even(min(w * scale, cfg.MAX_TILE_SIDE)), _even(min(h * scale, cfg.MAX_TILE_SIDE))
+
+
+def options_error(options) -> Optional[str]:
+    """Error text if SpriteOptions can't be rendered by this service, checked on submit."""
+    if options.extract_mode and options.extract_mode.lower() not in EXTRACT_MODES + ("auto",):
+        return f"Unknown extract_mode: {options.extract_mode!r}, supported: {', '.join(EXTRACT_MODES + ('auto',))}"
+    if len(options.variants) > cfg.MAX_VARIANTS:
+        return f"At most {cfg.MAX_VARIANTS} variants"
+    names = set()
+    for variant in options.variants:
+        if not variant.name or len(variant.name) > 32 or not set(variant.name) <= VARIANT_NAME_CHARS:
+            return f"Bad variant name: {variant.name!r}, expected 1..32 of [A-Za-z0-9_-]"
+        if variant.name in names:
+            return f"Duplicate variant name: {variant.name!r}"
+        names.add(variant.name)
+        error = _output_error(variant_options(options, variant))
+        if error:
+            return f"Variant {variant.name}: {error}"
+    return _output_error(options)
+
+
+def _output_error(options) -> Optional[str]:
+    try:
+        get_encoder(options.format)
+    except ValueError as e:
+        return str(e)
+    if options.tile_fit and options.tile_fit.lower() not in TILE_FITS:
+        return f"Unknown tile_fit: {options.tile_fit!r}, supported: {', '.join(TILE_FITS)}"
+    if not 0 <= options.tile_scale <= cfg.MAX_TILE_SCALE:
+        return f"tile_scale must be 0..{cfg.MAX_TILE_SCALE}"
+    scale = options.tile_scale or 1
+    for side in (options.tile_w, options.tile_h):
+        if side < 0 or side * scale > cfg.MAX_TILE_SIDE:
+            return f"Tile side must be 0..{cfg.MAX_TILE_SIDE} px after tile_scale"
+    return None
 
 
 def ensure_dir(p: str):
     os.makedirs(p, exist_ok=True)
 
 
-def run_cmd(cmd: List[str]) -> Tuple[int, str, str]:
-    """Run ext cmd syncly."""
+def popen_managed(cmd: List[str], procs: Optional[ProcGroup] = None, **kwargs) -> subprocess.Popen:
+    """Popen in its own process group, registered in procs so a cancel or timeout can stop it."""
+    proc = subprocess.Popen(cmd, start_new_session=True, **kwargs)
+    if procs is not None:
+        procs.add(proc)
+    return proc
+
+
+def run_cmd(cmd: List[str], raw_stdout: bool = False, procs: Optional[ProcGroup] = None) -> Tuple[int, str, str]:
+    """Run ext cmd syncly. With raw_stdout=True stdout is returned as bytes.
+    A process stopped through procs raises the error it was stopped with."""
     # print(f"[CMD] {' '.join(cmd)}")
     try:
-        res = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=False
-        )
-        return res.returncode, res.stdout.decode('utf-8', 'ignore'), res.stderr.decode('utf-8', 'ignore')
+        proc = popen_managed(cmd, procs, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     except FileNotFoundError:
-        return -1, "", "Command not found"
+        return -1, b"" if raw_stdout else "", "Command not found"
+    try:
+        out, err = proc.communicate()
+    finally:
+        if procs is not None:
+            procs.discard(proc)
+            procs.check()
+    out = out if raw_stdout else out.decode('utf-8', 'ignore')
+    return proc.returncode, out, err.decode('utf-8', 'ignore')
 
 
-def probe_duration_sec(src: str) -> float | None:
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        src,
-    ]
-    code, out, err = run_cmd(cmd)
-    if code == 0:
-        try:
-            return float(out.strip())
-        except Exception:
-            pass
-    else:
-        print(f"[FFPROBE DURATION ERROR] {err[:200]}")
+# With these args ffmpeg writes key=value progress blocks to stderr, next to its log
+PROGRESS_ARGS = ["-progress", "pipe:2", "-nostats"]
+PROGRESS_KEYS = {
+    "frame", "fps", "bitrate", "total_size", "out_time_us", "out_time_ms", "out_time",
+    "dup_frames", "drop_frames", "speed", "progress",
+}
+
+
+def parse_progress_line(line: str) -> Optional[Tuple[str, str]]:
+    """(key, value) of a -progress line, None for other stderr output."""
+    key, sep, value = line.partition("=")
+    # A stats line ("frame=  12 fps=...") starts with a progress key too, but holds several pairs
+    if not sep or "=" in value or (key not in PROGRESS_KEYS and not key.startswith("stream_")):
+        return None
+    return key, value.strip()
+
+
+def progress_time(key: str, value: str) -> Optional[float]:
+    """Output time in seconds from out_time_us / out_time_ms (both are in microseconds)."""
+    if key in ("out_time_us", "out_time_ms") and value.isdigit():
+        return int(value) / 1e6
     return None
 
 
-def probe_video_dims(src: str) -> Tuple[Optional[int], Optional[int]]:
-    cmd = [
+class FfmpegProc:
+    """
+    ffmpeg subprocess whose stderr is read in a thread: -progress lines go to on_time(sec),
+    the rest is kept as log for error messages. If on_time raises (InterruptedError on cancel,
+    TimeoutError past the job deadline, ...), ffmpeg is killed at once and the error is kept
+    in `interrupted` for the caller to raise; stderr is still drained to the end.
+    The process is registered in procs, which may stop it from outside (cancel, timeout).
+    """
+
+    def __init__(
+        self,
+        cmd: List[str],
+        on_time: Optional[Callable[[float], None]] = None,
+        stdout: bool = False,
+        procs: Optional[ProcGroup] = None,
+    ):
+        self._on_time = on_time
+        self._procs = procs
+        self._log: List[str] = []
+        self.interrupted: Optional[Exception] = None
+        self.proc = popen_managed(
+            cmd, procs, stdout=subprocess.PIPE if stdout else subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        self.stdout = self.proc.stdout
+        self._reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._reader.start()
+
+    def _read_stderr(self):
+        for raw in self.proc.stderr:
+            line = raw.decode('utf-8', 'ignore').rstrip()
+            kv = parse_progress_line(line)
+            if kv is None:
+                self._log.append(line)
+                continue
+            sec = progress_time(*kv)
+            if sec is None or self._on_time is None or self.interrupted:
+                continue
+            try:
+                self._on_time(sec)
+            except Exception as e:
+                self.interrupted = e
+                self.kill()
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+
+    def wait(self) -> Tuple[int, str]:
+        """Exit code and stderr log."""
+        code = self.proc.wait()
+        self._reader.join(timeout=5)
+        if self._procs is not None:
+            self._procs.discard(self.proc)
+        return code, "\n".join(self._log)
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        """Why ffmpeg was stopped (cancel or timeout), None if it ran on its own."""
+        if self.interrupted:
+            return self.interrupted
+        return self._procs.error if self._procs is not None else None
+
+    def result(self) -> Tuple[int, str]:
+        """wait(), raising the error ffmpeg was stopped with."""
+        code, err = self.wait()
+        if self.error:
+            raise self.error
+        return code, err
+
+
+class ExtractProgress:
+    """
+    Turns output time of ffmpeg into progress_cb(percent, msg) between lo and hi percent,
+    at most once per PROGRESS_INTERVAL_SEC. Times of ranges extracted at once (segments) add up.
+    progress_cb is also the cancel check, so it is called at that rate even if duration is unknown.
+    """
+
+    def __init__(self, progress_cb, duration: Optional[float], lo: int = 10, hi: int = 89):
+        self._progress_cb = progress_cb
+        self._duration = duration
+        self._lo = lo
+        self._hi = hi
+        self._done: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._next_report = 0.0
+
+    def range_cb(self, idx: int = 0) -> Callable[[float], None]:
+        """on_time callback for range idx."""
+        return functools.partial(self.update, idx)
+
+    def update(self, idx: int, sec: float):
+        with self._lock:
+            self._done[idx] = sec
+            now = time.monotonic()
+            if now < self._next_report:
+                return
+            self._next_report = now + cfg.PROGRESS_INTERVAL_SEC
+            done = sum(self._done.values())
+        if self._duration:
+            pct = self._lo + (self._hi - self._lo) * min(1.0, done / self._duration)
+            self._progress_cb(int(pct), f"Extracting frames... {done:.0f}/{self._duration:.0f}s")
+        else:
+            self._progress_cb(self._lo, f"Extracting frames... {done:.0f}s")
+
+
+def _parse_rate(v) -> float | None:
+    # "30000/1001" -> 29.97
+    try:
+        num, _, den = str(v).partition("/")
+        num = float(num)
+        den = float(den) if den else 1.0
+        return num / den if num > 0 and den > 0 else None
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_cmd(src: str, keyframes_window_sec: float = 30.0) -> List[str]:
+    """
+    One ffprobe run, JSON output: container duration/size, first video stream params,
+    rotation and keyframe distance hint (packets of the first keyframes_window_sec, no decoding).
+    """
+    return [
         "ffprobe",
         "-v", "error",
+        "-print_format", "json",
         "-select_streams", "v:0",
-        "-show_entries", "stream=width,height",
-        "-of", "csv=s=x:p=0",
+        "-read_intervals", f"%+{keyframes_window_sec}",
+        "-show_entries",
+        "format=duration,size,format_name"
+        ":stream=codec_name,width,height,avg_frame_rate,r_frame_rate"
+        ":stream_tags=rotate:stream_side_data=rotation"
+        ":packet=pts_time,flags",
         src,
     ]
-    code, out, err = run_cmd(cmd)
-    if code == 0:
-        line = out.strip()
-        if "x" in line:
-            try:
-                w, h = line.split("x", 1)
-                return int(w), int(h)
-            except Exception:
-                pass
-    else:
-        print(f"[FFPROBE DIMS ERROR] {err[:200]}")
-    return None, None
 
 
-def extract_frames(src: str, out_dir: str, interval_sec: float, tile_w: int, tile_h: int):
-    ensure_dir(out_dir)
+def probe_media(src: str, procs: Optional[ProcGroup] = None) -> MediaInfo:
+    start = time.perf_counter()
+    code, out, err = run_cmd(probe_cmd(src), procs=procs)
+    observe_stage("probe", time.perf_counter() - start)
+    if code != 0:
+        raise RuntimeError(f"ffprobe failed: {err[:300]}")
+    return parse_probe(out, src)
+
+
+def parse_probe(out: str, src: str) -> MediaInfo:
+    try:
+        data = json.loads(out or "{}")
+    except ValueError as e:
+        raise RuntimeError(f"ffprobe bad output: {e}")
+
+    info = MediaInfo()
+    fmt = data.get("format") or {}
+    try:
+        info.duration_sec = float(fmt["duration"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    try:
+        info.size_bytes = int(fmt["size"])
+    except (KeyError, TypeError, ValueError):
+        info.size_bytes = os.path.getsize(src)
+    info.format_name = fmt.get("format_name")
+
+    streams = data.get("streams") or []
+    if streams:
+        st = streams[0]
+        info.codec = st.get("codec_name")
+        info.width = st.get("width")
+        info.height = st.get("height")
+        info.fps = _parse_rate(st.get("avg_frame_rate")) or _parse_rate(st.get("r_frame_rate"))
+        rotation = (st.get("tags") or {}).get("rotate")
+        for sd in st.get("side_data_list") or []:
+            if "rotation" in sd:
+                rotation = sd["rotation"]
+        try:
+            info.rotation = int(float(rotation)) % 360 if rotation is not None else 0
+        except (TypeError, ValueError):
+            info.rotation = 0
+
+    times = []
+    for pkt in data.get("packets") or []:
+        if not str(pkt.get("flags", "")).startswith("K"):
+            continue
+        try:
+            times.append(float(pkt["pts_time"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    times.sort()
+    gaps = sorted(b - a for a, b in zip(times, times[1:]) if b > a)
+    if gaps:
+        info.keyframe_interval_sec = gaps[len(gaps) // 2]
+
+    return info
+
+
+def check_media_limits(info: MediaInfo):
+    """Reject inputs that are not worth decoding. Raises ValueError."""
+    if not info.width or not info.height:
+        raise ValueError("No video stream found")
+    if cfg.MAX_DURATION_SEC and info.duration_sec and info.duration_sec > cfg.MAX_DURATION_SEC:
+        raise ValueError(f"Video too long: {info.duration_sec:.0f}s > {cfg.MAX_DURATION_SEC}s")
+    if cfg.MAX_PIXELS and info.width * info.height > cfg.MAX_PIXELS:
+        raise ValueError(f"Video resolution too big: {info.width}x{info.height}")
+
+
+EXTRACT_MODES = ("decode", "keyframe", "seek")
+
+
+def choose_extract_mode(requested: str, duration: float | None, keyframe_interval: float | None, interval_sec: float) -> str:
+    """
+    decode   - decode every frame, fps filter keeps one per interval (exact, slowest).
+    keyframe - decode keyframes only (-skip_frame nokey), tile time error is up to the keyframe distance.
+    seek     - one accurate input seek per tile, decodes from previous keyframe to the timestamp only.
+    auto     - keyframe if keyframes are within SEEK_TOLERANCE_SEC, seek if step is long and
+               keyframes are sparser than step, otherwise decode. Short videos always decode.
+    """
+    mode = (requested or cfg.DEFAULT_EXTRACT_MODE or "auto").lower()
+    if mode == "seek" and not duration:
+        print("[EXTRACT MODE] seek needs known duration, fallback to decode")
+        return "decode"
+    if mode in EXTRACT_MODES:
+        return mode
+    if mode != "auto":
+        raise ValueError(f"Unknown extract mode: {requested}")
+
+    if not duration or duration < cfg.SEEK_AUTO_MIN_DURATION_SEC:
+        return "decode"
+    kf = keyframe_interval
+    if kf and kf <= cfg.SEEK_TOLERANCE_SEC:
+        return "keyframe"
+    if kf and kf < interval_sec and interval_sec >= cfg.SEEK_AUTO_MIN_STEP_SEC:
+        return "seek"
+    return "decode"
+
+
+def extract_input_args(mode: str) -> List[str]:
+    """ffmpeg input options (go before -i) for the extract mode."""
+    if mode == "keyframe":
+        return ["-skip_frame", "nokey"]
+    return []
+
+
+def scale_pad_filter(tile_w: int, tile_h: int) -> str:
+    return f"scale={tile_w}:{tile_h}:force_original_aspect_ratio=decrease,pad={tile_w}:{tile_h}:(ow-iw)/2:(oh-ih)/2:color=black"
+
+
+def tile_filter(interval_sec: float, tile_w: int, tile_h: int) -> str:
     # scale + pad to maintain aspect ratio in tiles
-    vf = f"scale={tile_w}:{tile_h}:force_original_aspect_ratio=decrease,pad={tile_w}:{tile_h}:(ow-iw)/2:(oh-ih)/2:color=black,fps=1/{interval_sec}"
+    return f"{scale_pad_filter(tile_w, tile_h)},fps=1/{interval_sec}"
+
+
+def extract_frames(
+    src: str,
+    out_dir: str,
+    interval_sec: float,
+    tile_w: int,
+    tile_h: int,
+    input_args: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+):
+    ensure_dir(out_dir)
+    vf = tile_filter(interval_sec, tile_w, tile_h)
     out_pattern = os.path.join(out_dir, "frame_%05d.jpg")
     
     cmd = [
         "ffmpeg", "-y",
+        *(input_args or []),
         "-i", src,
         "-loglevel", "error",
+        *PROGRESS_ARGS,
         "-vf", vf,
+        *(output_args or []),
         out_pattern,
     ]
     print(f"[FFMPEG CMD] {' '.join(cmd)}")
     
-    code, _, err = run_cmd(cmd)
+    start = time.perf_counter()
+    code, err = FfmpegProc(cmd, on_time, procs=procs).result()
+    observe_stage("extract", time.perf_counter() - start)
     if code != 0:
         raise RuntimeError(f"ffmpeg extract failed: {err[:300]}")
     print("[FFMPEG OK] frames extracted")
 
+
+def raw_frames_cmd(
+    src: str,
+    interval_sec: float,
+    tile_w: int,
+    tile_h: int,
+    input_args: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
+) -> List[str]:
+    """ffmpeg writing tiles to stdout as raw rgb24 buffers (tile_w*tile_h*3 bytes each)."""
+    vf = tile_filter(interval_sec, tile_w, tile_h)
+    return [
+        "ffmpeg",
+        *(input_args or []),
+        "-i", src,
+        "-loglevel", "error",
+        *PROGRESS_ARGS,
+        "-vf", vf,
+        *(output_args or []),
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1",
+    ]
+
+
+def iter_raw_frames(
+    src: str,
+    interval_sec: float,
+    tile_w: int,
+    tile_h: int,
+    input_args: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+) -> Iterator[bytes]:
+    """Stream tiles from ffmpeg stdout as raw rgb24 buffers, no files on disk."""
+    cmd = raw_frames_cmd(src, interval_sec, tile_w, tile_h, input_args, output_args)
+    print(f"[FFMPEG CMD] {' '.join(cmd)}")
+
+    frame_size = tile_w * tile_h * 3
+    # stderr (log and progress) is drained aside, so a chatty ffmpeg can't block on a full pipe
+    ff = FfmpegProc(cmd, on_time, stdout=True, procs=procs)
+
+    count = 0
+    finished = False
+    try:
+        while True:
+            buf = ff.stdout.read(frame_size)
+            if len(buf) < frame_size:
+                finished = True
+                break
+            count += 1
+            yield buf
+    finally:
+        if not finished:
+            # Consumer stopped early
+            ff.kill()
+        ff.stdout.close()
+        code, err = ff.wait()
+
+    if ff.error:
+        raise ff.error
+    if code != 0:
+        raise RuntimeError(f"ffmpeg extract failed: {err[:300]}")
+    print(f"[FFMPEG OK] frames streamed: {count}")
+
+
+def seek_timestamps(duration: float, interval_sec: float) -> List[float]:
+    # Same tiles count as fps=1/interval gives on full decode
+    n = max(1, int(duration / interval_sec + 0.5))
+    return [i * interval_sec for i in range(n)]
+
+
+def grab_frame(src: str, ts: float, tile_w: int, tile_h: int, procs: Optional[ProcGroup] = None) -> bytes:
+    """Single tile at ts as raw rgb24. Black tile if nothing decoded there."""
+    frame_size = tile_w * tile_h * 3
+    cmd = [
+        "ffmpeg",
+        "-ss", f"{ts:.3f}",
+        "-i", src,
+        "-loglevel", "error",
+        "-frames:v", "1",
+        "-vf", scale_pad_filter(tile_w, tile_h),
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1",
+    ]
+    code, out, err = run_cmd(cmd, raw_stdout=True, procs=procs)
+    if code != 0:
+        raise RuntimeError(f"ffmpeg seek failed at {ts:.3f}s: {err[:300]}")
+    if len(out) < frame_size:
+        print(f"[SEEK FRAME EMPTY] ts={ts:.3f}")
+        return bytes(frame_size)
+    return out[:frame_size]
+
+
+def iter_seek_frames(
+    src: str,
+    timestamps: List[float],
+    tile_w: int,
+    tile_h: int,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+) -> Iterator[bytes]:
+    """Tiles by per-timestamp seeking, SEEK_WORKERS ffmpeg processes at once, yielded in order."""
+    print(f"[FFMPEG SEEK] tiles={len(timestamps)} workers={cfg.SEEK_WORKERS}")
+    window = max(1, cfg.SEEK_WORKERS) * 4
+    with ThreadPoolExecutor(max_workers=max(1, cfg.SEEK_WORKERS)) as pool:
+        ts_iter = iter(timestamps)
+        pending = deque()
+        for ts in ts_iter:
+            pending.append((ts, pool.submit(grab_frame, src, ts, tile_w, tile_h, procs)))
+            if len(pending) >= window:
+                break
+        while pending:
+            done_ts, future = pending.popleft()
+            buf = future.result()
+            if on_time:
+                on_time(done_ts)
+            ts = next(ts_iter, None)
+            if ts is not None:
+                pending.append((ts, pool.submit(grab_frame, src, ts, tile_w, tile_h, procs)))
+            yield buf
+    print(f"[FFMPEG OK] frames seeked: {len(timestamps)}")
+
+
+def jpeg_qscale(quality: int) -> int:
+    """Map PIL-like JPEG quality (1..100) to ffmpeg mjpeg -q:v (2 best .. 31 worst)."""
+    return max(2, min(31, round((100 - quality) / 3)))
+
+
+@functools.lru_cache(maxsize=1)
+def ffmpeg_encoders() -> frozenset:
+    """Encoder names of the installed ffmpeg (`ffmpeg -encoders`), read once; empty if it can't run."""
+    code, out, _ = run_cmd(["ffmpeg", "-hide_banner", "-encoders"])
+    if code != 0:
+        return frozenset()
+    names = set()
+    for line in out.splitlines():
+        parts = line.split()
+        # " V....D libwebp   libwebp WebP image (codec webp)"; the legend above has "=" in place of a name
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[1] != "=":
+            names.add(parts[1])
+    return frozenset(names)
+
+
+class SpriteEncoder(ABC):
+    """
+    Sheet image format: file extension, Pillow save() args, and ffmpeg output args
+    for the 'ffmpeg' engine (None if ffmpeg doesn't write it here, then sheets are packed by Pillow).
+    """
+    name = ""
+    pil_format = ""
+    # PIL.features name the format needs, None if always there
+    feature: Optional[str] = None
+    # ffmpeg encoder behind ffmpeg_args, must be in the ffmpeg build for the 'ffmpeg' engine
+    ffmpeg_codec: Optional[str] = None
+
+    def available(self) -> bool:
+        return self.feature is None or bool(features.check(self.feature))
+
+    @abstractmethod
+    def default_quality(self) -> int:
+        ...
+
+    @abstractmethod
+    def save_args(self, quality: int) -> dict:
+        ...
+
+    def ffmpeg_args(self, quality: int) -> Optional[List[str]]:
+        return None
+
+    def ffmpeg_available(self) -> bool:
+        """True if the 'ffmpeg' engine can write this format with the installed ffmpeg."""
+        return self.ffmpeg_codec is not None and self.ffmpeg_codec in ffmpeg_encoders()
+
+
+class JpegEncoder(SpriteEncoder):
+    name = "jpg"
+    pil_format = "JPEG"
+    ffmpeg_codec = "mjpeg"
+
+    def default_quality(self) -> int:
+        return cfg.JPEG_QUALITY
+
+    def save_args(self, quality: int) -> dict:
+        # optimize is an extra Huffman pass: a few % smaller, noticeably slower
+        return {"quality": quality, "optimize": cfg.JPEG_OPTIMIZE}
+
+    def ffmpeg_args(self, quality: int) -> Optional[List[str]]:
+        return ["-pix_fmt", "yuvj420p", "-q:v", str(jpeg_qscale(quality))]
+
+
+class WebpEncoder(SpriteEncoder):
+    name = "webp"
+    pil_format = "WEBP"
+    feature = "webp"
+    ffmpeg_codec = "libwebp"
+
+    def default_quality(self) -> int:
+        return cfg.WEBP_QUALITY
+
+    def save_args(self, quality: int) -> dict:
+        # method: 0 fast .. 6 smallest
+        return {"quality": quality, "method": cfg.WEBP_METHOD}
+
+    def ffmpeg_args(self, quality: int) -> Optional[List[str]]:
+        return ["-c:v", "libwebp", "-quality", str(quality), "-compression_level", str(cfg.WEBP_METHOD)]
+
+
+class AvifEncoder(SpriteEncoder):
+    name = "avif"
+    pil_format = "AVIF"
+    feature = "avif"
+
+    def default_quality(self) -> int:
+        return cfg.AVIF_QUALITY
+
+    def save_args(self, quality: int) -> dict:
+        # speed: 0 slowest/smallest .. 10 fastest
+        return {"quality": quality, "speed": cfg.AVIF_SPEED}
+
+
+ENCODERS = {e.name: e for e in (JpegEncoder(), WebpEncoder(), AvifEncoder())}
+FORMAT_ALIASES = {"jpeg": "jpg"}
+
+
+def find_encoder(fmt: Optional[str]) -> Optional[SpriteEncoder]:
+    """Encoder for SpriteOptions.format (empty = DEFAULT_FORMAT), None if unknown."""
+    name = (fmt or cfg.DEFAULT_FORMAT).lower()
+    return ENCODERS.get(FORMAT_ALIASES.get(name, name))
+
+
+def get_encoder(fmt: Optional[str]) -> SpriteEncoder:
+    """find_encoder() for formats that can be written here, ValueError otherwise."""
+    encoder = find_encoder(fmt)
+    if encoder is None:
+        raise ValueError(f"Unknown sprite format: {fmt!r}, supported: {', '.join(sorted(ENCODERS))}")
+    if not encoder.available():
+        raise ValueError(f"Sprite format {encoder.name} is not supported by this Pillow build")
+    return encoder
+
+
+def sprite_sheets_cmd(
+    src: str,
+    sprites_dir: str,
+    interval_sec: float,
+    cols: int,
+    rows: int,
+    tile_w: int,
+    tile_h: int,
+    quality: int = 85,
+    input_args: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
+    first_sheet: int = 0,
+    fmt: str = "jpg",
+) -> List[str]:
+    """ffmpeg-native packing: the tile filter lays out the grid and ffmpeg encodes finished sheets.
+    fmt must have SpriteEncoder.ffmpeg_args."""
+    vf = f"{tile_filter(interval_sec, tile_w, tile_h)},showinfo,tile={cols}x{rows}:color=black"
+    encoder = get_encoder(fmt)
+    out_pattern = os.path.join(sprites_dir, f"sprite_%04d.{encoder.name}")
+    return [
+        "ffmpeg", "-y",
+        "-hide_banner", *PROGRESS_ARGS,
+        *(input_args or []),
+        "-i", src,
+        # showinfo reports per frame at info level
+        "-loglevel", "info",
+        "-vf", vf,
+        *encoder.ffmpeg_args(quality),
+        *(output_args or []),
+        "-start_number", str(first_sheet + 1),
+        out_pattern,
+    ]
+
+
+def count_showinfo_frames(err: str) -> int:
+    return sum(1 for line in err.splitlines() if "Parsed_showinfo" in line and " n:" in line)
+
+
+def extract_sprite_sheets(
+    src: str,
+    sprites_dir: str,
+    interval_sec: float,
+    cols: int,
+    rows: int,
+    tile_w: int,
+    tile_h: int,
+    quality: int = 85,
+    input_args: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
+    first_sheet: int = 0,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+    fmt: str = "jpg",
+) -> Tuple[List[str], int]:
+    """Runs sprite_sheets_cmd. Returns sprite paths and frames count (counted by showinfo, needed for VTT)."""
+    ensure_dir(sprites_dir)
+    cmd = sprite_sheets_cmd(
+        src, sprites_dir, interval_sec, cols, rows, tile_w, tile_h, quality,
+        input_args, output_args, first_sheet, fmt
+    )
+    print(f"[FFMPEG CMD] {' '.join(cmd)}")
+
+    # ffmpeg packs and encodes here too, all of it counts as extract
+    start = time.perf_counter()
+    code, err = FfmpegProc(cmd, on_time, procs=procs).result()
+    observe_stage("extract", time.perf_counter() - start)
+    if code != 0:
+        raise RuntimeError(f"ffmpeg tile failed: {err[-300:]}")
+
+    total_frames = count_showinfo_frames(err)
+    sheets = math.ceil(total_frames / (cols * rows))
+    sheets_total.inc(sheets)
+    sprite_paths = [os.path.join(sprites_dir, sprite_name(first_sheet + i, fmt)) for i in range(sheets)]
+    print(f"[SPRITES BUILT] count={len(sprite_paths)} (ffmpeg tile)")
+    return sprite_paths, total_frames
+
+
+def ladder_sheets_cmd(
+    src: str,
+    sprites_dir: str,
+    outputs: List[Tuple[str, SpriteParams]],
+    input_args: Optional[List[str]] = None,
+    max_frames: Optional[int] = None,
+    first_frame: int = 0,
+) -> List[str]:
+    """sprite_sheets_cmd for several outputs of one decode: frames are picked once, then split
+    and scaled, tiled and encoded per output. Every output must have SpriteEncoder.ffmpeg_args."""
+    n = len(outputs)
+    interval = outputs[0][1].interval
+    graph = [f"[0:v]fps=1/{interval},showinfo,split={n}" + "".join(f"[s{k}]" for k in range(n))]
+    for k, (_, p) in enumerate(outputs):
+        graph.append(f"[s{k}]{scale_pad_filter(p.tile_w, p.tile_h)},tile={p.cols}x{p.rows}:color=black[o{k}]")
+    cmd = [
+        "ffmpeg", "-y",
+        "-hide_banner", *PROGRESS_ARGS,
+        *(input_args or []),
+        "-i", src,
+        "-loglevel", "info",
+        "-filter_complex", ";".join(graph),
+    ]
+    for k, (name, p) in enumerate(outputs):
+        encoder = get_encoder(p.format)
+        cmd += ["-map", f"[o{k}]", *encoder.ffmpeg_args(p.quality)]
+        if max_frames:
+            cmd += ["-frames:v", str(math.ceil(max_frames / p.per_sprite))]
+        pattern = f"sprite_{name}_%04d.{encoder.name}" if name else f"sprite_%04d.{encoder.name}"
+        cmd += ["-start_number", str(first_frame // p.per_sprite + 1), os.path.join(sprites_dir, pattern)]
+    return cmd
+
+
+def extract_ladder_sheets(
+    src: str,
+    sprites_dir: str,
+    outputs: List[Tuple[str, SpriteParams]],
+    input_args: Optional[List[str]] = None,
+    max_frames: Optional[int] = None,
+    first_frame: int = 0,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+) -> Tuple[List[List[str]], int]:
+    """Runs ladder_sheets_cmd. Returns sprite paths of every output and frames count."""
+    ensure_dir(sprites_dir)
+    cmd = ladder_sheets_cmd(src, sprites_dir, outputs, input_args, max_frames, first_frame)
+    print(f"[FFMPEG CMD] {' '.join(cmd)}")
+
+    start = time.perf_counter()
+    code, err = FfmpegProc(cmd, on_time, procs=procs).result()
+    observe_stage("extract", time.perf_counter() - start)
+    if code != 0:
+        raise RuntimeError(f"ffmpeg tile failed: {err[-300:]}")
+
+    total_frames = count_showinfo_frames(err)
+    if max_frames:
+        total_frames = min(total_frames, max_frames)
+    paths = []
+    for name, p in outputs:
+        first_sheet = first_frame // p.per_sprite
+        sheets = math.ceil(total_frames / p.per_sprite)
+        sheets_total.inc(sheets)
+        paths.append([os.path.join(sprites_dir, sprite_name(first_sheet + i, p.format, name)) for i in range(sheets)])
+    print(f"[SPRITES BUILT] outputs={len(outputs)} count={sum(len(x) for x in paths)} (ffmpeg tile)")
+    return paths, total_frames
+
+
 def list_frames(frames_dir: str) -> List[str]:
     if not os.path.exists(frames_dir):
         return []
@@ -98,6 +898,90 @@ def list_frames(frames_dir: str) -> List[str]:
     files.sort()
     return [os.path.join(frames_dir, f) for f in files]
 
+
+def sprite_name(sidx: int, fmt: str = "jpg", variant: str = "") -> str:
+    if variant:
+        return f"sprite_{variant}_{sidx+1:04d}.{fmt}"
+    return f"sprite_{sidx+1:04d}.{fmt}"
+
+
+def save_sprite(
+    sprite: Image.Image, sprites_dir: str, sidx: int, quality: int, fmt: str = "jpg", variant: str = ""
+) -> str:
+    encoder = get_encoder(fmt)
+    out_path = os.path.join(sprites_dir, sprite_name(sidx, encoder.name, variant))
+    start = time.perf_counter()
+    sprite.save(out_path, format=encoder.pil_format, **encoder.save_args(quality))
+    observe_stage("encode", time.perf_counter() - start)
+    sheets_total.inc()
+    return out_path
+
+
+class SheetCanvas:
+    """Sheet filled with raw rgb24 tiles by index, each pasted with Pillow."""
+    name = "pil"
+
+    def __init__(self, cols: int, rows: int, tile_w: int, tile_h: int):
+        self.cols, self.rows, self.tile_w, self.tile_h = cols, rows, tile_w, tile_h
+        self._sheet = Image.new("RGB", (cols*tile_w, rows*tile_h), (0, 0, 0))
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def put(self, i: int, buf: bytes):
+        tile = Image.frombuffer("RGB", (self.tile_w, self.tile_h), buf, "raw", "RGB", 0, 1)
+        self.put_image(i, tile)
+
+    def put_image(self, i: int, tile: Image.Image):
+        """put() for a tile that is an RGB image already."""
+        self._sheet.paste(tile, ((i % self.cols) * self.tile_w, (i // self.cols) * self.tile_h))
+
+    def image(self) -> Image.Image:
+        return self._sheet
+
+
+class NumpySheetCanvas(SheetCanvas):
+    """Tiles are copied into one buffer in index order; the grid is laid out at the end by a single
+    transpose of (rows, cols, h, w, 3). Same pixels as SheetCanvas, unused cells stay black."""
+    name = "numpy"
+
+    def __init__(self, cols: int, rows: int, tile_w: int, tile_h: int):
+        self.cols, self.rows, self.tile_w, self.tile_h = cols, rows, tile_w, tile_h
+        self._frame_size = tile_w * tile_h * 3
+        self._buf = bytearray(cols * rows * self._frame_size)
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def put(self, i: int, buf: bytes):
+        self._buf[i*self._frame_size:(i+1)*self._frame_size] = buf
+
+    def put_image(self, i: int, tile: Image.Image):
+        self.put(i, tile.tobytes())
+
+    def image(self) -> Image.Image:
+        grid = np.frombuffer(self._buf, dtype=np.uint8).reshape(self.rows, self.cols, self.tile_h, self.tile_w, 3)
+        sheet = np.ascontiguousarray(grid.transpose(0, 2, 1, 3, 4))
+        return Image.fromarray(sheet.reshape(self.rows * self.tile_h, self.cols * self.tile_w, 3))
+
+
+PACKERS = {c.name: c for c in (SheetCanvas, NumpySheetCanvas)}
+
+
+def resolve_packer(packer: Optional[str] = None) -> str:
+    """SPRITE_PACKER by default; 'numpy' turns to 'pil' if NumPy isn't installed."""
+    packer = (packer or cfg.SPRITE_PACKER).lower()
+    canvas = PACKERS.get(packer)
+    if canvas is None:
+        raise ValueError(f"Unknown sprite packer: {packer}")
+    if not canvas.available():
+        print(f"[PACKER] numpy is not installed, 'pil' packer instead of '{packer}'")
+        return "pil"
+    return packer
+
+
 def pack_sprites(
     frames: List[str],
     sprites_dir: str,
@@ -106,6 +990,8 @@ def pack_sprites(
     tile_w: int,
     tile_h: int,
     quality: int = 85,
+    first_sheet: int = 0,
+    fmt: str = "jpg",
 ) -> List[str]:
     ensure_dir(sprites_dir)
     per_sprite = cols * rows
@@ -120,6 +1006,7 @@ def pack_sprites(
             break
         
         # Create canvas
+        start = time.perf_counter()
         sprite = Image.new("RGB", (cols*tile_w, rows*tile_h), (0, 0, 0))
         
         for i, fp in enumerate(chunk):
@@ -133,17 +1020,216 @@ def pack_sprites(
             except Exception as e:
                 print(f"[SPRITE FRAME ERROR] {fp}: {e}")
                 continue
+        observe_stage("pack", time.perf_counter() - start)
         
-        out_name = f"sprite_{sidx+1:04d}.jpg"
-        out_path = os.path.join(sprites_dir, out_name)
-        
-        # Save
-        sprite.save(out_path, format='JPEG', quality=quality, optimize=True)
-        sprite_paths.append(out_path)
+        sprite_paths.append(save_sprite(sprite, sprites_dir, first_sheet + sidx, quality, fmt))
         
     print(f"[SPRITES BUILT] count={len(sprite_paths)}")
     return sprite_paths
 
+
+def pack_sprites_stream(
+    frames: Iterable[bytes],
+    sprites_dir: str,
+    cols: int,
+    rows: int,
+    tile_w: int,
+    tile_h: int,
+    quality: int = 85,
+    first_sheet: int = 0,
+    fmt: str = "jpg",
+    packer: str = "pil",
+) -> Tuple[List[str], int]:
+    """Put raw rgb24 tiles into sheets as they arrive (packer: key of PACKERS). Returns sprite paths and frames count."""
+    ensure_dir(sprites_dir)
+    canvas = PACKERS[packer]
+    per_sprite = cols * rows
+    sprite_paths: List[str] = []
+    sprite = None
+    count = 0
+    # Time blocked on the frame source vs. pasting into the current sheet
+    wait = pack = 0.0
+    t = time.perf_counter()
+
+    def finish_sheet():
+        t0 = time.perf_counter()
+        image = sprite.image()
+        observe_stage("pack", pack + time.perf_counter() - t0)
+        sprite_paths.append(save_sprite(image, sprites_dir, first_sheet + len(sprite_paths), quality, fmt))
+
+    for buf in frames:
+        t0 = time.perf_counter()
+        wait += t0 - t
+        i = count % per_sprite
+        if i == 0:
+            sprite = canvas(cols, rows, tile_w, tile_h)
+        sprite.put(i, buf)
+        count += 1
+        t = time.perf_counter()
+        pack += t - t0
+        if count % per_sprite == 0:
+            finish_sheet()
+            pack = 0.0
+            sprite = None
+            t = time.perf_counter()
+    observe_stage("extract", wait + time.perf_counter() - t)
+
+    # Last incomplete sheet
+    if sprite is not None:
+        finish_sheet()
+
+    print(f"[SPRITES BUILT] count={len(sprite_paths)}")
+    return sprite_paths, count
+
+
+def pack_sheet(
+    frames: List[bytes],
+    sprites_dir: str,
+    sidx: int,
+    cols: int,
+    rows: int,
+    tile_w: int,
+    tile_h: int,
+    quality: int = 85,
+    fmt: str = "jpg",
+    packer: str = "pil",
+) -> str:
+    """One sheet from up to cols*rows raw rgb24 tiles. Returns sprite path."""
+    ensure_dir(sprites_dir)
+    start = time.perf_counter()
+    sprite = PACKERS[packer](cols, rows, tile_w, tile_h)
+    for i, buf in enumerate(frames):
+        sprite.put(i, buf)
+    image = sprite.image()
+    observe_stage("pack", time.perf_counter() - start)
+    return save_sprite(image, sprites_dir, sidx, quality, fmt)
+
+
+def master_tile(outputs: List[Tuple[str, SpriteParams]], probe: Optional[MediaInfo] = None) -> Tuple[int, int]:
+    """Tile size decoded once for several outputs: at the source aspect and not smaller than any of them."""
+    box = SpriteOptions(
+        tile_w=max(p.tile_w for _, p in outputs),
+        tile_h=max(p.tile_h for _, p in outputs),
+        tile_fit="auto",
+    )
+    return tile_geometry(box, probe)
+
+
+def fit_tile(tile: Image.Image, params: SpriteParams) -> Image.Image:
+    """Master tile scaled down to an output's tile, letterboxed for 'pad' fit."""
+    size = (params.tile_w, params.tile_h)
+    if tile.size == size:
+        return tile
+    if params.fit == "pad":
+        return ImageOps.pad(tile, size, Image.Resampling.BICUBIC, color=(0, 0, 0))
+    return tile.resize(size, Image.Resampling.BICUBIC)
+
+
+def pack_variants_stream(
+    frames: Iterable[bytes],
+    sprites_dir: str,
+    master_w: int,
+    master_h: int,
+    outputs: List[Tuple[str, SpriteParams]],
+    first_frame: int = 0,
+    packer: str = "pil",
+) -> Tuple[List[List[str]], int]:
+    """pack_sprites_stream for several outputs: every raw rgb24 tile of master size is scaled
+    to each output and put into its current sheet. Returns sprite paths of every output and frames count."""
+    ensure_dir(sprites_dir)
+    canvas = PACKERS[packer]
+    sprites: List[Optional[SheetCanvas]] = [None] * len(outputs)
+    sprite_paths: List[List[str]] = [[] for _ in outputs]
+    first_sheets = [first_frame // p.per_sprite for _, p in outputs]
+    count = 0
+    wait = pack = 0.0
+    t = time.perf_counter()
+
+    def finish_sheet(k):
+        nonlocal pack
+        name, p = outputs[k]
+        t0 = time.perf_counter()
+        image = sprites[k].image()
+        observe_stage("pack", pack + time.perf_counter() - t0)
+        pack = 0.0
+        sidx = first_sheets[k] + len(sprite_paths[k])
+        sprite_paths[k].append(save_sprite(image, sprites_dir, sidx, p.quality, p.format, name))
+        sprites[k] = None
+
+    for buf in frames:
+        t0 = time.perf_counter()
+        wait += t0 - t
+        master = Image.frombuffer("RGB", (master_w, master_h), buf, "raw", "RGB", 0, 1)
+        for k, (_, p) in enumerate(outputs):
+            i = count % p.per_sprite
+            if i == 0:
+                sprites[k] = canvas(p.cols, p.rows, p.tile_w, p.tile_h)
+            sprites[k].put_image(i, fit_tile(master, p))
+        count += 1
+        t = time.perf_counter()
+        pack += t - t0
+        for k, (_, p) in enumerate(outputs):
+            if count % p.per_sprite == 0:
+                finish_sheet(k)
+                t = time.perf_counter()
+    observe_stage("extract", wait + time.perf_counter() - t)
+
+    # Last incomplete sheets
+    for k in range(len(outputs)):
+        if sprites[k] is not None:
+            finish_sheet(k)
+
+    print(f"[SPRITES BUILT] outputs={len(outputs)} count={sum(len(x) for x in sprite_paths)}")
+    return sprite_paths, count
+
+
+def read_tiles(frames: List[str], tile_w: int, tile_h: int) -> Iterator[bytes]:
+    """Extracted frame files as raw rgb24 tiles, black for unreadable ones."""
+    for fp in frames:
+        try:
+            with Image.open(fp) as img:
+                yield img.convert("RGB").tobytes()
+        except Exception as e:
+            print(f"[SPRITE FRAME ERROR] {fp}: {e}")
+            yield bytes(tile_w * tile_h * 3)
+
+
+def tile_hash(buf: bytes, tile_w: int, tile_h: int) -> int:
+    """64-bit difference hash of a raw rgb24 tile: signs of brightness steps in a 9x8 grayscale thumbnail.
+    Survives scaling, compression noise and small motion, changes on cuts and camera moves."""
+    tile = Image.frombuffer("RGB", (tile_w, tile_h), buf, "raw", "RGB", 0, 1)
+    px = tile.convert("L").resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+    bits = 0
+    for y in range(8):
+        row = px[y*9:(y+1)*9]
+        for x in range(8):
+            bits = bits << 1 | (row[x] > row[x+1])
+    return bits
+
+
+def dedup_frames(
+    frames: Iterable[bytes],
+    tile_w: int,
+    tile_h: int,
+    runs: List[int],
+    max_distance: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yields the first tile of every run of near-identical tiles (hash distance to the run's first tile
+    at most max_distance bits, DEDUP_MAX_DISTANCE by default). runs gets the frames count of each yielded tile."""
+    if max_distance is None:
+        max_distance = cfg.DEDUP_MAX_DISTANCE
+    head = None
+    for buf in frames:
+        h = tile_hash(buf, tile_w, tile_h)
+        # Compared to the run's first tile, so a slow pan can't drift along forever
+        if head is not None and (h ^ head).bit_count() <= max_distance:
+            runs[-1] += 1
+            continue
+        head = h
+        runs.append(1)
+        yield buf
+
+
 def sec_fmt(s: float) -> str:
     h = int(s // 3600)
     m = int((s % 3600) // 60)
@@ -157,13 +1243,20 @@ def generate_vtt(
     rows: int,
     tile_w: int,
     tile_h: int,
+    fmt: str = "jpg",
+    variant: str = "",
+    spans: Optional[List[int]] = None,
 ) -> str:
+    """spans: frames count covered by each tile (dedup runs), one interval each if not given."""
     per_sprite = cols * rows
     lines = ["WEBVTT", ""]
+    frame = 0
     
     for i in range(total_frames):
-        start = i * interval_sec
-        end = (i + 1) * interval_sec
+        span = spans[i] if spans else 1
+        start = frame * interval_sec
+        end = (frame + span) * interval_sec
+        frame += span
         
         # Sprite index and img index inside of sprite
         sidx = i // per_sprite
@@ -172,62 +1265,563 @@ def generate_vtt(
         x = (idx % cols) * tile_w
         y = (idx // cols) * tile_h
         
-        # Rel path to  VTT
-        sprite_name = f"sprite_{sidx+1:04d}.jpg"
-        
         lines.append(f"{sec_fmt(start)} --> {sec_fmt(end)}")
-        lines.append(f"{sprite_name}#xywh={x},{y},{tile_w},{tile_h}")
+        # Rel path to  VTT
+        lines.append(f"{sprite_name(sidx, fmt, variant)}#xywh={x},{y},{tile_w},{tile_h}")
         lines.append("")
         
     return "\n".join(lines)
 
-def process_video(video_path: str, workspace: str, options, progress_cb) -> Tuple[List[str], str]:
+def render_frames(
+    video_path: str,
+    frames_dir: str,
+    sprites_dir: str,
+    engine: str,
+    interval: float,
+    cols: int,
+    rows: int,
+    tile_w: int,
+    tile_h: int,
+    quality: int,
+    input_args: Optional[List[str]] = None,
+    first_sheet: int = 0,
+    max_frames: Optional[int] = None,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+    fmt: str = "jpg",
+    packer: str = "pil",
+) -> Tuple[List[str], int]:
+    """Extract + pack one time range with the given engine. Returns sprite paths and frames count.
+    on_time gets ffmpeg output time (seconds from range start) as extraction goes,
+    ffmpeg processes are registered in procs. packer lays out raw tiles of the 'pipe' engine."""
+    output_args = ["-frames:v", str(max_frames)] if max_frames else []
+
+    if engine == "pipe":
+        # Frames go from ffmpeg stdout straight into sprite canvas
+        frames = iter_raw_frames(video_path, interval, tile_w, tile_h, input_args, output_args, on_time, procs)
+        return pack_sprites_stream(frames, sprites_dir, cols, rows, tile_w, tile_h, quality, first_sheet, fmt, packer)
+
+    if engine == "ffmpeg":
+        # ffmpeg lays out and encodes sheets itself
+        sheets_args = ["-frames:v", str(math.ceil(max_frames / (cols * rows)))] if max_frames else []
+        sprite_paths, total_frames = extract_sprite_sheets(
+            video_path, sprites_dir, interval, cols, rows, tile_w, tile_h, quality,
+            input_args, sheets_args, first_sheet, on_time, procs, fmt
+        )
+        if max_frames:
+            total_frames = min(total_frames, max_frames)
+        return sprite_paths, total_frames
+
+    if engine == "files":
+        extract_frames(video_path, frames_dir, interval, tile_w, tile_h, input_args, output_args, on_time, procs)
+        frames = list_frames(frames_dir)
+        if max_frames:
+            frames = frames[:max_frames]
+        print(f"[FRAMES FOUND] count={len(frames)} in {frames_dir}")
+        return pack_sprites(frames, sprites_dir, cols, rows, tile_w, tile_h, quality, first_sheet, fmt), len(frames)
+
+    raise ValueError(f"Unknown sprite engine: {engine}")
+
+
+def render_ladder(
+    video_path: str,
+    frames_dir: str,
+    sprites_dir: str,
+    engine: str,
+    outputs: List[Tuple[str, SpriteParams]],
+    master: Tuple[int, int],
+    input_args: Optional[List[str]] = None,
+    first_frame: int = 0,
+    max_frames: Optional[int] = None,
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+    packer: str = "pil",
+) -> Tuple[List[List[str]], int]:
+    """render_frames for several outputs from one decode of the range. 'pipe' and 'files' take tiles
+    of master size and scale them down in memory (sheets laid out by packer), 'ffmpeg' splits the filter graph.
+    Returns sprite paths of every output and frames count."""
+    interval = outputs[0][1].interval
+    master_w, master_h = master
+    output_args = ["-frames:v", str(max_frames)] if max_frames else []
+
+    if engine == "pipe":
+        frames = iter_raw_frames(video_path, interval, master_w, master_h, input_args, output_args, on_time, procs)
+        return pack_variants_stream(frames, sprites_dir, master_w, master_h, outputs, first_frame, packer)
+
+    if engine == "ffmpeg":
+        return extract_ladder_sheets(video_path, sprites_dir, outputs, input_args, max_frames, first_frame, on_time, procs)
+
+    if engine == "files":
+        extract_frames(video_path, frames_dir, interval, master_w, master_h, input_args, output_args, on_time, procs)
+        frames = list_frames(frames_dir)
+        if max_frames:
+            frames = frames[:max_frames]
+        print(f"[FRAMES FOUND] count={len(frames)} in {frames_dir}")
+        tiles = read_tiles(frames, master_w, master_h)
+        return pack_variants_stream(tiles, sprites_dir, master_w, master_h, outputs, first_frame, packer)
+
+    raise ValueError(f"Unknown sprite engine: {engine}")
+
+
+def plan_segments(duration: float | None, interval: float, per_sprite: int) -> List[Tuple[float, Optional[float], int, Optional[int]]]:
+    """
+    Split timeline into up to EXTRACT_PARALLELISM ranges aligned to whole sprite sheets,
+    so every range fills its own sheets and frame order/VTT stay exact.
+    Returns (start_sec, dur_sec, first_sheet, max_frames); the last range is open-ended.
+    """
+    single = [(0.0, None, 0, None)]
+    if not duration or cfg.EXTRACT_PARALLELISM <= 1:
+        return single
+
+    est_frames = int(duration / interval + 0.5)
+    total_sheets = math.ceil(est_frames / per_sprite)
+    n = min(cfg.EXTRACT_PARALLELISM, total_sheets, int(duration // max(cfg.SEGMENT_MIN_SEC, interval)))
+    if n <= 1:
+        return single
+
+    sheets_per_seg = math.ceil(total_sheets / n)
+    seg_span = sheets_per_seg * per_sprite * interval
+    segments = []
+    for j in range(n):
+        first_sheet = j * sheets_per_seg
+        if first_sheet >= total_sheets:
+            break
+        last = (j == n - 1) or (first_sheet + sheets_per_seg >= total_sheets)
+        if last:
+            segments.append((j * seg_span, None, first_sheet, None))
+            break
+        segments.append((j * seg_span, seg_span, first_sheet, sheets_per_seg * per_sprite))
+    return segments
+
+
+def short_segments(segments: List[Tuple[float, Optional[float], int, Optional[int]]], counts: List[int]) -> List[float]:
+    """Starts of plan_segments ranges that gave fewer frames than their max_frames (the open last one can't)."""
+    return [start for (start, _, _, max_frames), count in zip(segments, counts) if max_frames and count < max_frames]
+
+
+def resolve_engine(engine: Optional[str], *params: SpriteParams) -> str:
+    """SPRITE_ENGINE by default; 'ffmpeg' turns to 'pipe' if any output has a format ffmpeg doesn't encode here,
+    or tiles are deduplicated (that needs them in Python)."""
+    engine = engine or cfg.SPRITE_ENGINE
+    if engine != "ffmpeg":
+        return engine
+    for p in params:
+        if p.dedup:
+            print("[ENGINE] dedup compares tiles before packing, 'pipe' engine instead of 'ffmpeg'")
+            return "pipe"
+        encoder = get_encoder(p.format)
+        if encoder.ffmpeg_args(p.quality) is None:
+            print(f"[ENGINE] {p.format} sheets are encoded by Pillow, 'pipe' engine instead of 'ffmpeg'")
+            return "pipe"
+        if not encoder.ffmpeg_available():
+            print(f"[ENGINE] ffmpeg has no {encoder.ffmpeg_codec} encoder, 'pipe' engine instead of 'ffmpeg'")
+            return "pipe"
+    return engine
+
+
+def process_video(
+    video_path: str,
+    workspace: str,
+    options,
+    progress_cb,
+    engine: Optional[str] = None,
+    probe: Optional[MediaInfo] = None,
+    procs: Optional[ProcGroup] = None,
+    packer: Optional[str] = None,
+) -> Tuple[List[str], str, List[Tuple[str, List[str], str]]]:
     """
     Base pipline.
-    options: SpriteOptions (step_sec, cols, rows, format, quality)
-    Returns list of absolute paths to sprites, vtt content
+    options: SpriteOptions (step_sec, cols, rows, format, quality, extract_mode, tile_*, variants, dedup);
+             format is jpg (default), webp or avif, see ENCODERS
+    engine: 'pipe' - raw frames streamed from ffmpeg stdout into sheets,
+            'ffmpeg' - sheets built and encoded by ffmpeg tile filter,
+            'files' - JPEG frames in frames_tmp/, then packed with PIL.
+            Default is cfg.SPRITE_ENGINE.
+    probe: MediaInfo from probe_media(), probed here if not given.
+    procs: job's ProcGroup, all ffmpeg processes are registered there (cancel/timeout kills them).
+    packer: 'pil' or 'numpy' layout of raw tiles into sheets, see PACKERS. Default is cfg.SPRITE_PACKER.
+    Returns list of absolute paths to sprites, vtt content, and (name, sprite paths, vtt content)
+    of every options.variants entry. All outputs come from one decode of the video.
     """
-    
     # 1. Check input data
-    size_bytes = os.path.getsize(video_path)
-    w0, h0 = probe_video_dims(video_path)
-    dur = probe_duration_sec(video_path)
+    if probe is None:
+        probe = probe_media(video_path, procs)
+        check_media_limits(probe)
+    dur = probe.duration_sec
     
-    print(f"[SOURCE OK] path={video_path} size={size_bytes} dims={w0}x{h0} dur={dur}")
+    print(f"[SOURCE OK] path={video_path} size={probe.size_bytes} dims={probe.width}x{probe.height} "
+          f"dur={dur} codec={probe.codec} fps={probe.fps} rot={probe.rotation} kf={probe.keyframe_interval_sec}")
     
-    interval = options.step_sec if options.step_sec > 0 else cfg.DEFAULT_STEP_SEC
-    cols = options.cols if options.cols > 0 else cfg.DEFAULT_COLS
-    rows = options.rows if options.rows > 0 else cfg.DEFAULT_ROWS
-    tile_w = DEFAULT_TILE_W
-    tile_h = DEFAULT_TILE_H
+    outputs = resolve_variants(options, probe)
+    params = outputs[0][1]
+    interval, cols, rows = params.interval, params.cols, params.rows
+    tile_w, tile_h, quality, fmt = params.tile_w, params.tile_h, params.quality, params.format
+    engine = resolve_engine(engine, *(p for _, p in outputs))
+    packer = resolve_packer(packer)
+    sprites_dir = os.path.join(workspace, "sprites")
     
-    print(f"[PARAMS] interval={interval} tw={tile_w} th={tile_h} cols={cols} rows={rows}")
+    mode = choose_extract_mode(options.extract_mode, dur, probe.keyframe_interval_sec, interval)
+    input_args = extract_input_args(mode)
+    frames_dir = None
     
-    progress_cb(10, "Extracting frames...")
+    print(f"[PARAMS] interval={interval} tw={tile_w} th={tile_h} cols={cols} rows={rows} fmt={fmt} q={quality} "
+          f"engine={engine} mode={mode} packer={packer}")
+
+    ladder = len(outputs) > 1
+    if ladder:
+        # Every range is cut on whole sheets of each output
+        per_sprite = math.lcm(*(p.per_sprite for _, p in outputs))
+        master = master_tile(outputs, probe)
+        for name, p in outputs[1:]:
+            print(f"[VARIANT] {name}: tw={p.tile_w} th={p.tile_h} cols={p.cols} rows={p.rows} fmt={p.format} q={p.quality}")
+        print(f"[LADDER] outputs={len(outputs)} master={master[0]}x{master[1]}")
+    else:
+        per_sprite = cols * rows
+
+    def render(frames_sub, range_args, first_sheet=0, max_frames=None, on_time=None):
+        # Sprite paths of every output and frames count of one time range
+        if ladder:
+            return render_ladder(
+                video_path, frames_sub, sprites_dir, engine, outputs, master,
+                range_args, first_sheet * per_sprite, max_frames, on_time, procs, packer
+            )
+        paths, count = render_frames(
+            video_path, frames_sub, sprites_dir, engine,
+            interval, cols, rows, tile_w, tile_h, quality,
+            range_args, first_sheet, max_frames, on_time, procs, fmt, packer
+        )
+        return [paths], count
     
-    # 2. Frames extraction
-    frames_dir = os.path.join(workspace, "frames_tmp")
-    extract_frames(video_path, frames_dir, interval, tile_w, tile_h)
+    progress_cb(10, "Extracting frames...")
+    # Continuous progress from ffmpeg, also checks for cancel while it runs
+    tracker = ExtractProgress(progress_cb, dur)
     
-    frames = list_frames(frames_dir)
-    print(f"[FRAMES FOUND] count={len(frames)}")
-    if not frames:
+    # Frames count of each tile when runs of near-identical tiles are collapsed
+    runs = [] if params.dedup else None
+
+    if mode == "seek" or runs is not None:
+        # 2+3. One ordered stream of raw tiles: per-tile seeks, or every frame when dedup has to see
+        # them all in order (no parallel ranges then)
+        src_w, src_h = master if ladder else (tile_w, tile_h)
+        if mode == "seek":
+            frames = iter_seek_frames(video_path, seek_timestamps(dur, interval), src_w, src_h, tracker.range_cb(), procs)
+        elif engine == "files":
+            frames_dir = os.path.join(workspace, "frames_tmp")
+            extract_frames(video_path, frames_dir, interval, src_w, src_h, input_args, on_time=tracker.range_cb(), procs=procs)
+            frames = read_tiles(list_frames(frames_dir), src_w, src_h)
+        else:
+            frames = iter_raw_frames(video_path, interval, src_w, src_h, input_args, on_time=tracker.range_cb(), procs=procs)
+        if runs is not None:
+            frames = dedup_frames(frames, src_w, src_h, runs)
+        if ladder:
+            sprite_paths, total_frames = pack_variants_stream(
+                frames, sprites_dir, src_w, src_h, outputs, packer=packer
+            )
+        else:
+            paths, total_frames = pack_sprites_stream(
+                frames, sprites_dir, cols, rows, tile_w, tile_h, quality, fmt=fmt, packer=packer
+            )
+            sprite_paths = [paths]
+        if runs is not None:
+            print(f"[DEDUP] frames={sum(runs)} tiles={total_frames}")
+    else:
+        segments = plan_segments(dur, interval, per_sprite)
+        frames_dir = os.path.join(workspace, "frames_tmp")
+
+        if len(segments) == 1:
+            # 2+3. Frames extraction + compile sprites
+            sprite_paths, total_frames = render(frames_dir, input_args, on_time=tracker.range_cb())
+        else:
+            # 2+3. Time ranges rendered concurrently, each into its own sheets
+            print(f"[SEGMENTS] {len(segments)} ranges: {[(round(st, 3), d) for st, d, _, _ in segments]}")
+
+            def run_segment(j, seg):
+                start, seg_dur, first_sheet, max_frames = seg
+                seg_args = [*input_args, "-ss", f"{start:.3f}"]
+                if seg_dur:
+                    seg_args += ["-t", f"{seg_dur:.3f}"]
+                return render(
+                    os.path.join(frames_dir, f"seg_{j:03d}"), seg_args, first_sheet, max_frames, tracker.range_cb(j)
+                )
+
+            if procs is None:
+                # Needed to stop the other ranges when one fails
+                procs = ProcGroup()
+            with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+                futures = [pool.submit(run_segment, j, seg) for j, seg in enumerate(segments)]
+                for fut in as_completed(futures):
+                    error = fut.exception()
+                    if error is not None:
+                        # Don't let the other ranges decode to the end of a failed job
+                        procs.stop(error)
+                        raise error
+                results = [fut.result() for fut in futures]
+
+            short = short_segments(segments, [count for _, count in results])
+            if short:
+                # Black cells in the middle would shift every later cue: drop the ranges, render in one pass
+                print(f"[SEGMENTS] ranges at {[round(st, 3) for st in short]}s gave fewer frames than planned, "
+                      f"rendering in one pass")
+                for paths, _ in results:
+                    for seg_paths in paths:
+                        for p in seg_paths:
+                            if os.path.exists(p):
+                                os.remove(p)
+                shutil.rmtree(frames_dir, ignore_errors=True)
+                tracker = ExtractProgress(progress_cb, dur)
+                sprite_paths, total_frames = render(frames_dir, input_args, on_time=tracker.range_cb())
+            else:
+                sprite_paths = [[] for _ in outputs]
+                for paths, _ in results:
+                    for k, seg_paths in enumerate(paths):
+                        sprite_paths[k].extend(seg_paths)
+                # Frame index of the last range is fixed by its first sheet
+                total_frames = segments[-1][2] * per_sprite + results[-1][1]
+
+    print(f"[FRAMES FOUND] count={total_frames}")
+    if not total_frames:
         raise RuntimeError("No frames extracted")
-        
-    progress_cb(50, "Building sprites...")
-    
-    # 3. Compile sprites
-    sprites_dir = os.path.join(workspace, "sprites")
-    quality = options.quality if options.quality > 0 else 85
-    
-    sprite_paths = pack_sprites(frames, sprites_dir, cols, rows, tile_w, tile_h, quality)
+    frames_total.inc(sum(runs) if runs else total_frames)
     
     # 4. Generate VTT
-    vtt_content = generate_vtt(len(frames), interval, cols, rows, tile_w, tile_h)
+    start = time.perf_counter()
+    vtts = [
+        generate_vtt(total_frames, interval, p.cols, p.rows, p.tile_w, p.tile_h, p.format, name, runs)
+        for name, p in outputs
+    ]
+    observe_stage("vtt", time.perf_counter() - start)
     
     progress_cb(90, "Finalizing...")
     
     # Clean workspace
-    shutil.rmtree(frames_dir, ignore_errors=True)
+    if frames_dir:
+        shutil.rmtree(frames_dir, ignore_errors=True)
     
-    return sprite_paths, vtt_content
\ No newline at end of file
+    variants = [(name, sprite_paths[k], vtts[k]) for k, (name, _) in enumerate(outputs) if k]
+    return sprite_paths[0], vtts[0], variants
+
+
+# Asyncio variants for grpc.aio mode: ffmpeg runs via asyncio subprocesses, Pillow work goes to an executor.
+
+async def exec_managed_async(cmd: List[str], procs: Optional[ProcGroup] = None, **kwargs):
+    """popen_managed for asyncio subprocesses."""
+    proc = await asyncio.create_subprocess_exec(*cmd, start_new_session=True, **kwargs)
+    if procs is not None:
+        procs.add(proc)
+    return proc
+
+
+def release_proc(proc, procs: Optional[ProcGroup]):
+    """Unregisters a finished process, raising the error the group was stopped with."""
+    if procs is not None:
+        procs.discard(proc)
+        procs.check()
+
+
+async def run_cmd_async(cmd: List[str], procs: Optional[ProcGroup] = None) -> Tuple[int, str, str]:
+    """Run ext cmd without blocking the event loop."""
+    try:
+        proc = await exec_managed_async(
+            cmd, procs,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return -1, "", "Command not found"
+    try:
+        out, err = await proc.communicate()
+    finally:
+        release_proc(proc, procs)
+    return proc.returncode, out.decode('utf-8', 'ignore'), err.decode('utf-8', 'ignore')
+
+
+async def read_stderr_async(proc, on_time: Optional[Callable[[float], None]] = None) -> Tuple[str, Optional[Exception]]:
+    """FfmpegProc stderr handling for an asyncio subprocess. Returns the log and the error
+    raised by on_time, if any (ffmpeg is killed then)."""
+    log: List[str] = []
+    interrupted = None
+    async for raw in proc.stderr:
+        line = raw.decode('utf-8', 'ignore').rstrip()
+        kv = parse_progress_line(line)
+        if kv is None:
+            log.append(line)
+            continue
+        sec = progress_time(*kv)
+        if sec is None or on_time is None or interrupted:
+            continue
+        try:
+            on_time(sec)
+        except Exception as e:
+            interrupted = e
+            if proc.returncode is None:
+                proc.kill()
+    return "\n".join(log), interrupted
+
+
+async def run_ffmpeg_async(
+    cmd: List[str],
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+) -> Tuple[int, str]:
+    """FfmpegProc(cmd, on_time, procs=procs).result() without blocking the event loop."""
+    proc = await exec_managed_async(
+        cmd, procs,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        err, interrupted = await read_stderr_async(proc, on_time)
+        code = await proc.wait()
+    finally:
+        release_proc(proc, procs)
+    if interrupted:
+        raise interrupted
+    return code, err
+
+
+async def probe_media_async(src: str, procs: Optional[ProcGroup] = None) -> MediaInfo:
+    start = time.perf_counter()
+    code, out, err = await run_cmd_async(probe_cmd(src), procs)
+    observe_stage("probe", time.perf_counter() - start)
+    if code != 0:
+        raise RuntimeError(f"ffprobe failed: {err[:300]}")
+    return parse_probe(out, src)
+
+
+async def pack_raw_frames_async(
+    cmd: List[str],
+    sprites_dir: str,
+    params: SpriteParams,
+    executor: Optional[Executor],
+    on_time: Optional[Callable[[float], None]] = None,
+    procs: Optional[ProcGroup] = None,
+    packer: str = "pil",
+) -> Tuple[List[str], int]:
+    """Reads one sheet worth of raw tiles at a time from ffmpeg stdout, packs it in executor
+    while the next sheet is being read."""
+    loop = asyncio.get_running_loop()
+    frame_size = params.tile_w * params.tile_h * 3
+    sheet_bytes = frame_size * params.per_sprite
+
+    proc = await exec_managed_async(
+        cmd, procs,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    err_task = asyncio.ensure_future(read_stderr_async(proc, on_time))
+
+    sprite_paths: List[str] = []
+    total_frames = 0
+    sheet_idx = 0
+    pending = None
+    finished = False
+    wait = 0.0
+    try:
+        while True:
+            t = time.perf_counter()
+            try:
+                data = await proc.stdout.readexactly(sheet_bytes)
+            except asyncio.IncompleteReadError as e:
+                data = e.partial
+            wait += time.perf_counter() - t
+            n = len(data) // frame_size
+            if n:
+                frames = [data[i*frame_size:(i+1)*frame_size] for i in range(n)]
+                if pending is not None:
+                    sprite_paths.append(await pending)
+                pending = loop.run_in_executor(executor, functools.partial(
+                    pack_sheet, frames, sprites_dir, sheet_idx,
+                    params.cols, params.rows, params.tile_w, params.tile_h, params.quality, params.format, packer
+                ))
+                sheet_idx += 1
+                total_frames += n
+            if len(data) < sheet_bytes:
+                finished = True
+                break
+        if pending is not None:
+            sprite_paths.append(await pending)
+    finally:
+        if not finished and proc.returncode is None:
+            proc.kill()
+        code = await proc.wait()
+        err, interrupted = await err_task
+        release_proc(proc, procs)
+
+    if interrupted:
+        raise interrupted
+    if finished and code != 0:
+        raise RuntimeError(f"ffmpeg extract failed: {err[:300]}")
+    observe_stage("extract", wait)
+    print(f"[SPRITES BUILT] count={len(sprite_paths)} (async)")
+    return sprite_paths, total_frames
+
+
+async def process_video_async(
+    video_path: str,
+    workspace: str,
+    options,
+    progress_cb,
+    probe: MediaInfo,
+    executor: Optional[Executor] = None,
+    engine: Optional[str] = None,
+    procs: Optional[ProcGroup] = None,
+    packer: Optional[str] = None,
+) -> Tuple[List[str], str, List[Tuple[str, List[str], str]]]:
+    """
+    process_video for the event loop. 'pipe' and 'ffmpeg' engines in a single range run natively;
+    seek mode, parallel segments, the 'files' engine, variants and dedup run the sync pipeline in executor.
+    """
+    loop = asyncio.get_running_loop()
+    params = resolve_params(options, probe)
+    engine = resolve_engine(engine, params)
+    packer = resolve_packer(packer)
+    mode = choose_extract_mode(options.extract_mode, probe.duration_sec, probe.keyframe_interval_sec, params.interval)
+    segments = plan_segments(probe.duration_sec, params.interval, params.per_sprite)
+
+    if mode == "seek" or len(segments) > 1 or engine not in ("pipe", "ffmpeg") or options.variants or params.dedup:
+        return await loop.run_in_executor(executor, functools.partial(
+            process_video, video_path, workspace, options, progress_cb,
+            engine=engine, probe=probe, procs=procs, packer=packer
+        ))
+
+    print(f"[PARAMS] {params} engine={engine} mode={mode} packer={packer} (async)")
+    sprites_dir = os.path.join(workspace, "sprites")
+    ensure_dir(sprites_dir)
+    input_args = extract_input_args(mode)
+    progress_cb(10, "Extracting frames...")
+    on_time = ExtractProgress(progress_cb, probe.duration_sec).range_cb()
+
+    if engine == "pipe":
+        cmd = raw_frames_cmd(video_path, params.interval, params.tile_w, params.tile_h, input_args)
+        print(f"[FFMPEG CMD] {' '.join(cmd)}")
+        sprite_paths, total_frames = await pack_raw_frames_async(
+            cmd, sprites_dir, params, executor, on_time, procs, packer
+        )
+    else:
+        cmd = sprite_sheets_cmd(
+            video_path, sprites_dir, params.interval, params.cols, params.rows,
+            params.tile_w, params.tile_h, params.quality, input_args, fmt=params.format
+        )
+        print(f"[FFMPEG CMD] {' '.join(cmd)}")
+        start = time.perf_counter()
+        code, err = await run_ffmpeg_async(cmd, on_time, procs)
+        observe_stage("extract", time.perf_counter() - start)
+        if code != 0:
+            raise RuntimeError(f"ffmpeg tile failed: {err[-300:]}")
+        total_frames = count_showinfo_frames(err)
+        sheets = math.ceil(total_frames / params.per_sprite)
+        sheets_total.inc(sheets)
+        sprite_paths = [os.path.join(sprites_dir, sprite_name(i, params.format)) for i in range(sheets)]
+
+    print(f"[FRAMES FOUND] count={total_frames}")
+    if not total_frames:
+        raise RuntimeError("No frames extracted")
+    frames_total.inc(total_frames)
+
+    start = time.perf_counter()
+    vtt_content = generate_vtt(
+        total_frames, params.interval, params.cols, params.rows, params.tile_w, params.tile_h, params.format
+    )
+    observe_stage("vtt", time.perf_counter() - start)
+    progress_cb(90, "Finalizing...")
+    return sprite_paths, vtt_content, []
@@ -1,20 +1,99 @@
 import os
+import re
 import shutil
 import tempfile
 from config.service_cfg import cfg
 
+def tmp_base() -> str:
+    """TMP_DIR or system temp."""
+    base = cfg.TMP_DIR
+    return base if base else tempfile.gettempdir()
+
 def create_job_workspace(job_id: str):
     """Create temp dir for task"""
-    base = cfg.TMP_DIR
-    path = os.path.join(base if base else tempfile.gettempdir(), f"ytsprites_{job_id}")
+    path = os.path.join(tmp_base(), f"ytsprites_{job_id}")
     os.makedirs(path, exist_ok=True)
     return path
 
+# ytsprites_<job_id> and ytsprites_cached_<hex>, not the result cache dir
+WORKSPACE_RE = re.compile(r"^ytsprites_(cached_)?[0-9a-f-]{32,36}$")
+
+def list_workspaces():
+    """Job workspaces present in tmp_base()."""
+    base = tmp_base()
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return []
+    return [os.path.join(base, n) for n in names if WORKSPACE_RE.match(n) and os.path.isdir(os.path.join(base, n))]
+
+def workspaces_bytes() -> int:
+    """Bytes of files in job workspaces (hard links to cached results are counted too)."""
+    total = 0
+    for ws in list_workspaces():
+        for root, _, files in os.walk(ws):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+    return total
+
 def cleanup_workspace(path: str):
     """Remove temp dir."""
     if path and os.path.exists(path):
         shutil.rmtree(path, ignore_errors=True)
 
+def cleanup_job_inputs(path: str, keep=("sprites",)):
+    """Remove everything in workspace except results (input video, frames)."""
+    if not path or not os.path.isdir(path):
+        return
+    for name in os.listdir(path):
+        if name in keep:
+            continue
+        p = os.path.join(path, name)
+        if os.path.isdir(p):
+            shutil.rmtree(p, ignore_errors=True)
+        else:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+def link_or_copy(src: str, dst: str):
+    """Hard link if on the same filesystem, else copy."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
 def save_bytes_to_file(path: str, data: bytes):
     with open(path, 'wb') as f:
-        f.write(data)
\ No newline at end of file
+        f.write(data)
+
+def save_chunks_to_file(path: str, chunks, max_bytes: int = None, hasher=None) -> int:
+    """Write an iterable of byte chunks to file as they arrive. Returns total bytes written.
+    hasher (e.g. hashlib.sha256()) is updated with every chunk.
+    Raises ValueError if max_bytes is exceeded (partial file is left for cleanup_workspace)."""
+    total = 0
+    with open(path, 'wb') as f:
+        for data in chunks:
+            if not data:
+                continue
+            total += len(data)
+            if max_bytes is not None and total > max_bytes:
+                raise ValueError(f"Upload exceeds limit of {max_bytes} bytes")
+            if hasher is not None:
+                hasher.update(data)
+            f.write(data)
+    return total
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total